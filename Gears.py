@@ -2,8 +2,62 @@
 #Description-Creates a pair of bevel gears. Based on Autodesk sample code by
 #Brian Ekins
 
-import adsk.core, adsk.fusion, adsk.cam, traceback
+import adsk.core, adsk.fusion, traceback
 import math
+import os, sys, time
+
+# When loading the add-in started, for its cold start time.
+_loadStart = time.perf_counter()
+
+# Make the headless gearlib package next to this script importable.
+_scriptDir = os.path.dirname(os.path.realpath(__file__))
+if _scriptDir not in sys.path:
+    sys.path.insert(0, _scriptDir)
+
+from gearlib import spec as gearSpec
+from gearlib.spec import GearSpec
+from gearlib.validation import ExpressionCache, ValidationEngine
+from gearlib.debounce import Debouncer
+from gearlib.speculate import Speculator
+from gearlib.lazy import LazyModule, loadTimes
+from gearlib.instrument import StageTimer, StartupTimer, writeRecord
+
+# Only what the command registration and dialog need is imported up front.
+# The geometry builders, analysis and export code load on first use, which is
+# usually the first preview.
+gearBatch = LazyModule('gearlib.batch')
+gearCrossSection = LazyModule('gearlib.crosssection')
+gearNurbs = LazyModule('gearlib.nurbs')
+gearProfile = LazyModule('gearlib.profile')
+gearRegions = LazyModule('gearlib.regions')
+gearTopology = LazyModule('gearlib.topology')
+gearTrain = LazyModule('gearlib.train')
+
+# Where drawGearSet appends one JSON line of stage timings per generation. Set
+# the BEVEL_GEARS_TIMING_LOG environment variable to change it, or to an empty
+# string to turn the log off.
+TIMING_LOG = os.environ.get('BEVEL_GEARS_TIMING_LOG', os.path.join(_scriptDir, 'timings.jsonl'))
+
+# Whether to add a BevelGear/Timing attribute with a timing summary to each
+# generated component.
+TIMING_ATTRIBUTE = True
+
+# Whether a direct model build also times how long the gear set takes to
+# recompute, as built and once made direct, by rolling the timeline marker
+# back over it and forward again. It is skipped when the gear set isn't at
+# the end of the timeline, so a marker the user rolled back stays put.
+RECOMPUTE_TIMING = True
+
+# How direct models are built. 'transient' does the tooth patterns, root cones
+# and shaft holes in memory (buildGearSetTransient), 'features' builds the
+# parametric model and then removes its history (makeDirect).
+DIRECT_BUILDER = 'transient'
+
+# How the involute flanks are drawn. 'fitted' fits splines through the
+# involute points and constrains them tangent to the root lines, 'nurbs'
+# draws fixed cubic B-splines fitted headless within the profile tolerance,
+# with the tangency built in (see gearlib.nurbs).
+PROFILE_CURVES = 'fitted'
 
 # Globals
 _app = adsk.core.Application.cast(None)
@@ -17,35 +71,84 @@ _backlash = adsk.core.ValueCommandInput.cast(None)
 _module = adsk.core.ValueCommandInput.cast(None)
 _numTeeth = adsk.core.StringValueCommandInput.cast(None)
 _numTeeth1 = adsk.core.StringValueCommandInput.cast(None)
-#_rootFilletRad = adsk.core.ValueCommandInput.cast(None)
+_rootFilletRad = adsk.core.ValueCommandInput.cast(None)
 _thickness = adsk.core.ValueCommandInput.cast(None)     # TODO: Replace this with face (height of tooth loft)
 _holeDiam = adsk.core.ValueCommandInput.cast(None)
+_profileTolerance = adsk.core.ValueCommandInput.cast(None)
+_batchTable = adsk.core.StringValueCommandInput.cast(None)
+_directModel = adsk.core.BoolValueCommandInput.cast(None)
+_differentialPinions = adsk.core.StringValueCommandInput.cast(None)
+_preview = adsk.core.BoolValueCommandInput.cast(None)
 _pitchDiam = adsk.core.TextBoxCommandInput.cast(None)
 _errMessage = adsk.core.TextBoxCommandInput.cast(None)
 
+# The GearSpec for the current dialog values, shared by the command handlers.
+_gearSpec = None
+
+# Memoized expression values and the incremental validator, created fresh
+# for each dialog.
+_expressions = None
+_validation = None
+
+# Preview support. Input changes restart _previewDebounce; the preview is only
+# built once the inputs have been quiet for PREVIEW_DELAY seconds, when the
+# custom event asks the command to run its preview again.
+PREVIEW_DELAY = 0.3
+PREVIEW_EVENT_ID = 'adskXGearPreviewEvent'
+_command = adsk.core.Command.cast(None)
+_previewDebounce = None
+
+# Computes the math of the gear set in the dialog on a worker thread while the
+# dialog is open, see precomputeGearSet. OK waits at most SPECULATION_WAIT
+# seconds for it before doing the work itself.
+SPECULATION_WAIT = 1.0
+_speculator = None
+
+# The command and the toolbar panel its button goes in.
+COMMAND_ID = 'adskXGearPythonScript'
+PANEL_ID = 'SolidCreatePanel'
+
+# Handlers that live as long as the add-in, and the ones for the open dialog,
+# released when it closes.
 _handlers = []
+_commandHandlers = []
+
+# Dialog start times over the session, see finishStartup, and how long run()
+# took to register the command.
+_startup = None
+_registerSeconds = 0.0
 
 def run(context):
     try:
-        global _app, _ui
+        start = time.perf_counter()
+        global _app, _ui, _registerSeconds
         _app = adsk.core.Application.get()
         _ui  = _app.userInterface
 
         #if _ui:
         #    _ui.messageBox("Running Gears.py")
 
-        cmdDef = _ui.commandDefinitions.itemById('adskXGearPythonScript')
+        cmdDef = _ui.commandDefinitions.itemById(COMMAND_ID)
         if not cmdDef:
             # Create a command definition.
-            cmdDef = _ui.commandDefinitions.addButtonDefinition('adskXGearPythonScript', 'Bevel Gears', 'Creates a pair of bevel gears', '') 
+            cmdDef = _ui.commandDefinitions.addButtonDefinition(COMMAND_ID, 'Bevel Gears', 'Creates a pair of bevel gears', '') 
         
         # Connect to the command created event.
         onCommandCreated = GearCommandCreatedHandler()
         cmdDef.commandCreated.add(onCommandCreated)
         _handlers.append(onCommandCreated)
+
+        # The add-in stays loaded, with its caches, between uses of the
+        # button.
+        panel = _ui.allToolbarPanels.itemById(PANEL_ID)
+        if panel and not panel.controls.itemById(COMMAND_ID):
+            panel.controls.addCommand(cmdDef)
+        _registerSeconds = time.perf_counter() - start
         
-        # Execute the command.
-        cmdDef.execute()
+        # Open the dialog straight away when started by hand, but not when
+        # Fusion starts up.
+        if not (context and context.get('IsApplicationStartup')):
+            cmdDef.execute()
 
         # prevent this module from being terminate when the script returns, because we are waiting for event handlers to fire
         adsk.autoTerminate(False)
@@ -54,6 +157,47 @@ def run(context):
             _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
+def stop(context):
+    try:
+        closeDialog()
+        panel = _ui.allToolbarPanels.itemById(PANEL_ID)
+        control = panel.controls.itemById(COMMAND_ID) if panel else None
+        if control:
+            control.deleteMe()
+        cmdDef = _ui.commandDefinitions.itemById(COMMAND_ID)
+        if cmdDef:
+            cmdDef.deleteMe()
+        _handlers.clear()
+    except:
+        if _ui:
+            _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+# Stops the preview debounce and the speculation worker, and releases the
+# open dialog's handlers.
+def closeDialog():
+    global _command, _speculator
+    if _previewDebounce:
+        _previewDebounce.cancel()
+    if _speculator:
+        _speculator.stop()
+        _speculator = None
+    _app.unregisterCustomEvent(PREVIEW_EVENT_ID)
+    _commandHandlers.clear()
+    _command = None
+
+
+# Logs how long the dialog took to open, cold or warm, with the modules
+# loaded on first use so far and how warm the profile cache is.
+def finishStartup(seconds):
+    global _startup
+    if _startup is None:
+        _startup = StartupTimer(_loadSeconds, _registerSeconds)
+    profileCache = gearProfile.profileCache.info() if gearProfile.isLoaded else None
+    writeRecord(TIMING_LOG, _startup.record(seconds, fusionVersion=_app.version, lazyImports=dict(loadTimes),
+                                            profileCache=profileCache))
+
+
 class GearCommandDestroyHandler(adsk.core.CommandEventHandler):
     def __init__(self):
         super().__init__()
@@ -61,20 +205,32 @@ class GearCommandDestroyHandler(adsk.core.CommandEventHandler):
         try:
             eventArgs = adsk.core.CommandEventArgs.cast(args)
 
-            # when the command is done, terminate the script
-            # this will release all globals which will remove all event handlers
-            adsk.terminate()
+            # The add-in keeps running, with its caches, for the next time
+            # the command is used.
+            closeDialog()
         except:
             if _ui:
                 _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
+# Evaluates a value expression with the units manager. Returns (True, value)
+# when the expression is valid and (False, 0) otherwise.
+def evaluateExpression(expression, unitType):
+    des = adsk.fusion.Design.cast(_app.activeProduct)
+    unitsMgr = des.unitsManager
+    
+    if unitsMgr.isValidExpression(expression, unitType):
+        return (True, unitsMgr.evaluateExpression(expression, unitType))
+    else:
+        return (False, 0)
+
+
 # Verfies that a value command input has a valid expression and returns the 
 # value if it does.  Otherwise it returns False.  This works around a 
 # problem where when you get the value from a ValueCommandInput it causes the
-# current expression to be evaluated and updates the display.  Some new functionality
-# is being added in the future to the ValueCommandInput object that will make 
-# this easier and should make this function obsolete.
+# current expression to be evaluated and updates the display.  Values are
+# memoized by expression and unit type for the life of the dialog, so
+# repeated events don't go back to the units manager.
 def getCommandInputValue(commandInput, unitType):
 
     try:
@@ -82,26 +238,96 @@ def getCommandInputValue(commandInput, unitType):
         if not valCommandInput:
             return (False, 0)
 
-        # Verify that the expression is valid.
-        des = adsk.fusion.Design.cast(_app.activeProduct)
-        unitsMgr = des.unitsManager
-        
-        if unitsMgr.isValidExpression(valCommandInput.expression, unitType):
-            value = unitsMgr.evaluateExpression(valCommandInput.expression, unitType)
-            return (True, value)
-        else:
-            return (False, 0)
+        return _expressions.value(valCommandInput.expression, unitType)
     except:
         if _ui:
             _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
+# Formats a length in cm for display in the dialog.
+def formatLength(length):
+    des = adsk.fusion.Design.cast(_app.activeProduct)
+    return des.unitsManager.formatInternalValue(length, _units, True)
+
+
+# Returns the pressure angle selected in the dialog, in radians.
+def selectedPressureAngle():
+    if _pressureAngle.selectedItem.name == 'Custom':
+        result = getCommandInputValue(_pressureAngleCustom, 'deg')
+        return result[1] if result[0] else None
+    elif _pressureAngle.selectedItem.name == '14.5 deg':
+        return 14.5 * (math.pi/180)
+    elif _pressureAngle.selectedItem.name == '20 deg':
+        return 20.0 * (math.pi/180)
+    elif _pressureAngle.selectedItem.name == '25 deg':
+        return 25.0 * (math.pi/180)
+
+
+# Builds the GearSpec for the current dialog values. The same instance is
+# returned for as long as the values don't change, so the input changed,
+# validate and execute handlers share its derived geometry. Returns
+# (spec, errorMessage); spec is None when an input can't be evaluated.
+def currentGearSpec():
+    global _gearSpec
+
+    # Verify that the tooth counts are whole numbers.
+    if not _numTeeth.value.isdigit() or not _numTeeth1.value.isdigit():
+        return (None, 'The number of teeth must be a whole number.')
+
+    values = [getCommandInputValue(_module, '')]
+    for commandInput in (_backlash, _thickness, _holeDiam, _profileTolerance, _rootFilletRad):
+        values.append(getCommandInputValue(commandInput, _units))
+    if not all(result[0] for result in values):
+        return (None, '')
+    module, backlash, thickness, holeDiam, profileTolerance, rootFilletRad = [result[1] for result in values]
+
+    pressureAngle = selectedPressureAngle()
+    if pressureAngle is None:
+        return (None, '')
+
+    spec = GearSpec(module, int(_numTeeth.value), int(_numTeeth1.value), pressureAngle, backlash, thickness, holeDiam, profileTolerance,
+                    rootFilletRad)
+    if _gearSpec is None or _gearSpec != spec:
+        _gearSpec = spec.inherit(_gearSpec)
+    return (_gearSpec, '')
+
+
+# The dialog's starting values, as the strings the execute handler saves in
+# the design's SpurGear attributes. Parsed once when the add-in loads; values
+# saved in the design replace them.
+DIALOG_DEFAULTS = {
+    'pressureAngle': '20 deg',
+    'pressureAngleCustom': str(20 * (math.pi/180.0)),
+    'module': '2.0',
+    'backlash': '0.05',
+    'numTeeth': '25',
+    'numTeeth1': '10',
+    'rootFilletRad': str(0.0),      # no fillet
+    'thickness': str(1.0),          # 1 cm
+    'holeDiam': str(0.8),           # 8 mm
+    'profileTolerance': str(0.001), # 0.01 mm
+    'directModel': 'False',
+    'differentialPinions': '0',
+    'batchTable': '',
+}
+
+
+# The dialog values saved in a design over DIALOG_DEFAULTS, read with one
+# API call for the whole group rather than one per value.
+def dialogValues(des):
+    values = dict(DIALOG_DEFAULTS)
+    for attrib in des.attributes.itemsByGroup('SpurGear'):
+        values[attrib.name] = attrib.value
+    return values
+
+
 # Event handler for the commandCreated event.
 class GearCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
     def __init__(self):
         super().__init__()
     def notify(self, args):
         try:
+            start = time.perf_counter()
             eventArgs = adsk.core.CommandCreatedEventArgs.cast(args)
             
             # Verify that a Fusion design is active.
@@ -123,58 +349,34 @@ class GearCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
 
             # First haxxoring of sample gear generator, force _units to mm
             _units = 'mm'
+
+            # Start each dialog with fresh expression values, since user
+            # parameters may have changed since the last one.
+            global _expressions, _validation
+            _expressions = ExpressionCache(evaluateExpression)
+            _validation = ValidationEngine(gearSpec.RULES)
                         
-            pressureAngle = '20 deg'
-            pressureAngleAttrib = des.attributes.itemByName('SpurGear', 'pressureAngle')
-            if pressureAngleAttrib:
-                pressureAngle = pressureAngleAttrib.value
-            
-            pressureAngleCustom = 20 * (math.pi/180.0)
-            pressureAngleCustomAttrib = des.attributes.itemByName('SpurGear', 'pressureAngleCustom')
-            if pressureAngleCustomAttrib:
-                pressureAngleCustom = float(pressureAngleCustomAttrib.value)            
-
-            metricModule = '2.0'
-            moduleAttrib = des.attributes.itemByName('SpurGear', 'module')
-            if moduleAttrib:
-                metricModule = moduleAttrib.value
-
-            backlash = '0.05'
-            backlashAttrib = des.attributes.itemByName('SpurGear', 'backlash')
-            if backlashAttrib:
-                backlash = backlashAttrib.value
-
-            numTeeth = '25'            
-            numTeethAttrib = des.attributes.itemByName('SpurGear', 'numTeeth')
-            if numTeethAttrib:
-                numTeeth = numTeethAttrib.value
-
-            numTeeth1 = '10'            
-            numTeeth1Attrib = des.attributes.itemByName('SpurGear', 'numTeeth1')
-            if numTeeth1Attrib:
-                numTeeth1 = numTeeth1Attrib.value
-
-            #rootFilletRad = str(.05)    # .5 mm
-            #rootFilletRadAttrib = des.attributes.itemByName('SpurGear', 'rootFilletRad')
-            #if rootFilletRadAttrib:
-            #    rootFilletRad = rootFilletRadAttrib.value
-
-            thickness = str(1.0)        # 1 cm 
-            thicknessAttrib = des.attributes.itemByName('SpurGear', 'thickness')
-            if thicknessAttrib:
-                thickness = thicknessAttrib.value
-            
-            holeDiam = str(0.8)         # 8 mm
-            holeDiamAttrib = des.attributes.itemByName('SpurGear', 'holeDiam')
-            if holeDiamAttrib:
-                holeDiam = holeDiamAttrib.value
+            values = dialogValues(des)
+            pressureAngle = values['pressureAngle']
+            pressureAngleCustom = float(values['pressureAngleCustom'])
+            metricModule = values['module']
+            backlash = values['backlash']
+            numTeeth = values['numTeeth']
+            numTeeth1 = values['numTeeth1']
+            rootFilletRad = values['rootFilletRad']
+            thickness = values['thickness']
+            holeDiam = values['holeDiam']
+            profileTolerance = values['profileTolerance']
+            directModel = values['directModel'] == 'True'
+            differentialPinions = values['differentialPinions']
+            batchTable = values['batchTable']
 
             cmd = eventArgs.command
             cmd.isExecutedWhenPreEmpted = False
             inputs = cmd.commandInputs
             
             #global _standard, _pressureAngle, _pressureAngleCustom, _diaPitch, _pitch, _module, _numTeeth, _rootFilletRad, _thickness, _holeDiam, _pitchDiam, _backlash, _imgInputEnglish, _imgInputMetric, _errMessage
-            global _pressureAngle, _pressureAngleCustom, _pitch, _module, _numTeeth, _numTeeth1, _thickness, _holeDiam, _pitchDiam, _backlash, _errMessage
+            global _pressureAngle, _pressureAngleCustom, _pitch, _module, _numTeeth, _numTeeth1, _rootFilletRad, _thickness, _holeDiam, _profileTolerance, _directModel, _differentialPinions, _batchTable, _preview, _pitchDiam, _backlash, _errMessage
                        
             _pressureAngle = inputs.addDropDownCommandInput('pressureAngle', 'Pressure Angle', adsk.core.DropDownStyles.TextListDropDownStyle)
             if pressureAngle == '14.5 deg':
@@ -208,12 +410,29 @@ class GearCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
 
             _backlash = inputs.addValueInput('backlash', 'Backlash', _units, adsk.core.ValueInput.createByReal(float(backlash)))
 
-            #_rootFilletRad = inputs.addValueInput('rootFilletRad', 'Root Fillet Radius', _units, adsk.core.ValueInput.createByReal(float(rootFilletRad)))
+            # The tip radius of the rack that cuts the teeth, which gives them
+            # a trochoidal root fillet (see gearlib.fillet). 0 for none.
+            _rootFilletRad = inputs.addValueInput('rootFilletRad', 'Root Fillet Radius', _units, adsk.core.ValueInput.createByReal(float(rootFilletRad)))
 
             _thickness = inputs.addValueInput('thickness', 'Gear Thickness', _units, adsk.core.ValueInput.createByReal(float(thickness)))
 
             _holeDiam = inputs.addValueInput('holeDiam', 'Hole Diameter', _units, adsk.core.ValueInput.createByReal(float(holeDiam)))
 
+            _profileTolerance = inputs.addValueInput('profileTolerance', 'Profile Tolerance', _units, adsk.core.ValueInput.createByReal(float(profileTolerance)))
+
+            # Direct models keep the bodies only, with no modeling history.
+            _directModel = inputs.addBoolValueInput('directModel', 'Direct Model', True, '', directModel)
+
+            # With 2 or more pinions the gear set is built as a differential,
+            # see drawDifferential.
+            _differentialPinions = inputs.addStringValueInput('differentialPinions', 'Differential Pinions', differentialPinions)
+
+            # A CSV or JSONL table of gear sets (see gearlib.batch). When one
+            # is given, OK builds every set in it instead of the one above.
+            _batchTable = inputs.addStringValueInput('batchTable', 'Batch Table', batchTable)
+
+            _preview = inputs.addBoolValueInput('preview', 'Preview', True, '', True)
+
             _pitchDiam = inputs.addTextBoxCommandInput('pitchDiam', 'Pitch Diameter', '', 1, True)
             
             _errMessage = inputs.addTextBoxCommandInput('errMessage', '', '', 2, True)
@@ -222,19 +441,37 @@ class GearCommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             # Connect to the command related events.
             onExecute = GearCommandExecuteHandler()
             cmd.execute.add(onExecute)
-            _handlers.append(onExecute)        
+            _commandHandlers.append(onExecute)        
             
             onInputChanged = GearCommandInputChangedHandler()
             cmd.inputChanged.add(onInputChanged)
-            _handlers.append(onInputChanged)     
+            _commandHandlers.append(onInputChanged)     
             
             onValidateInputs = GearCommandValidateInputsHandler()
             cmd.validateInputs.add(onValidateInputs)
-            _handlers.append(onValidateInputs)
+            _commandHandlers.append(onValidateInputs)
+
+            onExecutePreview = GearCommandExecutePreviewHandler()
+            cmd.executePreview.add(onExecutePreview)
+            _commandHandlers.append(onExecutePreview)
 
             onDestroy = GearCommandDestroyHandler()
             cmd.destroy.add(onDestroy)
-            _handlers.append(onDestroy)
+            _commandHandlers.append(onDestroy)
+
+            # Rerun the preview once input changes settle down.
+            global _command, _previewDebounce
+            _command = cmd
+            previewEvent = _app.registerCustomEvent(PREVIEW_EVENT_ID)
+            onPreviewEvent = GearPreviewEventHandler()
+            previewEvent.add(onPreviewEvent)
+            _commandHandlers.append(onPreviewEvent)
+            _previewDebounce = Debouncer(PREVIEW_DELAY, lambda: _app.fireCustomEvent(PREVIEW_EVENT_ID))
+
+            # Work on each valid gear set in the background, ahead of OK.
+            global _speculator
+            _speculator = Speculator(precomputeGearSet)
+            finishStartup(time.perf_counter() - start)
         except:
             if _ui:
                 _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
@@ -267,38 +504,41 @@ class GearCommandExecuteHandler(adsk.core.CommandEventHandler):
             attribs.add('SpurGear', 'module', str(module))
             attribs.add('SpurGear', 'numTeeth', str(_numTeeth.value))
             attribs.add('SpurGear', 'numTeeth1', str(_numTeeth1.value))
-            #attribs.add('SpurGear', 'rootFilletRad', str(_rootFilletRad.value))
+            attribs.add('SpurGear', 'rootFilletRad', str(_rootFilletRad.value))
             attribs.add('SpurGear', 'thickness', str(_thickness.value))
             attribs.add('SpurGear', 'holeDiam', str(_holeDiam.value))
             attribs.add('SpurGear', 'backlash', str(_backlash.value))
+            attribs.add('SpurGear', 'profileTolerance', str(_profileTolerance.value))
+            attribs.add('SpurGear', 'directModel', str(_directModel.value))
+            attribs.add('SpurGear', 'differentialPinions', _differentialPinions.value)
+            attribs.add('SpurGear', 'batchTable', _batchTable.value)
 
             # Get the current values.
-            if _pressureAngle.selectedItem.name == 'Custom':
-                pressureAngle = _pressureAngleCustom.value
-            else:
-                if _pressureAngle.selectedItem.name == '14.5 deg':
-                    pressureAngle = 14.5 * (math.pi/180)
-                elif _pressureAngle.selectedItem.name == '20 deg':
-                    pressureAngle = 20.0 * (math.pi/180)
-                elif _pressureAngle.selectedItem.name == '25 deg':
-                    pressureAngle = 25.0 * (math.pi/180)
-
-            numTeeth = int(_numTeeth.value)
-            numTeeth1 = int(_numTeeth1.value)
-            #rootFilletRad = _rootFilletRad.value
-            thickness = _thickness.value
-            holeDiam = _holeDiam.value
-            backlash = _backlash.value
-
-            # Create the gears.
-            gearComp = drawGearSet(des, module, numTeeth, numTeeth1, thickness, pressureAngle, backlash, holeDiam)
+            spec, errMessage = currentGearSpec()
+            if not spec:
+                return
+
+            if _batchTable.value.strip():
+                drawGearSetBatch(des, _batchTable.value.strip(), spec.profileTolerance, _directModel.value)
+                return
+
+            # Let the background work on this gear set finish rather than
+            # repeat it, then create the gears. If it isn't done in time, stop
+            # it and do the work here.
+            speculation = None
+            if _speculator:
+                speculation = {'precomputed': _speculator.wait(spec, SPECULATION_WAIT)}
+                if not speculation['precomputed']:
+                    _speculator.stop()
+                speculation.update(_speculator.report())
+            gearComp = drawGearSet(des, spec, _directModel.value, int(_differentialPinions.value), speculation)
             
             if gearComp:
-                desc = 'Gear; Module: ' +  str(module) + '; '
-                desc += 'Num Teeth: ' + str(numTeeth) + '; '
-                desc += 'Num Teeth1: ' + str(numTeeth1) + '; '
-                desc += 'Pressure Angle: ' + str(pressureAngle * (180/math.pi)) + '; '
-                desc += 'Backlash: ' + des.unitsManager.formatInternalValue(backlash, _units, True)
+                desc = 'Gear; Module: ' +  str(spec.module) + '; '
+                desc += 'Num Teeth: ' + str(spec.numTeeth) + '; '
+                desc += 'Num Teeth1: ' + str(spec.numTeeth1) + '; '
+                desc += 'Pressure Angle: ' + str(spec.pressureAngle * (180/math.pi)) + '; '
+                desc += 'Backlash: ' + des.unitsManager.formatInternalValue(spec.backlash, _units, True)
                 gearComp.description = desc
 
         except:
@@ -306,6 +546,47 @@ class GearCommandExecuteHandler(adsk.core.CommandEventHandler):
                 _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
         
         
+# Event handler for the executePreview event. Builds a quick stand-in for the
+# gear set: the cross section and one coarsely sampled tooth loft per gear.
+# Previews are skipped while inputs are still changing.
+class GearCommandExecutePreviewHandler(adsk.core.CommandEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        try:
+            eventArgs = adsk.core.CommandEventArgs.cast(args)
+
+            if not _preview.value or not _previewDebounce.isSettled():
+                return
+
+            spec, errMessage = currentGearSpec()
+            if not spec or _validation.validate(spec, formatLength):
+                return
+
+            des = adsk.fusion.Design.cast(_app.activeProduct)
+            drawGearSetPreview(des, spec)
+
+            # The preview is never kept as the result, execute always builds
+            # the full model.
+            eventArgs.isValidResult = False
+        except:
+            if _ui:
+                _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
+# Event handler for the debounced preview custom event.
+class GearPreviewEventHandler(adsk.core.CustomEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        try:
+            if _command and _command.isValid:
+                _command.doExecutePreview()
+        except:
+            if _ui:
+                _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+
+
 # Event handler for the inputChanged event.
 class GearCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
     def __init__(self):
@@ -314,29 +595,17 @@ class GearCommandInputChangedHandler(adsk.core.InputChangedEventHandler):
         try:
             eventArgs = adsk.core.InputChangedEventArgs.cast(args)
             changedInput = eventArgs.input
-            
-            global _units
-
-            module = None
-            result = getCommandInputValue(_module, '')
-            if result[0]:
-                module = result[1]
-
-            if not module == None:
-                if _numTeeth.value.isdigit(): 
-                    numTeeth = int(_numTeeth.value)
-                    pitchDia = numTeeth * module
-
-                    # The pitch dia has been calculated in mm, but this expects cm as the input units.
-                    des = adsk.fusion.Design.cast(_app.activeProduct)
-                    pitchDiaText = des.unitsManager.formatInternalValue(pitchDia / 10, _units, True)
-                    _pitchDiam.text = pitchDiaText
-                else:
-                    _pitchDiam.text = ''                    
 
-                # TODO:  _pitchDiam.text should show both values
-                if _numTeeth1.value.isdigit(): 
-                    numTeeth1 = int(_numTeeth1.value)
+            # Hold off the preview until the inputs stop changing.
+            if _previewDebounce:
+                _previewDebounce.trigger()
+            
+            # Show the pitch diameters of both gears.
+            spec, errMessage = currentGearSpec()
+            if spec:
+                des = adsk.fusion.Design.cast(_app.activeProduct)
+                unitsMgr = des.unitsManager
+                _pitchDiam.text = unitsMgr.formatInternalValue(spec.pitchDia, _units, True) + ' / ' + unitsMgr.formatInternalValue(spec.pitchDia1, _units, True)
             else:
                 _pitchDiam.text = ''
 
@@ -360,237 +629,126 @@ class GearCommandValidateInputsHandler(adsk.core.ValidateInputsEventHandler):
             
             _errMessage.text = ''
 
-            # Verify that at least 4 teath are specified.
-            if not _numTeeth.value.isdigit():
-                _errMessage.text = 'The number of teeth must be a whole number.'
-                eventArgs.areInputsValid = False
-                return
-            else:    
-                numTeeth = int(_numTeeth.value)
-            
-            if numTeeth < 4:
-                _errMessage.text = 'The number of teeth must be 4 or more.'
+            spec, errMessage = currentGearSpec()
+            if not spec:
+                _errMessage.text = errMessage
                 eventArgs.areInputsValid = False
                 return
 
-            # Do the same for the pinion.
-            if not _numTeeth1.value.isdigit():
-                _errMessage.text = 'The number of teeth must be a whole number.'
-                eventArgs.areInputsValid = False
-                return
-            else:    
-                numTeeth1 = int(_numTeeth1.value)
-            
-            if numTeeth1 < 4:
-                _errMessage.text = 'The number of teeth must be 4 or more.'
+            des = adsk.fusion.Design.cast(_app.activeProduct)
+            errMessage = _validation.validate(spec, formatLength)
+            if errMessage:
+                _errMessage.text = errMessage
                 eventArgs.areInputsValid = False
                 return
 
-            # With only metric standard, this confusing block of code
-            # can be replaced with 
-            #   pitchDia = numTeeth * module 
-            result = getCommandInputValue(_module, '')
-            if result[0] == False:
+            pinions = _differentialPinions.value.strip()
+            errMessage = 'The number of differential pinions must be a whole number.'
+            if pinions.isdigit():
+                errMessage = gearTrain.differentialError(spec, int(pinions))
+            if errMessage:
+                _errMessage.text = errMessage
                 eventArgs.areInputsValid = False
                 return
-            else:
-                diaPitch = 25.4 / result[1]
 
-            diametralPitch = diaPitch / 2.54
-            pitchDia = numTeeth / diametralPitch
-            # pitchDia is the key thing we need from number of teeth
-            # and tooth size either by means of pitchDiameter or with
-            # metric, the module
-            
-            # Handles situation where dedendum is outside the root circle
-            # TODO: replace calulation with equivilant Z*module. 
-            if (diametralPitch < (20 *(math.pi/180))-0.000001):
-                dedendum = 1.157 / diametralPitch
-            else:
-                circularPitch = math.pi / diametralPitch
-                if circularPitch >= 20:
-                    dedendum = 1.25 / diametralPitch
-                else:
-                    dedendum = (1.2 / diametralPitch) + (.002 * 2.54)                
-
-            rootDia = pitchDia - (2 * dedendum)        
-                    
-            if _pressureAngle.selectedItem.name == 'Custom':
-                pressureAngle = _pressureAngleCustom.value
-            else:
-                if _pressureAngle.selectedItem.name == '14.5 deg':
-                    pressureAngle = 14.5 * (math.pi/180)
-                elif _pressureAngle.selectedItem.name == '20 deg':
-                    pressureAngle = 20.0 * (math.pi/180)
-                elif _pressureAngle.selectedItem.name == '25 deg':
-                    pressureAngle = 25.0 * (math.pi/180)
-            baseCircleDia = pitchDia * math.cos(pressureAngle)
-            baseCircleCircumference = 2 * math.pi * (baseCircleDia / 2) 
-
-            des = adsk.fusion.Design.cast(_app.activeProduct)
-
-            result = getCommandInputValue(_holeDiam, _units)
-            if result[0] == False:
-                eventArgs.areInputsValid = False
-                return
-            else:
-                holeDiam = result[1]
-                           
-            if holeDiam >= (rootDia - 0.01):
-                _errMessage.text = 'The center hole diameter is too large.  It must be less than ' + des.unitsManager.formatInternalValue(rootDia - 0.01, _units, True)
+            batchTable = _batchTable.value.strip()
+            if batchTable and not os.path.isfile(batchTable):
+                _errMessage.text = 'The batch table file was not found.'
                 eventArgs.areInputsValid = False
                 return
 
             #TODO: Add check for backlash here
 
-            #toothThickness = baseCircleCircumference / (numTeeth * 2)
-            #if _rootFilletRad.value > toothThickness * .4:
-            #    _errMessage.text = 'The root fillet radius is too large.  It must be less than ' + des.unitsManager.formatInternalValue(toothThickness * .4, _units, True)
-            #    eventArgs.areInputsValid = False
-            #    return
+            # The inputs are valid, so start on the gear set's math.
+            if _speculator and not batchTable:
+                _speculator.submit(spec)
         except:
             if _ui:
                 _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
-# Calculate points along an involute curve.
-def involutePoint(baseCircleRadius, distFromCenterToInvolutePoint):
-    try:
-        # Calculate the other side of the right-angle triangle defined by the base circle and the current distance radius.
-        # This is also the length of the involute chord as it comes off of the base circle.
-        triangleSide = math.sqrt(math.pow(distFromCenterToInvolutePoint,2) - math.pow(baseCircleRadius,2)) 
-        
-        # Calculate the angle of the involute.
-        alpha = triangleSide / baseCircleRadius
-
-        # Calculate the angle where the current involute point is.
-        theta = alpha - math.acos(baseCircleRadius / distFromCenterToInvolutePoint)
+# Creates a sketch point from an (x, y) tuple.
+def point3D(point):
+    return adsk.core.Point3D.create(point[0], point[1], 0)
 
-        # Calculate the coordinates of the involute point.    
-        x = distFromCenterToInvolutePoint * math.cos(theta)
-        y = distFromCenterToInvolutePoint * math.sin(theta)
-
-        # Create a point to return.        
-        return adsk.core.Point3D.create(x, y, 0)
-    except:
-        if _ui:
-            _ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
-
-
-# Draws a tooth profile on the given plane
-def drawToothProfile(toothSketch, module, numTeeth, pressureAngle, backlash, ratio):
-    '''
-    For proper tooth shape in a bevel gear, R0 should be larger than value given by 
-    spur gear calculation (m*z/2). Using Tredgold's approximation, reference pitch
-    radius is the slant height of the back cone: 
-        https://en.wikipedia.org/wiki/List_of_gear_nomenclature#Back_cone
-    r0 = m*z/2;          // Reference pitch radius by tooth and module
-    R0 = r0/sin(atan(ratio));   // Tredgold's approximation
-    Zi = 2*R0/m;                // tooth count of the imaginary spur gear
-    Rb = R0*cos(alpha); // Base pitch radius
-    Ra = R0+m;          // Addendum circle radius
-    Rd = R0-(m+c*m);    // Dedendum circle radius
-    '''
-
-    # Compute the various values for a gear.
-    pitchDia = numTeeth * module
-    r0 = numTeeth * module
-    bca = module * numTeeth * ratio     
-    R0 = math.sqrt(bca*bca + pitchDia*pitchDia) / 2
-    Zi = 2*R0/module
-
-    pitchDia = R0 * 2
-    #if (1/module < (20 *(math.pi/180))-0.000001):
-    #    dedendum = 1.157 * module
-    #else:
-    #    circularPitch = math.pi * module
-    #    if circularPitch >= 20:
-    #        dedendum = 1.25 * module
-    #    else:
-    #        dedendum = (1.2 * module) + (.002 * 2.54)
-    dedendum = module * 1.157   #TODO: Add clearance to user inputs
-
-    rootDia = pitchDia - (2 * dedendum)
-    baseCircleDia = pitchDia * math.cos(pressureAngle)
-    outsideDia = pitchDia + 2 * module
-    # Compute the various values for a gear.
-
-    # Calculate points along the involute curve.
-    involutePointCount = 15 
-    involutePoints = []
-    involuteSize = (outsideDia - rootDia) / 2.0
-    for i in range(0, involutePointCount):
-        #involuteIntersectionRadius = (baseCircleDia / 2.0) + ((involuteSize / (involutePointCount - 1)) * i)
-        involuteIntersectionRadius = (rootDia / 2.0) + ((involuteSize / (involutePointCount - 1)) * i)
-        if involuteIntersectionRadius >= baseCircleDia / 2.0:
-            newPoint = involutePoint(baseCircleDia / 2.0, involuteIntersectionRadius)
-            involutePoints.append(newPoint)
-        
-    # Get the point along the tooth that's at the pitch diameter and then
-    # calculate the angle to that point.
-    pitchInvolutePoint = involutePoint(baseCircleDia / 2.0, pitchDia / 2.0)
-    pitchPointAngle = math.atan(pitchInvolutePoint.y / pitchInvolutePoint.x)
-
-    # Determine the angle defined by the tooth thickness as measured at
-    # the pitch diameter circle.
-    toothThicknessAngle = (2 * math.pi) / (2 * Zi)
-    
-    # Determine the angle needed for the specified backlash.
-    backlashAngle = (backlash / (pitchDia / 2.0)) * .25
-    
-    # Determine the angle to rotate the curve.
-    rotateAngle = -((toothThicknessAngle/2) + pitchPointAngle - backlashAngle)
-    
-    # Rotate the involute so the middle of the tooth lies on the x axis.
-    cosAngle = math.cos(rotateAngle)
-    sinAngle = math.sin(rotateAngle)
-    for i, iPoint in enumerate(involutePoints):
-        newX = iPoint.x * cosAngle - iPoint.y * sinAngle
-        newY = iPoint.x * sinAngle + iPoint.y * cosAngle
-        involutePoints[i] = adsk.core.Point3D.create(newX, newY, 0)
-
-    # Create a new set of points with a negated y.  This effectively mirrors the original
-    # points about the X axis.
-    involute2Points = []
-    for iPoint in involutePoints:
-        involute2Points.append(adsk.core.Point3D.create(iPoint.x, -iPoint.y, 0))
-
-    #
-    curve1Angle0 = math.atan(involutePoints[0].y / involutePoints[0].x)
-    curve2Angle0 = math.atan(involute2Points[0].y / involute2Points[0].x)
 
+# Converts an (N,2) array of sketch coordinates into an ObjectCollection of
+# points. This is the only place the involute math meets the Fusion API.
+def pointCollection(points):
+    pointSet = adsk.core.ObjectCollection.create()
+    for x, y in points.tolist():
+        pointSet.add(adsk.core.Point3D.create(x, y, 0))
+    return pointSet
+
+
+# NurbsCurve3D for a gearlib.nurbs.FlankCurve.
+def nurbsCurve3D(curve):
+    controlPoints = [adsk.core.Point3D.create(x, y, 0) for x, y in curve.controlPoints.tolist()]
+    return adsk.core.NurbsCurve3D.createNonRational(controlPoints, curve.degree, curve.knots.tolist(), False)
+
+
+# Draws the root fillets of a tooth profile up to the flank splines, returning
+# the two fillet curves. Fitted fillets are constrained tangent to the flanks
+# unless the fillet undercuts the involute; the NURBS ones are fitted tangent.
+def drawRootFillets(toothSketch, profile, tolerance, spline1, spline2):
+    if PROFILE_CURVES == 'nurbs':
+        curve1, curve2 = gearNurbs.profileFilletCurves(profile, tolerance)
+        splines = toothSketch.sketchCurves.sketchFixedSplines
+        return splines.addByNurbsCurve(nurbsCurve3D(curve1)), splines.addByNurbsCurve(nurbsCurve3D(curve2))
+
+    fillets = []
+    for points, spline in ((profile.fillet.points, spline1), (profile.fillet.points * (1.0, -1.0), spline2)):
+        fitPoints = pointCollection(points[:-1])
+        fitPoints.add(spline.startSketchPoint)
+        fillet = toothSketch.sketchCurves.sketchFittedSplines.add(fitPoints)
+        if not profile.fillet.undercut:
+            toothSketch.geometricConstraints.addTangent(fillet, spline)
+        fillets.append(fillet)
+    return fillets
+
+
+# Draws a ToothProfile on the given sketch. The profile geometry is computed
+# (and cached) headless, so only the sketch entities are created here. The
+# flanks are drawn as PROFILE_CURVES says, 'nurbs' curves within tolerance
+# (cm) of the involute. Returns the flank curve mode, the number of points
+# (fitted) or control points (nurbs) per flank, the flank's fit error and
+# the seconds the sketch took to solve, as a dict.
+def drawToothProfile(toothSketch, profile, tolerance):
     toothSketch.isComputeDeferred = True
     
-    # Create and load an object collection with the points.
-    pointSet = adsk.core.ObjectCollection.create()
-    for iPoint in involutePoints:
-        pointSet.add(iPoint)
-
-    # Create the first spline.
-    spline1 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet)
-
-    # Add the involute points for the second spline to an ObjectCollection.
-    pointSet = adsk.core.ObjectCollection.create()
-    for iPoint in involute2Points:
-        pointSet.add(iPoint)
-
-    # Create the second spline.
-    spline2 = toothSketch.sketchCurves.sketchFittedSplines.add(pointSet)
+    if PROFILE_CURVES == 'nurbs':
+        # Fixed splines from the headless fit, which already meet the root
+        # lines at a tangent.
+        curve1, curve2 = gearNurbs.profileFlankCurves(profile, tolerance)
+        splines = toothSketch.sketchCurves.sketchFixedSplines
+        spline1 = splines.addByNurbsCurve(nurbsCurve3D(curve1))
+        spline2 = splines.addByNurbsCurve(nurbsCurve3D(curve2))
+        stats = {'curves': 'nurbs', 'points': len(curve1.controlPoints), 'fitError': curve1.maxError}
+    else:
+        # Create the splines through both sets of involute points.
+        spline1 = toothSketch.sketchCurves.sketchFittedSplines.add(pointCollection(profile.flank1))
+        spline2 = toothSketch.sketchCurves.sketchFittedSplines.add(pointCollection(profile.flank2))
+        stats = {'curves': 'fitted', 'points': len(profile.flank1), 'fitError': profile.sampling.maxDeviation}
 
     # Draw the arc for the top of the tooth.
-    midPoint = adsk.core.Point3D.create((outsideDia / 2), 0, 0)
+    midPoint = point3D(profile.tipMidPoint)
     toothSketch.sketchCurves.sketchArcs.addByThreePoints(spline1.endSketchPoint, midPoint, spline2.endSketchPoint)     
 
+    # With a root fillet, draw it on each side from the root circle up to the
+    # start of the involute, and close the profile between the fillets.
+    if profile.fillet is not None:
+        fillet1, fillet2 = drawRootFillets(toothSketch, profile, tolerance, spline1, spline2)
+        toothSketch.sketchCurves.sketchLines.addByTwoPoints(fillet2.startSketchPoint, fillet1.startSketchPoint)
+
     # Check to see if involute goes down to the root or not.  If not, then
     # create lines to connect the involute to the root.
-    if( baseCircleDia < rootDia ):
+    elif profile.rootPoints is None:
         toothSketch.sketchCurves.sketchLines.addByTwoPoints(spline2.startSketchPoint, spline1.startSketchPoint)
-        profilePoint = involutePoints[0]
     else:
-        rootPoint1 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve1Angle0 ), (rootDia / 2) * math.sin(curve1Angle0), 0)
+        rootPoint1 = point3D(profile.rootPoints[0])
         line1 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint1, spline1.startSketchPoint)
 
-        rootPoint2 = adsk.core.Point3D.create((rootDia / 2 - 0.001) * math.cos(curve2Angle0), (rootDia / 2) * math.sin(curve2Angle0), 0)
+        rootPoint2 = point3D(profile.rootPoints[1])
         line2 = toothSketch.sketchCurves.sketchLines.addByTwoPoints(rootPoint2, spline2.startSketchPoint)
 
         baseLine = toothSketch.sketchCurves.sketchLines.addByTwoPoints(line1.startSketchPoint, line2.startSketchPoint)
@@ -598,306 +756,231 @@ def drawToothProfile(toothSketch, module, numTeeth, pressureAngle, backlash, rat
         # Make the lines tangent to the spline so the root fillet will behave correctly.            
         line1.isFixed = True
         line2.isFixed = True
-        toothSketch.geometricConstraints.addTangent(spline1, line1)
-        toothSketch.geometricConstraints.addTangent(spline2, line2)
+        if stats['curves'] == 'fitted':
+            toothSketch.geometricConstraints.addTangent(spline1, line1)
+            toothSketch.geometricConstraints.addTangent(spline2, line2)
 
-        profilePoint = rootPoint1
-    
+    start = time.perf_counter()
     toothSketch.isComputeDeferred = False
-
-    return profilePoint
-
-
-# Builds a metric gear tooth.
-def drawGearSet(design, module, numTeeth, numTeeth1, thickness, pressureAngle, backlash, holeDiam):
-    try:
-        # The module is specified in mm but everthing
-        # here expects all distances to be in centimeters, so convert
-        # for the gear creation.
-        module = module / 10
-
-        ###### Compute the various values for a gear.
-        pitchDia = numTeeth * module
-        pitchDia1 = numTeeth1 * module
-
-        #addendum = module
-        if (1/module < (20 *(math.pi/180))-0.000001):
-            dedendum = 1.157 * module
+    stats['solveSeconds'] = time.perf_counter() - start
+    return stats
+
+
+# Draws the tooth profile of one gear of the set on its back cone plane and
+# lofts it to the cone center. side is cs.wheel or cs.pinion and tolerance the
+# profile tolerance. The profile's drawToothProfile stats are added to the
+# timer's 'profiles' info, if given. Returns the loft feature.
+def drawToothLoft(comp, crossSectionSketch, cs, side, operation, tolerance, timer=None):
+    # Make a plane at an angle for the tooth profile using the gear's back cone
+    lines = crossSectionSketch.sketchCurves.sketchLines
+    backCone = lines.addByTwoPoints(point3D(side.backApex), point3D(cs.pitchTangent))
+    backCone.isConstruction = True
+    backCone.isFixed = True
+    planes = comp.constructionPlanes
+    planeInput = planes.createInput()
+    planeInput.setByAngle(backCone, adsk.core.ValueInput.createByReal(0.0), None)
+    toothPlane = planes.add(planeInput)
+
+    # Add a sketch for the tooth profile
+    toothSketch = comp.sketches.add(toothPlane)
+    stats = drawToothProfile(toothSketch, side.profile, tolerance)
+    if timer:
+        timer.info.setdefault('profiles', []).append(stats)
+
+    # Loft the tooth profile to the cone center
+    loftFeats = comp.features.loftFeatures
+    loftInput = loftFeats.createInput(operation)
+    loftSectionsObj = loftInput.loftSections
+    loftSectionsObj.add(toothSketch.profiles.item(0))
+    coneCenterSP = crossSectionSketch.sketchPoints.add(point3D(cs.coneCenter))
+    loftSectionsObj.add(coneCenterSP)
+    return loftFeats.add(loftInput)
+
+
+# Indexes the faces of a body by type and, for planar faces, normal and
+# position, reading each face's geometry once. See gearlib.topology.
+def faceIndex(body):
+    index = gearTopology.FaceIndex()
+    for face in body.faces:
+        geometry = face.geometry
+        surfaceType = geometry.surfaceType
+        if surfaceType == gearTopology.PLANE:
+            normal = geometry.normal
+            origin = geometry.origin
+            index.add(face, surfaceType, (normal.x, normal.y, normal.z), (origin.x, origin.y, origin.z))
         else:
-            circularPitch = math.pi * module
-            if circularPitch >= 20:
-                dedendum = 1.25 * module
-            else:
-                dedendum = (1.2 * module) + (.002 * 2.54)
-
-        rootDia = pitchDia - (2 * dedendum)
-        baseCircleDia = pitchDia * math.cos(pressureAngle)
-        outsideDia = (numTeeth + 2) * module
-
-        ###### Create a new component by creating an occurrence.
-        occs = design.rootComponent.occurrences
-        mat = adsk.core.Matrix3D.create()
-        newOcc = occs.addNewComponent(mat)        
-        newComp = adsk.fusion.Component.cast(newOcc.component)
-
-        ###### Create a new sketch for the cross section of the gears
-        sketches = newComp.sketches
-        xzPlane = newComp.xZConstructionPlane
-        crossSectionSketch = sketches.add(xzPlane)
-
-        # A rectangle defining the gears geometry based on their ratio
-        coneCenter = adsk.core.Point3D.create(0, -pitchDia1/2, 0)
-        pitchTangent = adsk.core.Point3D.create(pitchDia/2, 0, 0)
-        pinionCenter = adsk.core.Point3D.create(pitchDia/2, -pitchDia1/2, 0)
-        wheelCenter = adsk.core.Point3D.create(0,0,0)
-
-        coneCenterSP = crossSectionSketch.sketchPoints.add(coneCenter)
-
-        lines = crossSectionSketch.sketchCurves.sketchLines
-        coneTangentLine = lines.addByTwoPoints(pitchTangent, coneCenter)
-        wheelAxis = lines.addByTwoPoints(wheelCenter, coneCenter)       # for creating rotations later
-        wheelBase = lines.addByTwoPoints(wheelCenter, pitchTangent)     # not sure this is needed
-        pinionAxis = lines.addByTwoPoints(pinionCenter, coneCenter)     # for creating rotations later
-        pinionBase = lines.addByTwoPoints(pinionCenter, pitchTangent)   # not sure this is needed
-
-        coneTangentLine.isConstruction = True
-        coneTangentLine.isFixed = True
-        wheelBase.isConstruction = True
-        wheelBase.isFixed = True
-        pinionBase.isConstruction = True
-        pinionBase.isFixed = True
-
-        # Make a plane at an angle for the tooth profile using the gear's back cone
-        ratio = numTeeth/numTeeth1
-        backConeHeight = module * numTeeth * ratio /2
-
-        # actually extended by 2x so plane's origin on z-axis
-        backApex = adsk.core.Point3D.create(-pitchDia/2,backConeHeight*2,0)
-        backAngle = math.atan(pitchDia / (backConeHeight*2))
-        wheelBackCone = lines.addByTwoPoints(backApex, pitchTangent)
-        wheelBackCone.isConstruction = True
-        wheelBackCone.isFixed = True
-        planes = newComp.constructionPlanes
-        planeInput = planes.createInput()
-        planeInput.setByAngle(wheelBackCone, adsk.core.ValueInput.createByReal(0.0), None)
-        toothPlane = planes.add(planeInput)
-
-        # Add a sketch for the tooth points defined above 
-        toothSketch = sketches.add(toothPlane)
-
-        # Sketch to tooth profile, returns a point at the tooth's root
-        rootPoint = drawToothProfile(toothSketch, module, numTeeth, pressureAngle, backlash, ratio)
-
-        # Add some projected points from the tooth profile for the root cone
-        a = backConeHeight-rootPoint.x*math.cos(backAngle)
-        wheelConeA = adsk.core.Point3D.create(0,a,0)
-        b = pitchDia/2 - a*math.tan(backAngle)
-        b = math.sqrt(b*b+rootPoint.y*rootPoint.y)
-        wheelConeB = adsk.core.Point3D.create(b,a,0)
-        wheelAxisExt = lines.addByTwoPoints(wheelCenter, wheelConeA)
-        wheelConeBase = lines.addByTwoPoints(wheelConeA, wheelConeB)
-        wheelConeSlant = lines.addByTwoPoints(wheelConeB, coneCenter)
-
-        ##### Loft the tooth profile to the cone center and make a new component
-        wheelToothProfile = toothSketch.profiles.item(0)
-        loftFeats = newComp.features.loftFeatures
-        loftInput = loftFeats.createInput(adsk.fusion.FeatureOperations.NewComponentFeatureOperation)
-        loftSectionsObj = loftInput.loftSections
-        loftSectionsObj.add(wheelToothProfile)
-        coneCenterSP = crossSectionSketch.sketchPoints.add(coneCenter)
-        loftSectionsObj.add(coneCenterSP)
-        wheelLoft = loftFeats.add(loftInput)
-
-        wheelOcc = newComp.occurrences.item(0)
-        wheelComp = adsk.fusion.Component.cast(wheelOcc.component)
-        wheelComp.name = f'{numTeeth} Tooth'
-
-        ##### Add construction plane for the pinion teeth at an angle based on gear ratio
-        ratio = numTeeth1/numTeeth
-        backConeHeight = module * numTeeth1 * ratio /2
-        
-        # Make a plane at an angle for the tooth profile using the gear's back cone
-        # actually extended by 2x so plane origin's on z-axis
-        backApex = adsk.core.Point3D.create(pitchDia/2+backConeHeight*2,-pitchDia1,0)
-        backAngle = math.atan(pitchDia1 / (backConeHeight*2))
-        pinionBackCone = lines.addByTwoPoints(backApex, pitchTangent)
-        pinionBackCone.isConstruction = True
-        pinionBackCone.isFixed = True
-        planes = newComp.constructionPlanes
-        planeInput = planes.createInput()
-        planeInput.setByAngle(pinionBackCone, adsk.core.ValueInput.createByReal(0.0), None)
-        toothPlane = planes.add(planeInput)
-
-        # Add a sketch for the tooth points defined above 
-        toothSketch = sketches.add(toothPlane)
-
-        # Sketch to tooth profile, returns a point at the tooth's root
-        rootPoint = drawToothProfile(toothSketch, module, numTeeth1, pressureAngle, backlash, ratio)
-
-        # Add some projected points from the tooth profile for the root cone
-        a = backConeHeight-rootPoint.x*math.cos(backAngle)
-        pinionConeA = adsk.core.Point3D.create(pitchDia/2+a,-pitchDia1/2,0)
-        b = pitchDia1/2 - a*math.tan(backAngle)
-        b = math.sqrt(b*b+rootPoint.y*rootPoint.y)
-        pinionConeB = adsk.core.Point3D.create(pitchDia/2+a,b-pitchDia1/2,0)
-        pinionAxisExt = lines.addByTwoPoints(pinionCenter, pinionConeA)
-        pinionConeBase = lines.addByTwoPoints(pinionConeA, pinionConeB)
-        pinionConeSlant = lines.addByTwoPoints(pinionConeB, coneCenter)
-
-        ##### Loft the tooth profile to the cone center and make a new component
-        pinionToothProfile = toothSketch.profiles.item(0)
-        loftFeats = newComp.features.loftFeatures
-        loftInput = loftFeats.createInput(adsk.fusion.FeatureOperations.NewComponentFeatureOperation)
-        loftSectionsObj = loftInput.loftSections
-        loftSectionsObj.add(pinionToothProfile)
-        coneCenterSP = crossSectionSketch.sketchPoints.add(coneCenter)
-        loftSectionsObj.add(coneCenterSP)
-        pinionLoft = loftFeats.add(loftInput)
-
-        pinionOcc = newComp.occurrences.item(1)
-        pinionComp = adsk.fusion.Component.cast(pinionOcc.component)
-        pinionComp.name = f'{numTeeth1} Tooth'
-
-        # Add some lines to the cross section sketch for trimming the teeth
-        wheelFace = SplitLineAt(wheelConeSlant, thickness)
-        pinionFace = SplitLineAt(pinionConeSlant, thickness)
-        lines.addByTwoPoints(wheelFace, pinionFace)
-
-        newWpt = adsk.core.Point3D.create(0, wheelFace.y, 0)
-        wheelAxis.split(newWpt)
-        lines.addByTwoPoints(wheelFace, newWpt)
-
-        newPpt = adsk.core.Point3D.create(pinionFace.x, pinionCenter.y, 0)
-        pinionAxis.split(newPpt)
-        lines.addByTwoPoints(pinionFace, newPpt)
-
-        ##### Remove the excess material near the apex of each tooth
-        # Can use all the sketch profiles for the cut operation. While iterating
-        # over all the profiles on the criss section sketch can look for the
-        # the profiles to revolve for the root cones for the wheel and pinion 
-        crossSectionProfiles = adsk.core.ObjectCollection.create()
-        centX = []
-        centY = []
-        for p in crossSectionSketch.profiles:
-            crossSectionProfiles.add(p)
-            areaProps = p.areaProperties(adsk.fusion.CalculationAccuracy.MediumCalculationAccuracy)
-            centX.append(areaProps.centroid.x)
-            centY.append(areaProps.centroid.y)
-
-        # Find the profile to rotate using the centroids
-        wIndex = centY.index(max(centY))     # the lowest y-axis (max val since y runs negative)
-        pIndex = centX.index(max(centX))     # the greatest x-value
-        #_ui.messageBox(f'wheel: {w}, pinion {p} ')
-        wheelRootCone = crossSectionSketch.profiles.item(wIndex)
-        pinionRootCode = crossSectionSketch.profiles.item(pIndex)
-
-        revolves0 = wheelComp.features.revolveFeatures
-        extCutInput = revolves0.createInput(crossSectionProfiles, wheelAxis, adsk.fusion.FeatureOperations.CutFeatureOperation)
-        extCutInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
-        extCutInput.participantBodies = [wheelLoft.bodies.item(0)]
-        ext = revolves0.add(extCutInput)
-
-        revolves1 = pinionComp.features.revolveFeatures
-        extCutInput = revolves1.createInput(crossSectionProfiles, pinionAxis, adsk.fusion.FeatureOperations.CutFeatureOperation)
-        extCutInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
-        extCutInput.participantBodies = [pinionLoft.bodies.item(0)]
-        ext = revolves1.add(extCutInput)
-
-        ##### Create Circular patters for the teeth
-        # Create input entities for circular pattern (wheel)
-        inputEntites = adsk.core.ObjectCollection.create()
-        inputEntites.add(wheelComp.bRepBodies.item(0))
-
-        # Create the input for circular pattern
-        circularFeats = wheelComp.features.circularPatternFeatures
-        circularFeatInput = circularFeats.createInput(inputEntites, wheelAxis)
-        circularFeatInput.quantity = adsk.core.ValueInput.createByReal(numTeeth)
-        circularFeatInput.totalAngle = adsk.core.ValueInput.createByString('360 deg')
-        circularFeatInput.isSymmetric = False
-
-        # Create the circular pattern of wheel teeth
-        circularFeat = circularFeats.add(circularFeatInput)
-
-        # Create input entities for circular pattern (pinion)
-        inputEntites = adsk.core.ObjectCollection.create()
-        inputEntites.add(pinionComp.bRepBodies.item(0))
-
-        # Create the input for circular pattern
-        circularFeats = pinionComp.features.circularPatternFeatures
-        circularFeatInput = circularFeats.createInput(inputEntites, pinionAxis)
-        circularFeatInput.quantity = adsk.core.ValueInput.createByReal(numTeeth1)
-        circularFeatInput.totalAngle = adsk.core.ValueInput.createByString('360 deg')
-        circularFeatInput.isSymmetric = False
-
-        # Create the circular pattern of pinion teeth
-        circularFeat = circularFeats.add(circularFeatInput)
-
-        ##### Revolve the root cones
-        extBodyInput = revolves0.createInput(wheelRootCone, wheelAxis, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-        extBodyInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
-        ext = revolves0.add(extBodyInput)
-        extBodyInput = revolves1.createInput(pinionRootCode, pinionAxis, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-        extBodyInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
-        ext = revolves1.add(extBodyInput)
-
-        #### Drill holes for the shafts
-        wheelSketches = wheelComp.sketches
-        rootConeBody = wheelComp.bRepBodies.item(wheelComp.bRepBodies.count-1)
-        planarFaces = []
-        for i,face in enumerate(rootConeBody.faces):
-            #_ui.messageBox(f'face {i} type  {face.geometry.surfaceType}')
-            if 0 == face.geometry.surfaceType:
-                planarFaces.append(rootConeBody.faces.item(i))
-
-        wheelSketch = wheelSketches.add(planarFaces[0])
-        wheelSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0,0,0), holeDiam/2.0)
-        extrudes = wheelComp.features.extrudeFeatures
-        extInput = extrudes.createInput(wheelSketch.profiles.item(1), adsk.fusion.FeatureOperations.CutFeatureOperation)
-        extInput.participantBodies = [rootConeBody]
-        extent_toentity = adsk.fusion.ToEntityExtentDefinition.create(planarFaces[1], True)
-        extInput.setOneSideExtent(extent_toentity, adsk.fusion.ExtentDirections.PositiveExtentDirection)
-        ext = extrudes.add(extInput)
-
-        pinionSketches = pinionComp.sketches
-        rootConeBody = pinionComp.bRepBodies.item(pinionComp.bRepBodies.count-1)
-        planarFaces = []
-        for i,face in enumerate(rootConeBody.faces):
-            #_ui.messageBox(f'face {i} type  {face.geometry.surfaceType}')
-            if 0 == face.geometry.surfaceType:
-                planarFaces.append(rootConeBody.faces.item(i))
-
-        pinionSketch = pinionSketches.add(planarFaces[1])
-        pinionSketch.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(-pitchDia1/2,0,0), holeDiam/2.0)
-        extrudes = pinionComp.features.extrudeFeatures
-        extInput = extrudes.createInput(pinionSketch.profiles.item(1), adsk.fusion.FeatureOperations.CutFeatureOperation)
-        extInput.participantBodies = [rootConeBody]
-        extent_toentity = adsk.fusion.ToEntityExtentDefinition.create(planarFaces[0], True)
-        extInput.setOneSideExtent(extent_toentity, adsk.fusion.ExtentDirections.PositiveExtentDirection)
-        ext = extrudes.add(extInput)
-
-        # TODO: Udpdate this as new features are added so they can be squashed on the timeline
-        lastGearFeature = ext.timelineObject.index
-
-        # Group everything used to create the gear in the timeline.
-        timelineGroups = design.timeline.timelineGroups
-        newOccIndex = newOcc.timelineObject.index
-        timelineGroup = timelineGroups.add(newOccIndex, lastGearFeature)
-        timelineGroup.name = 'BevelGears'
-        
-        # Add an attribute to the component with all of the input values.  This might 
-        # be used in the future to be able to edit the gear. TODO: Add a few bevel gear
-        # specific parameters here
-        gearValues = {}
-        gearValues['module'] = str(module)
-        gearValues['numTeeth'] = str(numTeeth)
-        gearValues['numTeeth1'] = str(numTeeth1)
-        gearValues['thickness'] = str(thickness)
-        gearValues['pressureAngle'] = str(pressureAngle)
-        gearValues['holeDiam'] = str(holeDiam)
-        gearValues['backlash'] = str(backlash)
-        attrib = newComp.attributes.add('BevelGear', 'Values',str(gearValues))
-        
-        newComp.name = f'{numTeeth}/{numTeeth1} Bevel Gears'
+            index.add(face, surfaceType)
+    return index
+
+
+# Cuts the shaft hole through a gear's root cone body, from its end face
+# farthest from the cone apex to the one nearest it. apex and center are
+# model space points on the gear axis, center being farther from the apex.
+# Returns the extrude feature.
+def drawShaftHole(comp, body, apex, center, holeDiam):
+    faces = faceIndex(body)
+    axis = apex.vectorTo(center)
+    planes = faces.planesAlong((apex.x, apex.y, apex.z), (axis.x, axis.y, axis.z))
+    if not planes:
+        raise RuntimeError('The gear body has no planar faces across its axis for the shaft hole.')
+    front, back = planes[0][1], planes[-1][1]
+
+    sketch = comp.sketches.add(back)
+    holeCenter = sketch.modelToSketchSpace(center)
+    holeCenter.z = 0
+    circle = sketch.sketchCurves.sketchCircles.addByCenterRadius(holeCenter, holeDiam/2.0)
+
+    # The hole is the profile bounded by the circle alone.
+    for profile in sketch.profiles:
+        loops = profile.profileLoops
+        if loops.count == 1 and loops.item(0).profileCurves.item(0).sketchEntity == circle:
+            break
+    else:
+        raise RuntimeError('The shaft hole profile was not found in the hole sketch.')
+
+    # Cut from the back face towards the apex, whichever way the sketch faces.
+    normal = sketch.xDirection.crossProduct(sketch.yDirection)
+    direction = adsk.fusion.ExtentDirections.PositiveExtentDirection
+    if normal.dotProduct(axis) > 0:
+        direction = adsk.fusion.ExtentDirections.NegativeExtentDirection
+
+    extrudes = comp.features.extrudeFeatures
+    extInput = extrudes.createInput(profile, adsk.fusion.FeatureOperations.CutFeatureOperation)
+    extInput.participantBodies = [body]
+    extInput.setOneSideExtent(adsk.fusion.ToEntityExtentDefinition.create(front, True), direction)
+    return extrudes.add(extInput)
+
+
+# Draws the cross section rectangle of a gear set: the cone tangent line and
+# the wheel and pinion axes and bases. Returns (wheelAxis, pinionAxis).
+def drawCrossSectionFrame(crossSectionSketch, cs):
+    coneCenter = point3D(cs.coneCenter)
+    pitchTangent = point3D(cs.pitchTangent)
+    pinionCenter = point3D(cs.pinionCenter)
+    wheelCenter = point3D(cs.wheelCenter)
+
+    coneCenterSP = crossSectionSketch.sketchPoints.add(coneCenter)
+
+    lines = crossSectionSketch.sketchCurves.sketchLines
+    coneTangentLine = lines.addByTwoPoints(pitchTangent, coneCenter)
+    wheelAxis = lines.addByTwoPoints(wheelCenter, coneCenter)       # for creating rotations later
+    wheelBase = lines.addByTwoPoints(wheelCenter, pitchTangent)     # not sure this is needed
+    pinionAxis = lines.addByTwoPoints(pinionCenter, coneCenter)     # for creating rotations later
+    pinionBase = lines.addByTwoPoints(pinionCenter, pitchTangent)   # not sure this is needed
+
+    coneTangentLine.isConstruction = True
+    coneTangentLine.isFixed = True
+    wheelBase.isConstruction = True
+    wheelBase.isFixed = True
+    pinionBase.isConstruction = True
+    pinionBase.isFixed = True
+
+    return wheelAxis, pinionAxis
+
+
+# Fraction of the module used as the involute tolerance for previews.
+PREVIEW_TOLERANCE = 0.05
+
+
+# Builds the quick preview of a gear set: the cross section sketch and a
+# single tooth loft for each gear, with the involute sampled coarsely. Used
+# by executePreview, the full model is only built on execute.
+def drawGearSetPreview(design, spec):
+    spec = spec.replace(profileTolerance=max(spec.profileTolerance, spec.moduleCm * PREVIEW_TOLERANCE))
+    cs = spec.crossSection
+
+    occs = design.rootComponent.occurrences
+    newOcc = occs.addNewComponent(adsk.core.Matrix3D.create())
+    newComp = adsk.fusion.Component.cast(newOcc.component)
+
+    crossSectionSketch = newComp.sketches.add(newComp.xZConstructionPlane)
+    crossSectionSketch.isComputeDeferred = True
+    drawCrossSectionFrame(crossSectionSketch, cs)
+    crossSectionSketch.isComputeDeferred = False
+
+    drawToothLoft(newComp, crossSectionSketch, cs, cs.wheel, adsk.fusion.FeatureOperations.NewBodyFeatureOperation, spec.profileTolerance)
+    drawToothLoft(newComp, crossSectionSketch, cs, cs.pinion, adsk.fusion.FeatureOperations.NewBodyFeatureOperation, spec.profileTolerance)
+    return newComp
+
+
+# The pure math of building a gear set, run on the speculation worker while
+# the dialog is open: both tooth profiles, the cross section and, when the
+# flanks are drawn as NURBS, their fitted curves, a step at a time so stale
+# work stops early. It is all cached, on the spec or in gearlib, for
+# drawGearSet to find. No Fusion API calls can be made here, off the main
+# thread.
+def precomputeGearSet(spec, cancelled):
+    for numTeeth, otherTeeth in ((spec.numTeeth, spec.numTeeth1), (spec.numTeeth1, spec.numTeeth)):
+        if cancelled():
+            return
+        gearCrossSection.sideToothProfile(spec, numTeeth, numTeeth/otherTeeth)
+    if cancelled():
+        return
+    cs = spec.crossSection
+    if PROFILE_CURVES != 'nurbs':
+        return
+    for side in (cs.wheel, cs.pinion):
+        if cancelled():
+            return
+        gearNurbs.profileFlankCurves(side.profile, spec.profileTolerance)
+        if side.profile.fillet is not None:
+            gearNurbs.profileFilletCurves(side.profile, spec.profileTolerance)
+
+
+# Counts the timeline objects in the design and the bodies in a gear set
+# component, for the stage timer.
+def generationCounts(design, comp):
+    bodies = comp.bRepBodies.count
+    for occ in comp.occurrences:
+        bodies += occ.component.bRepBodies.count
+    return {'timelineObjects': design.timeline.count, 'bodies': bodies}
+
+
+# Starts the stage timer for building one gear set.
+def gearSetTimer(spec):
+    timer = StageTimer('drawGearSet')
+    timer.info['fusionVersion'] = _app.version
+    timer.info['mode'] = 'parametric'
+    timer.info['spec'] = dict(zip(gearSpec.FIELDS, spec.key))
+    return timer
+
+
+# Appends a gear set's timing record to the log and, if enabled, adds its
+# summary to the component.
+def finishTiming(comp, timer):
+    writeRecord(TIMING_LOG, timer.finish())
+    if TIMING_ATTRIBUTE:
+        summary = timer.summary()
+        recompute = timer.info.get('recompute')
+        if recompute:
+            summary += '; recompute %.3fs parametric, %.3fs direct' % (recompute['parametric'], recompute['direct'])
+        comp.attributes.add('BevelGear', 'Timing', summary)
+
+
+# Groups the timeline objects that built a gear set.
+def groupTimeline(design, firstIndex, lastIndex):
+    timelineGroup = design.timeline.timelineGroups.add(firstIndex, lastIndex)
+    timelineGroup.name = 'BevelGears'
+    return timelineGroup
+
+
+# Builds a metric gear tooth. With direct, the gear set is left as bodies
+# without modeling history, see makeDirect. With pinions, it is made a
+# differential with that many pinions, see drawDifferential. speculation is
+# what the dialog's background worker did, for the timing record.
+def drawGearSet(design, spec, direct=False, pinions=0, speculation=None):
+    try:
+        timer = gearSetTimer(spec)
+        if speculation:
+            timer.info['speculation'] = speculation
+        instancer = gearTrain.Instancer()
+        newComp, firstIndex, lastIndex = buildAssembly(design, spec, timer, direct, pinions, instancer)
+        if pinions:
+            timer.info['instancing'] = instancer.report()
+
+        timer.begin('timelineGroup')
+        groupTimeline(design, firstIndex, lastIndex)
+        finishTiming(newComp, timer)
         return newComp
 
     except Exception as error:
@@ -905,16 +988,557 @@ def drawGearSet(design, module, numTeeth, numTeeth1, thickness, pressureAngle, b
         return None
 
 
-def SplitLineAt(line, distance):
-    start = line.startSketchPoint.geometry
-    end = line.endSketchPoint.geometry
-    length = line.length
-    xs = start.x + distance * (end.x - start.x) / length
-    ys = start.y + distance * (end.y - start.y) / length
-    zs = start.z + distance * (end.z - start.z) / length
+# The part of a gear set both builders share: a new component with the cross
+# section sketch and, in a component for each gear, a single tooth lofted from
+# its profile and trimmed to the face width. Returns (occurrence, component,
+# crossSectionSketch, wheel, pinion), each gear being (component, axis, root
+# cone profile) with the axis a line of the sketch.
+def buildGearTeeth(design, spec, timer):
+    # All of the cross section geometry is computed up front, in centimeters.
+    timer.begin('crossSectionMath')
+    cs = spec.crossSection
+    numTeeth = spec.numTeeth
+    numTeeth1 = spec.numTeeth1
+
+    ###### Create a new component by creating an occurrence.
+    timer.begin('crossSectionSketch')
+    occs = design.rootComponent.occurrences
+    mat = adsk.core.Matrix3D.create()
+    newOcc = occs.addNewComponent(mat)        
+    newComp = adsk.fusion.Component.cast(newOcc.component)
+    timer.counter = lambda: generationCounts(design, newComp)
+
+    ###### Create a new sketch for the cross section of the gears
+    sketches = newComp.sketches
+    xzPlane = newComp.xZConstructionPlane
+    crossSectionSketch = sketches.add(xzPlane)
+    crossSectionSketch.isComputeDeferred = True
+
+    # A rectangle defining the gears geometry based on their ratio
+    coneCenter = point3D(cs.coneCenter)
+    pinionCenter = point3D(cs.pinionCenter)
+    wheelCenter = point3D(cs.wheelCenter)
+    wheelAxis, pinionAxis = drawCrossSectionFrame(crossSectionSketch, cs)
+    lines = crossSectionSketch.sketchCurves.sketchLines
+
+    ##### Loft the wheel tooth profile to the cone center and make a new component
+    timer.begin('wheelToothLoft')
+    wheelLoft = drawToothLoft(newComp, crossSectionSketch, cs, cs.wheel, adsk.fusion.FeatureOperations.NewComponentFeatureOperation,
+                              spec.profileTolerance, timer)
+
+    # Add the projected points from the tooth profile for the root cone
+    timer.begin('rootConeLines')
+    wheelConeA = point3D(cs.wheel.coneA)
+    wheelConeB = point3D(cs.wheel.coneB)
+    wheelAxisExt = lines.addByTwoPoints(wheelCenter, wheelConeA)
+    wheelConeBase = lines.addByTwoPoints(wheelConeA, wheelConeB)
+    wheelConeSlant = lines.addByTwoPoints(wheelConeB, coneCenter)
+
+    wheelOcc = newComp.occurrences.item(0)
+    wheelComp = adsk.fusion.Component.cast(wheelOcc.component)
+    wheelComp.name = f'{numTeeth} Tooth'
+
+    ##### Loft the pinion tooth profile, on a plane at an angle based on gear ratio
+    timer.begin('pinionToothLoft')
+    pinionLoft = drawToothLoft(newComp, crossSectionSketch, cs, cs.pinion, adsk.fusion.FeatureOperations.NewComponentFeatureOperation,
+                               spec.profileTolerance, timer)
+
+    # Add the projected points from the tooth profile for the root cone
+    timer.begin('rootConeLines')
+    pinionConeA = point3D(cs.pinion.coneA)
+    pinionConeB = point3D(cs.pinion.coneB)
+    pinionAxisExt = lines.addByTwoPoints(pinionCenter, pinionConeA)
+    pinionConeBase = lines.addByTwoPoints(pinionConeA, pinionConeB)
+    pinionConeSlant = lines.addByTwoPoints(pinionConeB, coneCenter)
+
+    pinionOcc = newComp.occurrences.item(1)
+    pinionComp = adsk.fusion.Component.cast(pinionOcc.component)
+    pinionComp.name = f'{numTeeth1} Tooth'
+
+    # Add some lines to the cross section sketch for trimming the teeth
+    wheelFace = point3D(cs.wheel.face)
+    pinionFace = point3D(cs.pinion.face)
+    wheelConeSlant.split(wheelFace)
+    pinionConeSlant.split(pinionFace)
+    lines.addByTwoPoints(wheelFace, pinionFace)
+
+    newWpt = point3D(cs.wheel.axisSplit)
+    wheelAxis.split(newWpt)
+    lines.addByTwoPoints(wheelFace, newWpt)
+
+    newPpt = point3D(cs.pinion.axisSplit)
+    pinionAxis.split(newPpt)
+    lines.addByTwoPoints(pinionFace, newPpt)
+
+    ##### Remove the excess material near the apex of each tooth
+    # Can use all the sketch profiles for the cut operation. While iterating
+    # over all the profiles on the criss section sketch can look for the
+    # the profiles to revolve for the root cones for the wheel and pinion,
+    # which the region index finds from their bounding boxes.
+    timer.begin('profileRegions')
+    crossSectionSketch.isComputeDeferred = False
+    crossSectionProfiles = adsk.core.ObjectCollection.create()
+    regionIndex = gearRegions.RegionIndex(cs)
+    rootCones = {}
+    for p in crossSectionSketch.profiles:
+        crossSectionProfiles.add(p)
+        box = p.boundingBox
+        minPoint, maxPoint = box.minPoint, box.maxPoint
+        rootCones[regionIndex.classify((minPoint.x, minPoint.y, maxPoint.x, maxPoint.y))] = p
+
+    wheelRootCone = rootCones.get(gearRegions.WHEEL_ROOT_CONE)
+    pinionRootCode = rootCones.get(gearRegions.PINION_ROOT_CONE)
+    if wheelRootCone is None or pinionRootCode is None:
+        raise RuntimeError('The root cone profiles were not found in the cross section sketch.')
+
+    timer.begin('revolveCuts')
+    revolves0 = wheelComp.features.revolveFeatures
+    extCutInput = revolves0.createInput(crossSectionProfiles, wheelAxis, adsk.fusion.FeatureOperations.CutFeatureOperation)
+    extCutInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
+    extCutInput.participantBodies = [wheelLoft.bodies.item(0)]
+    ext = revolves0.add(extCutInput)
+
+    revolves1 = pinionComp.features.revolveFeatures
+    extCutInput = revolves1.createInput(crossSectionProfiles, pinionAxis, adsk.fusion.FeatureOperations.CutFeatureOperation)
+    extCutInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
+    extCutInput.participantBodies = [pinionLoft.bodies.item(0)]
+    ext = revolves1.add(extCutInput)
+
+    return newOcc, newComp, crossSectionSketch, (wheelComp, wheelAxis, wheelRootCone), (pinionComp, pinionAxis, pinionRootCode)
+
+
+# Builds the gear set in a new component, timing each stage with timer.
+# Returns (component, firstIndex, lastIndex), the last two being the range of
+# timeline objects that built it, for grouping. Errors are raised.
+def buildGearSet(design, spec, timer):
+    newOcc, newComp, crossSectionSketch, wheel, pinion = buildGearTeeth(design, spec, timer)
+    wheelComp, wheelAxis, wheelRootCone = wheel
+    pinionComp, pinionAxis, pinionRootCode = pinion
+    numTeeth = spec.numTeeth
+    numTeeth1 = spec.numTeeth1
+    holeDiam = spec.holeDiam
+    cs = spec.crossSection
+
+    ##### Create Circular patters for the teeth
+    timer.begin('circularPatterns')
+    # Create input entities for circular pattern (wheel)
+    inputEntites = adsk.core.ObjectCollection.create()
+    inputEntites.add(wheelComp.bRepBodies.item(0))
+
+    # Create the input for circular pattern
+    circularFeats = wheelComp.features.circularPatternFeatures
+    circularFeatInput = circularFeats.createInput(inputEntites, wheelAxis)
+    circularFeatInput.quantity = adsk.core.ValueInput.createByReal(numTeeth)
+    circularFeatInput.totalAngle = adsk.core.ValueInput.createByString('360 deg')
+    circularFeatInput.isSymmetric = False
+
+    # Create the circular pattern of wheel teeth
+    circularFeat = circularFeats.add(circularFeatInput)
+
+    # Create input entities for circular pattern (pinion)
+    inputEntites = adsk.core.ObjectCollection.create()
+    inputEntites.add(pinionComp.bRepBodies.item(0))
+
+    # Create the input for circular pattern
+    circularFeats = pinionComp.features.circularPatternFeatures
+    circularFeatInput = circularFeats.createInput(inputEntites, pinionAxis)
+    circularFeatInput.quantity = adsk.core.ValueInput.createByReal(numTeeth1)
+    circularFeatInput.totalAngle = adsk.core.ValueInput.createByString('360 deg')
+    circularFeatInput.isSymmetric = False
+
+    # Create the circular pattern of pinion teeth
+    circularFeat = circularFeats.add(circularFeatInput)
+
+    ##### Revolve the root cones
+    timer.begin('rootConeRevolves')
+    revolves0 = wheelComp.features.revolveFeatures
+    revolves1 = pinionComp.features.revolveFeatures
+    extBodyInput = revolves0.createInput(wheelRootCone, wheelAxis, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extBodyInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
+    ext = revolves0.add(extBodyInput)
+    extBodyInput = revolves1.createInput(pinionRootCode, pinionAxis, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+    extBodyInput.setAngleExtent(True, adsk.core.ValueInput.createByReal(2*math.pi))
+    ext = revolves1.add(extBodyInput)
+
+    #### Drill holes for the shafts
+    timer.begin('shaftHoles')
+    apex = crossSectionSketch.sketchToModelSpace(point3D(cs.coneCenter))
+    wheelCenter = crossSectionSketch.sketchToModelSpace(point3D(cs.wheelCenter))
+    pinionCenter = crossSectionSketch.sketchToModelSpace(point3D(cs.pinionCenter))
+    rootConeBody = wheelComp.bRepBodies.item(wheelComp.bRepBodies.count-1)
+    drawShaftHole(wheelComp, rootConeBody, apex, wheelCenter, holeDiam)
+    rootConeBody = pinionComp.bRepBodies.item(pinionComp.bRepBodies.count-1)
+    ext = drawShaftHole(pinionComp, rootConeBody, apex, pinionCenter, holeDiam)
+
+    # Add an attribute to the component with all of the input values.  This might 
+    # be used in the future to be able to edit the gear.
+    attrib = newComp.attributes.add('BevelGear', 'Values', gearValuesAttribute(spec))
     
-    #_ui.messageBox(f'splitting ({start.x} {start.y} {start.z}) to ({end.x} {end.y} {end.z}) at ({xs} {ys} {zs}) {distance} {length}') 
-    split_pt = adsk.core.Point3D.create(xs, ys, zs)
-    line.split(split_pt)
-
-    return(split_pt)
+    newComp.name = f'{numTeeth}/{numTeeth1} Bevel Gears'
+
+    # TODO: Udpdate this as new features are added so they can be squashed on the timeline
+    return newComp, newOcc.timelineObject.index, ext.timelineObject.index
+
+
+# The input values of a gear set as stored in its BevelGear/Values attribute.
+# TODO: Add a few bevel gear specific parameters here
+def gearValuesAttribute(spec):
+    cs = spec.crossSection
+    gearValues = {}
+    gearValues['module'] = str(spec.moduleCm)
+    gearValues['numTeeth'] = str(spec.numTeeth)
+    gearValues['numTeeth1'] = str(spec.numTeeth1)
+    gearValues['thickness'] = str(spec.thickness)
+    gearValues['pressureAngle'] = str(spec.pressureAngle)
+    gearValues['holeDiam'] = str(spec.holeDiam)
+    gearValues['backlash'] = str(spec.backlash)
+    gearValues['profileTolerance'] = str(spec.profileTolerance)
+    gearValues['rootFilletRad'] = str(spec.rootFilletRad)
+    gearValues['wheelProfilePoints'] = str(cs.wheel.profile.sampling.pointCount)
+    gearValues['wheelProfileDeviation'] = str(cs.wheel.profile.sampling.maxDeviation)
+    gearValues['pinionProfilePoints'] = str(cs.pinion.profile.sampling.pointCount)
+    gearValues['pinionProfileDeviation'] = str(cs.pinion.profile.sampling.maxDeviation)
+    return str(gearValues)
+
+
+# Builds a gear set as a direct model, with DIRECT_BUILDER. Returns
+# (component, firstIndex, lastIndex) like buildGearSet.
+def buildDirectGearSet(design, spec, timer):
+    timer.info['builder'] = DIRECT_BUILDER
+    if DIRECT_BUILDER == 'transient':
+        return buildGearSetTransient(design, spec, timer)
+    newComp, firstIndex, lastIndex = buildGearSet(design, spec, timer)
+    return makeDirect(design, newComp, firstIndex, lastIndex, timer)
+
+
+# Seconds the timeline takes to recompute from index to the end. Only for
+# gear sets at the end of the timeline, as the marker is left there.
+def timeRecompute(timeline, index):
+    timeline.markerPosition = index
+    start = time.perf_counter()
+    timeline.moveToEnd()
+    return time.perf_counter() - start
+
+
+# Deletes the timeline objects from firstIndex to lastIndex, one gear set's,
+# and nothing else. A marker the user rolled back stays between the same
+# objects. When the objects end the timeline, the marker is rolled back over
+# them and deleteAllAfterMarker takes them in one call; otherwise they are
+# deleted one by one, last first, so each goes before what it depends on.
+def deleteTimelineRange(timeline, firstIndex, lastIndex):
+    count = timeline.count
+    marker = timeline.markerPosition
+    if marker == count and lastIndex == count - 1:
+        timeline.markerPosition = firstIndex
+        timeline.deleteAllAfterMarker()
+        return
+
+    for index in range(lastIndex, firstIndex - 1, -1):
+        timeline.item(index).entity.deleteMe()
+    removed = lastIndex - firstIndex + 1
+    timeline.markerPosition = marker - removed if marker > lastIndex else min(marker, firstIndex)
+
+
+# Replaces a gear set from buildGearSet with the same bodies and no modeling
+# history. The bodies are copied, everything that built them is deleted and
+# the copies go into a base feature in each gear's component, so later edits
+# elsewhere in the design don't recompute the gear set. Its parameters are
+# only kept in the BevelGear/Values attribute. Returns (component,
+# firstIndex, lastIndex) like buildGearSet.
+def makeDirect(design, newComp, firstIndex, lastIndex, timer):
+    timeline = design.timeline
+    timer.info['mode'] = 'direct'
+    recompute = RECOMPUTE_TIMING and timeline.markerPosition == timeline.count
+
+    timer.begin('directCopy')
+    tempBRep = adsk.fusion.TemporaryBRepManager.get()
+    gears = []
+    for occ in newComp.occurrences:
+        comp = occ.component
+        gears.append((comp.name, [tempBRep.copy(body) for body in comp.bRepBodies]))
+    name = newComp.name
+    values = newComp.attributes.itemByName('BevelGear', 'Values').value
+
+    if recompute:
+        timer.begin('parametricRecompute')
+        parametricSeconds = timeRecompute(timeline, firstIndex)
+
+    timer.begin('deleteHistory')
+    deleteTimelineRange(timeline, firstIndex, lastIndex)
+
+    timer.begin('directBodies')
+    newComp, firstIndex, lastIndex = addDirectGearSet(design, name, values, gears, timer)
+
+    if recompute:
+        timer.begin('directRecompute')
+        timer.info['recompute'] = {'parametric': parametricSeconds, 'direct': timeRecompute(timeline, firstIndex)}
+    return newComp, firstIndex, lastIndex
+
+
+# Adds a gear set made of temporary bodies to the design: a new component
+# named name, with the BevelGear/Values attribute values, holding a component
+# for each gear with its bodies in a base feature. gears is a list of (name,
+# bodies). Returns (component, firstIndex, lastIndex) like buildGearSet.
+def addDirectGearSet(design, name, values, gears, timer):
+    newOcc = design.rootComponent.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+    newComp = adsk.fusion.Component.cast(newOcc.component)
+    timer.counter = lambda: generationCounts(design, newComp)
+    for gearName, bodies in gears:
+        gearOcc = newComp.occurrences.addNewComponent(adsk.core.Matrix3D.create())
+        gearComp = adsk.fusion.Component.cast(gearOcc.component)
+        gearComp.name = gearName
+        baseFeature = gearComp.features.baseFeatures.add()
+        baseFeature.startEdit()
+        for body in bodies:
+            gearComp.bRepBodies.add(body, baseFeature)
+        baseFeature.finishEdit()
+    newComp.attributes.add('BevelGear', 'Values', values)
+    newComp.name = name
+    return newComp, newOcc.timelineObject.index, baseFeature.timelineObject.index
+
+
+# Turns count copies of a temporary body evenly about the axis through origin
+# and joins them into one body. The ring is built by doubling, joining the
+# teeth so far with a turned copy of themselves, so it takes about
+# 2*log2(count) booleans rather than count.
+def patternBody(tempBRep, body, count, origin, axis):
+    def turned(block, teeth):
+        block = tempBRep.copy(block)
+        if teeth:
+            rotation = adsk.core.Matrix3D.create()
+            rotation.setToRotation(2*math.pi * teeth / count, axis, origin)
+            tempBRep.transform(block, rotation)
+        return block
+
+    union = adsk.fusion.BooleanTypes.UnionBooleanType
+    ring, placed = None, 0
+    block, size = body, 1
+    remaining = count
+    while remaining:
+        if remaining & 1:
+            teeth = turned(block, placed)
+            if ring is None:
+                ring = teeth
+            else:
+                tempBRep.booleanOperation(ring, teeth, union)
+            placed += size
+        remaining >>= 1
+        if remaining:
+            tempBRep.booleanOperation(block, turned(block, size), union)
+            size *= 2
+    return ring
+
+
+# One gear of the set as a single temporary body: its root cone with the shaft
+# hole, joined with side.numTeeth copies of tooth. side is cs.wheel or
+# cs.pinion; its cross section points are mapped to model space through the
+# cross section sketch.
+def transientGearBody(tempBRep, crossSectionSketch, tooth, side, holeDiam):
+    def modelPoint(point):
+        return crossSectionSketch.sketchToModelSpace(point3D(point))
+
+    # The root cone runs along the gear axis from coneA to axisSplit.
+    coneStart = modelPoint(side.coneA)
+    coneEnd = modelPoint(side.axisSplit)
+    body = tempBRep.createCylinderOrCone(coneStart, math.dist(side.coneA, side.coneB),
+                                         coneEnd, math.dist(side.axisSplit, side.face))
+
+    # The hole overshoots both ends of the cone so they don't share faces.
+    if holeDiam > 0:
+        length = math.dist(side.coneA, side.axisSplit)
+        holeStart = modelPoint(gearCrossSection.splitPointAt(side.axisSplit, side.coneA, 2*length))
+        holeEnd = modelPoint(gearCrossSection.splitPointAt(side.coneA, side.axisSplit, 2*length))
+        hole = tempBRep.createCylinderOrCone(holeStart, holeDiam/2, holeEnd, holeDiam/2)
+        tempBRep.booleanOperation(body, hole, adsk.fusion.BooleanTypes.DifferenceBooleanType)
+
+    teeth = patternBody(tempBRep, tooth, side.numTeeth, coneStart, coneStart.vectorTo(coneEnd))
+    tempBRep.booleanOperation(body, teeth, adsk.fusion.BooleanTypes.UnionBooleanType)
+    return body
+
+
+# Builds a gear set as a direct model without patterning, revolving or
+# cutting anything in the design. The TemporaryBRepManager can't loft, so
+# buildGearTeeth still makes one trimmed tooth per gear with features. The
+# teeth are copied, their features deleted, and the tooth ring, root cone and
+# shaft hole of each gear are made and joined in memory. Only the finished
+# body of each gear is added to the design, see addDirectGearSet. Returns
+# (component, firstIndex, lastIndex) like buildGearSet.
+def buildGearSetTransient(design, spec, timer):
+    timer.info['mode'] = 'direct'
+    newOcc, newComp, crossSectionSketch, wheel, pinion = buildGearTeeth(design, spec, timer)
+    cs = spec.crossSection
+
+    timer.begin('transientBodies')
+    tempBRep = adsk.fusion.TemporaryBRepManager.get()
+    gears = []
+    for (comp, axis, rootCone), side in ((wheel, cs.wheel), (pinion, cs.pinion)):
+        tooth = tempBRep.copy(comp.bRepBodies.item(0))
+        gears.append((f'{side.numTeeth} Tooth', [transientGearBody(tempBRep, crossSectionSketch, tooth, side, spec.holeDiam)]))
+
+    # The teeth's objects end at the marker, which is at the end of the
+    # timeline unless the user rolled it back.
+    timer.begin('deleteHistory')
+    timeline = design.timeline
+    deleteTimelineRange(timeline, newOcc.timelineObject.index, timeline.markerPosition - 1)
+
+    timer.begin('directBodies')
+    name = f'{spec.numTeeth}/{spec.numTeeth1} Bevel Gears'
+    return addDirectGearSet(design, name, gearValuesAttribute(spec), gears, timer)
+
+
+# Matrix3D for a transform from gearlib.train.
+def matrix3D(transform):
+    matrix = adsk.core.Matrix3D.create()
+    matrix.setWithArray([cell for row in transform for cell in row])
+    return matrix
+
+
+# Places another occurrence of an already built gear set component in the
+# root component. Returns the occurrence.
+def placeGearSet(design, comp, transform):
+    return design.rootComponent.occurrences.addExistingComponent(comp, matrix3D(transform))
+
+
+# Makes a gear set a differential. The wheel is one side gear; the other is
+# a second occurrence of the wheel's component turned half way about the
+# pinion axis, and the pinions after the first are occurrences of the
+# pinion's component spaced evenly about the wheel axis, so a four pinion
+# differential builds one wheel and one pinion. What the occurrences saved is
+# added to instancer, taking each gear as half of the gear set's build
+# (seconds and timelineObjects). Returns the last occurrence added.
+def drawDifferential(comp, spec, pinions, instancer, seconds, timelineObjects):
+    wheelComp = comp.occurrences.item(0).component
+    pinionComp = comp.occurrences.item(1).component
+    sideGear, extraPinions = gearTrain.differentialTransforms(spec, pinions)
+    placements = [(wheelComp, sideGear)] + [(pinionComp, transform) for transform in extraPinions]
+    for gearComp, transform in placements:
+        occ = comp.occurrences.addExistingComponent(gearComp, matrix3D(transform))
+        instancer.saved(seconds / 2, gearComp.bRepBodies.count, timelineObjects // 2)
+    return occ
+
+
+# Builds a gear set with the builder for direct and, with pinions, makes it
+# a differential. Returns (component, firstIndex, lastIndex) like the
+# builders.
+def buildAssembly(design, spec, timer, direct, pinions, instancer):
+    build = buildDirectGearSet if direct else buildGearSet
+    newComp, firstIndex, lastIndex = build(design, spec, timer)
+    if pinions:
+        timer.begin('differential')
+        occ = drawDifferential(newComp, spec, pinions, instancer, timer.elapsed(), lastIndex - firstIndex + 1)
+        lastIndex = occ.timelineObject.index
+    return newComp, firstIndex, lastIndex
+
+
+# Builds every gear set in a table file (see gearlib.batch) into the design in
+# one run, with a progress dialog that can cancel between sets. Sets are added
+# at the end of the timeline, so building one never recomputes the others,
+# and the timeline groups are only made once all are built, last first so the
+# indexes of the earlier ones stay put. It won't run with the timeline marker
+# rolled back, as the sets would go in at the marker instead. tolerance is the profile tolerance in
+# cm and direct is passed on to drawGearSet. Each set's timing goes to the
+# timing log as usual, plus one record for the whole batch, and a summary is
+# shown at the end.
+#
+# Rows with the same parameters are only built once; the repeats are placed
+# as more occurrences of the first one's component. Rows with a pinions
+# column are built as differentials, and rows that share a train name are
+# chained into a gear train, each stage's wheel on the shaft of the pinion of
+# the row before (see gearlib.train).
+def drawGearSetBatch(design, path, tolerance, direct=False):
+    try:
+        gearSets = list(gearBatch.readTable(path))
+    except (OSError, ValueError) as error:
+        _ui.messageBox('Could not read the batch table: ' + str(error))
+        return []
+
+    timeline = design.timeline
+    if timeline.markerPosition != timeline.count:
+        _ui.messageBox('Move the timeline marker to the end before building a batch table.')
+        return []
+
+    batchTimer = StageTimer('drawGearSetBatch')
+    batchTimer.info['fusionVersion'] = _app.version
+    batchTimer.info['table'] = path
+    batchTimer.info['mode'] = 'direct' if direct else 'parametric'
+    batchTimer.begin('gearSets')
+
+    progress = _ui.createProgressDialog()
+    progress.isCancelButtonShown = True
+    progress.show('Bevel Gears', 'Building gear set %v of %m', 0, len(gearSets))
+
+    built = []
+    lines = []
+    instancer = gearTrain.Instancer()
+    placed = 0
+    trains = {}     # train name -> (spec, transform) of its last stage
+    moved = False
+    for index, gearSet in enumerate(gearSets):
+        progress.progressValue = index
+        adsk.doEvents()
+        if progress.wasCancelled:
+            break
+
+        name = '%d: %d/%d module %g' % (index + 1, gearSet['numTeeth'], gearSet['numTeeth1'], gearSet['module'])
+        try:
+            spec = gearBatch.tableSpec(gearSet, tolerance * 10)
+            pinions = gearSet['pinions']
+            invalid = spec.inputError(gearBatch.formatMm) or gearTrain.differentialError(spec, pinions)
+            if invalid:
+                lines.append('%s skipped, %s' % (name, invalid))
+                continue
+
+            transform = gearTrain.IDENTITY
+            if gearSet['train']:
+                stage = trains.get(gearSet['train'])
+                if stage:
+                    transform = gearTrain.multiply(stage[1], gearTrain.stageTransform(stage[0], spec))
+                trains[gearSet['train']] = (spec, transform)
+
+            key = gearTrain.parameterHash(spec, pinions, direct and DIRECT_BUILDER)
+            original = instancer.find(key)
+            if original:
+                placeGearSet(design, original, transform)
+                placed += 1
+                lines.append('%s instance' % name)
+                continue
+
+            timer = gearSetTimer(spec)
+            timer.info['batchIndex'] = index
+            newComp, firstIndex, lastIndex = buildAssembly(design, spec, timer, direct, pinions, instancer)
+            if transform != gearTrain.IDENTITY:
+                timeline.item(firstIndex).entity.transform = matrix3D(transform)
+                moved = True
+            finishTiming(newComp, timer)
+            bodies = sum(stage.get('bodies', 0) for stage in timer.stages)
+            instancer.add(key, newComp, timer.total, bodies, lastIndex - firstIndex + 1)
+            built.append((newComp, firstIndex, lastIndex))
+            lines.append('%s %.2fs' % (name, timer.total))
+        except Exception as error:
+            lines.append('%s failed, %s' % (name, error))
+    cancelled = progress.wasCancelled
+    progress.hide()
+
+    # Moving the train stages into place is only kept in a parametric
+    # design once the positions are captured.
+    if moved and design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        design.snapshots.add()
+
+    batchTimer.begin('timelineGroups')
+    for newComp, firstIndex, lastIndex in reversed(built):
+        groupTimeline(design, firstIndex, lastIndex)
+
+    batchTimer.info.update({'gearSets': len(gearSets), 'built': len(built), 'cancelled': cancelled,
+                            'instancing': instancer.report()})
+    writeRecord(TIMING_LOG, batchTimer.finish())
+
+    summary = 'Built %d of %d gear sets in %.2fs%s.' % (len(built) + placed, len(gearSets), batchTimer.total,
+                                                       ', cancelled' if cancelled else '')
+    if instancer.instances:
+        summary += ' ' + instancer.summary() + '.'
+    _ui.messageBox(summary + '\n\n' + '\n'.join(lines), 'Bevel Gears')
+    return [comp for comp, firstIndex, lastIndex in built]
+
+
+# How long loading the add-in took, counted in its first dialog's start time.
+_loadSeconds = time.perf_counter() - _loadStart
@@ -0,0 +1,128 @@
+# Compares the ways Gears.py can build a gear set, for tooth counts from 10 to
+# 150: the parametric model ('parametric'), a direct model made by removing
+# its history ('features', see makeDirect) and a direct model with the
+# patterns, root cones and holes done in memory ('transient', see
+# buildGearSetTransient).
+#
+#   python benchmarks/builders.py                         # headless
+#   python benchmarks/builders.py --table teeth.csv       # a batch table to run in Fusion
+#   python benchmarks/builders.py --log timings.jsonl     # summarize Fusion's timings
+#
+# Headless runs use the recording adsk stand-in in headless/, so they report
+# the Fusion API calls, features and temporary body operations each builder
+# makes; their times are only the Python side. For kernel times run the table
+# from --table as the dialog's Batch Table, once for each builder, and point
+# --log at the timing log.
+
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import time
+
+_rootDir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, _rootDir)
+sys.path.insert(0, os.path.join(_rootDir, 'headless'))
+
+import adsk
+import Gears
+from gearlib.spec import GearSpec
+from run import newDesign
+
+TEETH = (10, 20, 40, 80, 150)
+BUILDERS = ('parametric', 'features', 'transient')
+
+# The gear set for a tooth count, like the benchmarks in kernels.py: 1 mm
+# module and the pinion with half the wheel's teeth. Lengths in cm.
+MODULE = 1.0
+PRESSURE_ANGLE = 20.0
+
+
+def gearSpec(numTeeth):
+    return GearSpec(MODULE, numTeeth, max(4, numTeeth // 2), math.radians(PRESSURE_ANGLE),
+                    0.005, MODULE / 5, 0.1, 0.001)
+
+
+# Builds one gear set headless and returns its counts.
+def runBuilder(builder, numTeeth):
+    design = newDesign()
+    adsk.recorder.reset()
+    Gears.DIRECT_BUILDER = builder
+    start = time.perf_counter()
+    comp = Gears.drawGearSet(design, gearSpec(numTeeth), builder != 'parametric')
+    elapsed = time.perf_counter() - start
+    if comp is None:
+        raise RuntimeError(' | '.join(Gears._ui._messages))
+
+    recorder = adsk.recorder
+    features = sum(recorder.counts[name] for name in recorder.counts
+                   if name.endswith('Features.add') and not name.startswith('BaseFeatures.'))
+    return {'apiCalls': recorder.total, 'features': features,
+            'temporaryBRep': recorder.countOf('TemporaryBRepManager.'),
+            'timelineObjects': design.timeline.count, 'seconds': elapsed}
+
+
+# Writes a batch table with a gear set for each tooth count, in the units of
+# gearlib.batch (mm and degrees).
+def writeTable(path, teeth):
+    with open(path, 'w') as f:
+        f.write('module,numTeeth,numTeeth1,pressureAngle,thickness,holeDiam\n')
+        for numTeeth in teeth:
+            spec = gearSpec(numTeeth)
+            f.write('%r,%d,%d,%r,%r,%r\n' % (MODULE, spec.numTeeth, spec.numTeeth1, PRESSURE_ANGLE,
+                                             spec.thickness * 10, spec.holeDiam * 10))
+
+
+# Mean total seconds of the drawGearSet records in a timing log, by builder
+# and wheel tooth count.
+def summarizeLog(path):
+    totals = collections.defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('name') != 'drawGearSet' or 'spec' not in record:
+                continue
+            builder = record.get('builder', 'parametric') if record.get('mode') == 'direct' else 'parametric'
+            totals[(builder, record['spec']['numTeeth'])].append(record['total'])
+    return {key: sum(seconds) / len(seconds) for key, seconds in totals.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the gear set builders of Gears.py.')
+    parser.add_argument('--builder', action='append', choices=BUILDERS, help='builder to run (default: all)')
+    parser.add_argument('--teeth', type=int, action='append', help='tooth count to run (default: %s)' % ', '.join(map(str, TEETH)))
+    parser.add_argument('--table', metavar='PATH', help='write a batch table of the tooth counts instead')
+    parser.add_argument('--log', metavar='PATH', help='summarize a timing log from Fusion instead')
+    args = parser.parse_args(argv)
+    builders = args.builder or BUILDERS
+    teeth = args.teeth or TEETH
+
+    if args.table:
+        writeTable(args.table, teeth)
+        return 0
+
+    if args.log:
+        means = summarizeLog(args.log)
+        print('%-6s' % 'teeth' + ''.join('%12s' % builder for builder in builders))
+        for numTeeth in sorted({numTeeth for builder, numTeeth in means}):
+            cells = [means.get((builder, numTeeth)) for builder in builders]
+            print('%-6d' % numTeeth + ''.join('%11.3fs' % seconds if seconds is not None else '%12s' % '-'
+                                              for seconds in cells))
+        return 0
+
+    Gears.TIMING_LOG = os.devnull
+    Gears.RECOMPUTE_TIMING = False
+    print('%-12s %6s %9s %9s %9s %9s %9s' % ('builder', 'teeth', 'api', 'features', 'tempBRep', 'timeline', 'ms'))
+    for numTeeth in teeth:
+        for builder in builders:
+            counts = runBuilder(builder, numTeeth)
+            print('%-12s %6d %9d %9d %9d %9d %9.2f' % (builder, numTeeth, counts['apiCalls'], counts['features'],
+                                                      counts['temporaryBRep'], counts['timelineObjects'],
+                                                      counts['seconds'] * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
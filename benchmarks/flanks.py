@@ -0,0 +1,110 @@
+# Compares the two ways Gears.py can draw the involute flanks of a tooth
+# profile (PROFILE_CURVES): splines fitted through the involute points and
+# constrained tangent to the root lines ('fitted'), and fixed cubic B-splines
+# fitted headless with the tangency built in ('nurbs', see gearlib.nurbs).
+#
+#   python benchmarks/flanks.py                           # headless
+#   python benchmarks/flanks.py --log timings.jsonl       # summarize Fusion's timings
+#
+# Headless runs report, for the wheel's flank, the points (fitted) or control
+# points (nurbs) and the fit error, and for the whole gear set the Fusion API
+# calls and tangent constraints. The fit error of 'fitted' is estimated with
+# a natural cubic spline, see involute.splineDeviation. Sketch solve times
+# need Fusion: build the same gear sets there with each PROFILE_CURVES value
+# and point --log at the timing log.
+
+import argparse
+import collections
+import json
+import math
+import os
+import sys
+import time
+
+_rootDir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, _rootDir)
+sys.path.insert(0, os.path.join(_rootDir, 'headless'))
+
+import adsk
+import Gears
+from gearlib import nurbs
+from gearlib.spec import GearSpec
+from run import newDesign
+
+TEETH = (10, 20, 40, 80, 150)
+CURVES = ('fitted', 'nurbs')
+
+# Gear sets like the builder benchmark's, with the default dialog tolerance.
+MODULE = 1.0
+PRESSURE_ANGLE = 20.0
+TOLERANCE = 0.001
+
+
+def gearSpec(numTeeth):
+    return GearSpec(MODULE, numTeeth, max(4, numTeeth // 2), math.radians(PRESSURE_ANGLE),
+                    0.005, MODULE / 5, 0.1, TOLERANCE)
+
+
+# Builds one gear set headless with the given flank curves and returns its
+# counts.
+def runCurves(curves, numTeeth):
+    spec = gearSpec(numTeeth)
+    nurbs.involuteFlankCurve.cache_clear()
+    design = newDesign()
+    adsk.recorder.reset()
+    Gears.PROFILE_CURVES = curves
+    timer = Gears.gearSetTimer(spec)
+    start = time.perf_counter()
+    Gears.buildGearSet(design, spec, timer)
+    elapsed = time.perf_counter() - start
+
+    wheel = timer.info['profiles'][0]
+    recorder = adsk.recorder
+    return {'points': wheel['points'], 'fitError': wheel['fitError'], 'apiCalls': recorder.total,
+            'constraints': recorder.countOf('GeometricConstraints.'), 'seconds': elapsed}
+
+
+# Mean sketch solve seconds per tooth profile in a timing log, by flank
+# curves and wheel tooth count.
+def summarizeLog(path):
+    solves = collections.defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('name') != 'drawGearSet' or 'profiles' not in record:
+                continue
+            for profile in record['profiles']:
+                solves[(profile['curves'], record['spec']['numTeeth'])].append(profile['solveSeconds'])
+    return {key: sum(seconds) / len(seconds) for key, seconds in solves.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the flank curves Gears.py can draw.')
+    parser.add_argument('--curves', action='append', choices=CURVES, help='flank curves to run (default: both)')
+    parser.add_argument('--teeth', type=int, action='append', help='tooth count to run (default: %s)' % ', '.join(map(str, TEETH)))
+    parser.add_argument('--log', metavar='PATH', help='summarize a timing log from Fusion instead')
+    args = parser.parse_args(argv)
+    curvesList = args.curves or CURVES
+    teeth = args.teeth or TEETH
+
+    if args.log:
+        means = summarizeLog(args.log)
+        print('%-6s' % 'teeth' + ''.join('%12s' % curves for curves in curvesList))
+        for numTeeth in sorted({numTeeth for curves, numTeeth in means}):
+            cells = [means.get((curves, numTeeth)) for curves in curvesList]
+            print('%-6d' % numTeeth + ''.join('%10.1fms' % (seconds * 1000) if seconds is not None else '%12s' % '-'
+                                              for seconds in cells))
+        return 0
+
+    Gears.TIMING_LOG = os.devnull
+    print('%-8s %6s %7s %10s %7s %12s %9s' % ('curves', 'teeth', 'points', 'error um', 'api', 'constraints', 'ms'))
+    for numTeeth in teeth:
+        for curves in curvesList:
+            counts = runCurves(curves, numTeeth)
+            print('%-8s %6d %7d %10.2f %7d %12d %9.2f' % (curves, numTeeth, counts['points'], counts['fitError'] * 1e4,
+                                                         counts['apiCalls'], counts['constraints'], counts['seconds'] * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# Micro-benchmarks for the gear math kernels, run without Fusion. Each kernel
+# is timed for every tooth count in the matrix, over all of the modules and
+# pressure angles, and reported as seconds per call. Results can be saved as a
+# JSON baseline and later runs compared against it.
+#
+#   python benchmarks/kernels.py                          # print timings
+#   python benchmarks/kernels.py --save benchmarks/baseline.json
+#   python benchmarks/kernels.py --compare benchmarks/baseline.json --threshold 0.2
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+import numpy as np
+
+from gearlib import crosssection, involute, profile
+from gearlib.spec import GearSpec
+
+BASELINE = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'baseline.json')
+
+TEETH = (4, 8, 16, 32, 64, 128, 200)
+MODULES = (0.5, 1.0, 2.0, 5.0)              # mm
+PRESSURE_ANGLES = (14.5, 20.0, 25.0)        # degrees
+TOLERANCE = 0.001                           # cm
+
+# Seconds each timing repeat should take at least, how many repeats to take
+# the best of and how many times to go through the whole matrix. Rounds are
+# interleaved so a slow spell on the machine doesn't hit one kernel only.
+MIN_TIME = 0.02
+REPEATS = 3
+ROUNDS = 3
+
+
+# A gear set for one point of the matrix. The pinion has half the wheel's
+# teeth, but at least 4.
+def gearSpec(numTeeth, module, pressureAngle):
+    return GearSpec(module, numTeeth, max(4, numTeeth // 2), math.radians(pressureAngle),
+                    0.005, module / 5, 0.0, TOLERANCE)
+
+
+##### Kernels. Each takes a GearSpec and returns a function with no
+# arguments that runs the kernel once; the setup isn't timed.
+
+def involutePointsKernel(spec):
+    R0, Zi = profile.tredgold(spec.moduleCm, spec.numTeeth, spec.ratio)
+    baseRadius = R0 * math.cos(spec.pressureAngle)
+    radii = np.linspace(baseRadius, R0 + spec.moduleCm, 50)
+    return lambda: involute.involutePoints(baseRadius, radii)
+
+
+def adaptiveRadiiKernel(spec):
+    R0, Zi = profile.tredgold(spec.moduleCm, spec.numTeeth, spec.ratio)
+    baseRadius = R0 * math.cos(spec.pressureAngle)
+    rootRadius = R0 - spec.dedendum
+    outerRadius = R0 + spec.moduleCm
+    return lambda: involute.adaptiveInvoluteRadii(baseRadius, rootRadius, outerRadius, spec.profileTolerance)
+
+
+# The point math of drawToothProfile: the whole profile, uncached.
+def toothProfileKernel(spec):
+    args = (spec.moduleCm, spec.numTeeth, spec.pressureAngle, spec.backlash, spec.ratio,
+            spec.dedendum, spec.profileTolerance)
+    return lambda: profile.computeToothProfile(*args)
+
+
+def tredgoldKernel(spec):
+    args = (spec.moduleCm, spec.numTeeth, spec.ratio)
+    return lambda: profile.tredgold(*args)
+
+
+def backConeKernel(spec):
+    args = (spec.moduleCm, spec.numTeeth, spec.ratio, spec.pitchDia)
+    return lambda: crosssection.backCone(*args)
+
+
+def rootConeKernel(spec):
+    cs = spec.crossSection
+    args = (cs.wheel.backConeHeight, cs.wheel.backAngle, cs.pitchDia, cs.wheel.profile.profilePoint)
+    return lambda: crosssection.rootConeProjection(*args)
+
+
+def splitPointKernel(spec):
+    cs = spec.crossSection
+    args = (cs.wheel.coneB, cs.coneCenter, cs.thickness)
+    return lambda: crosssection.splitPointAt(*args)
+
+
+# The whole cross section, with both tooth profiles computed from scratch.
+def crossSectionKernel(spec):
+    def run():
+        profile.profileCache.clear()
+        return crosssection.computeCrossSection(spec)
+    return run
+
+
+KERNELS = {
+    'involutePoints': involutePointsKernel,
+    'adaptiveInvoluteRadii': adaptiveRadiiKernel,
+    'computeToothProfile': toothProfileKernel,
+    'tredgold': tredgoldKernel,
+    'backCone': backConeKernel,
+    'rootConeProjection': rootConeKernel,
+    'splitPointAt': splitPointKernel,
+    'computeCrossSection': crossSectionKernel,
+}
+
+
+# Best time per call, in seconds, of calling all of the functions in turn.
+def timeCalls(functions):
+    def once(loops):
+        start = time.perf_counter()
+        for i in range(loops):
+            for function in functions:
+                function()
+        return time.perf_counter() - start
+
+    loops = 1
+    while True:
+        elapsed = once(loops)
+        if elapsed >= MIN_TIME:
+            break
+        loops *= max(2, min(10, int(MIN_TIME / max(elapsed, 1e-9)) + 1))
+    best = min([elapsed] + [once(loops) for i in range(REPEATS - 1)])
+    return best / (loops * len(functions))
+
+
+def runBenchmarks(kernels, teeth, rounds=ROUNDS, log=None):
+    cases = {}
+    for name in kernels:
+        for numTeeth in teeth:
+            cases['%s/z=%d' % (name, numTeeth)] = [KERNELS[name](gearSpec(numTeeth, module, pressureAngle))
+                                                   for module in MODULES for pressureAngle in PRESSURE_ANGLES]
+    cases['calibration'] = [calibrationKernel()]
+    results = {}
+    for i in range(rounds):
+        for key, functions in cases.items():
+            seconds = timeCalls(functions)
+            results[key] = min(seconds, results.get(key, seconds))
+    if log:
+        for key, seconds in results.items():
+            log('%-32s %10.2f us' % (key, seconds * 1e6))
+    return results
+
+
+# A fixed workload timed alongside the kernels. Comparisons are scaled by how
+# much it changed, so a baseline from a faster or busier machine still gives
+# sensible ratios.
+def calibrationKernel():
+    values = np.linspace(0.1, 1.0, 64)
+    def run():
+        total = 0.0
+        for i in range(50):
+            total += math.sqrt(i) * math.atan(i)
+        return total + float(np.sum(np.arccos(values)))
+    return run
+
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+# Compares results to a baseline. Returns (key, baseline, current, ratio)
+# for every benchmark in both, ratio > 1 being slower. Ratios are divided by
+# the calibration ratio when both have one.
+def compare(baseline, results):
+    scale = 1.0
+    if 'calibration' in baseline and 'calibration' in results:
+        scale = results['calibration'] / baseline['calibration']
+    rows = []
+    for key, seconds in results.items():
+        if key in baseline and key != 'calibration':
+            rows.append((key, baseline[key], seconds, seconds / baseline[key] / scale))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the gear math kernels.')
+    parser.add_argument('--kernel', action='append', choices=sorted(KERNELS), help='kernel to run (default: all)')
+    parser.add_argument('--teeth', type=int, action='append', help='tooth count to run (default: %s)' % ', '.join(map(str, TEETH)))
+    parser.add_argument('--rounds', type=int, default=ROUNDS, help='passes over the matrix, best time kept (default: %(default)s)')
+    parser.add_argument('--save', metavar='PATH', help='save the results as a baseline')
+    parser.add_argument('--compare', metavar='PATH', nargs='?', const=BASELINE, help='compare against a baseline (default: %(const)s)')
+    parser.add_argument('--threshold', type=float, default=0.2, help='slowdown that counts as a regression (default: %(default)s = 20%%)')
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.kernel or list(KERNELS), args.teeth or TEETH, args.rounds,
+                            log=None if args.compare else print)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    if baseline['environment'].get('machine') != platform.machine() or \
+       baseline['environment'].get('python') != platform.python_version():
+        print('note: baseline is from %(platform)s, python %(python)s' % baseline['environment'])
+
+    if 'calibration' in baseline['results'] and 'calibration' in results:
+        print('machine speed vs baseline: %.2fx, ratios below are scaled by it'
+              % (baseline['results']['calibration'] / results['calibration']))
+
+    regressions = 0
+    for key, before, after, ratio in compare(baseline['results'], results):
+        flag = ''
+        if ratio > 1 + args.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif ratio < 1 / (1 + args.threshold):
+            flag = '  faster'
+        print('%-32s %10.2f us %10.2f us %6.2fx%s' % (key, before * 1e6, after * 1e6, ratio, flag))
+    print('%d regression(s) over %d%%' % (regressions, round(args.threshold * 100)))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
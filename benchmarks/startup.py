@@ -0,0 +1,147 @@
+# Startup profile of the add-in: how long Gears.py takes to load, by the
+# modules it imports, how long run() takes to register the command, how long
+# the dialog takes to open, and what the first preview then loads on first
+# use (see gearlib.lazy).
+#
+#   python benchmarks/startup.py                          # headless
+#   python benchmarks/startup.py --log timings.jsonl      # summarize Fusion's timings
+#
+# Headless runs start a fresh Python for each round, so every import is cold,
+# and report the best of the rounds. They use the recording adsk stand-in in
+# headless/, which is imported before Gears.py and not counted. In Fusion the
+# add-in logs a commandStart record for each dialog; --log summarizes the cold
+# and warm starts in a timing log.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+_rootDir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+ROUNDS = 5
+
+# The stages of a cold start reported, in order.
+STAGES = ('import', 'register', 'dialog', 'preview')
+
+
+# One cold start, in this process: imports Gears.py, starts the add-in, which
+# opens the dialog and shows its first preview, and prints the times as JSON.
+def profileChild():
+    sys.path.insert(0, _rootDir)
+    sys.path.insert(0, os.path.join(_rootDir, 'headless'))
+    import adsk
+
+    start = time.perf_counter()
+    import Gears
+    importSeconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as folder:
+        Gears.TIMING_LOG = os.path.join(folder, 'timings.jsonl')
+        adsk.recorder.enabled = False
+        start = time.perf_counter()
+        Gears.run(None)
+        runSeconds = time.perf_counter() - start
+        with open(Gears.TIMING_LOG) as f:
+            record = [json.loads(line) for line in f if '"commandStart"' in line][0]
+
+    times = {'import': importSeconds, 'register': Gears._registerSeconds, 'dialog': record['dialogSeconds']}
+    times['preview'] = runSeconds - times['register'] - times['dialog']
+    json.dump({'times': times, 'dialogImports': record['lazyImports'], 'lazyImports': dict(Gears.loadTimes)}, sys.stdout)
+    return 0
+
+
+# Seconds by module for the modules Gears.py imports itself, from the
+# -X importtime report of a child.
+def gearsImports(report):
+    imports = {}
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            if name.strip() == 'Gears':
+                return imports
+            imports = {}
+        elif depth == 1:
+            imports[name.strip()] = int(cumulative) / 1e6
+    return imports
+
+
+# Runs one cold start in a fresh interpreter and returns its profile.
+def profileRound():
+    result = subprocess.run([sys.executable, '-X', 'importtime', os.path.realpath(__file__), '--child'],
+                            capture_output=True, text=True, check=True)
+    profile = json.loads(result.stdout)
+    profile['imports'] = gearsImports(result.stderr)
+    return profile
+
+
+# Best of several profiles, stage by stage and module by module.
+def bestOf(profiles):
+    best = {'times': {}, 'imports': {}, 'lazyImports': {}, 'dialogImports': {}}
+    for profile in profiles:
+        for part, values in best.items():
+            for name, seconds in profile[part].items():
+                values[name] = min(seconds, values.get(name, seconds))
+    return best
+
+
+# Cold and warm dialog starts in a timing log: count and mean seconds of
+# each, and the mean load and register seconds of the cold ones.
+def summarizeLog(path):
+    starts = {'cold': [], 'warm': []}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('name') == 'commandStart':
+                starts[record['start']].append(record)
+    summary = {}
+    for start, records in starts.items():
+        if records:
+            summary[start] = {key: sum(record[key] for record in records) / len(records)
+                              for key in ('seconds', 'loadSeconds', 'registerSeconds', 'dialogSeconds')
+                              if key in records[0]}
+            summary[start]['count'] = len(records)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile how long the add-in takes to show its dialog.')
+    parser.add_argument('--rounds', type=int, default=ROUNDS, help='cold starts to take the best of')
+    parser.add_argument('--log', metavar='PATH', help='summarize a timing log from Fusion instead')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return profileChild()
+
+    if args.log:
+        for start, summary in summarizeLog(args.log).items():
+            print('%-5s %4d dialogs  %8.1fms' % (start, summary['count'], summary['seconds'] * 1000) +
+                  ''.join('  %s %.1fms' % (key[:-len('Seconds')], summary[key] * 1000)
+                          for key in ('loadSeconds', 'registerSeconds', 'dialogSeconds') if key in summary))
+        return 0
+
+    profile = bestOf([profileRound() for round in range(args.rounds)])
+    times = profile['times']
+    print('%-10s %9s' % ('stage', 'ms'))
+    for stage in STAGES:
+        print('%-10s %9.2f' % (stage, times[stage] * 1000))
+    print('%-10s %9.2f' % ('to dialog', sum(times[stage] for stage in STAGES[:-1]) * 1000))
+
+    print('\nimported by Gears.py')
+    for name, seconds in sorted(profile['imports'].items(), key=lambda item: -item[1]):
+        print('  %-28s %9.2f' % (name, seconds * 1000))
+    print('\nloaded on first use%s' % (' (before the dialog!)' if profile['dialogImports'] else ''))
+    for name, seconds in sorted(profile['lazyImports'].items(), key=lambda item: -item[1]):
+        print('  %-28s %9.2f' % (name, seconds * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Headless gear geometry used by Gears.py. Nothing in this package imports adsk,
+# so it can be loaded and exercised outside of Fusion 360.
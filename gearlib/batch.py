@@ -0,0 +1,151 @@
+# Headless batch generation of bevel gear set geometry. Reads a table of gear
+# sets, computes the full cross section for every row in a process pool and
+# streams one JSON line per row as results finish.
+#
+#   python -m gearlib.batch gears.csv -o geometry.jsonl --workers 8
+#
+# The table is CSV (header row) or JSONL with the columns below. Lengths are
+# in mm and the pressure angle in degrees, like the command dialog. Only
+# module, numTeeth and numTeeth1 are required. The OPTIONAL columns are
+# passed through for the Fusion batch.
+
+import argparse
+import concurrent.futures
+import csv
+import json
+import math
+import os
+import sys
+
+from . import crosssection as crossSection
+from .spec import GearSpec
+
+
+COLUMNS = ['module', 'numTeeth', 'numTeeth1', 'pressureAngle', 'backlash', 'thickness', 'holeDiam', 'rootFilletRad']
+
+DEFAULTS = {
+    'pressureAngle': 20.0,
+    'backlash': 0.5,
+    'thickness': 10.0,
+    'holeDiam': 8.0,
+    'rootFilletRad': 0.0,
+}
+
+# Optional columns for building the table in Fusion, see drawGearSetBatch:
+# the number of differential pinions and the name of the gear train a row
+# is a stage of.
+OPTIONAL = {
+    'pinions': 0,
+    'train': '',
+}
+
+# Default chord tolerance for the involute samples, in mm.
+DEFAULT_TOLERANCE = 0.01
+
+
+# Reads gear set rows from a CSV or JSONL file (chosen by extension) and yields
+# dicts with every column filled in.
+def readTable(path):
+    with open(path, newline='') as f:
+        if os.path.splitext(path)[1].lower() in ('.jsonl', '.json'):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+
+        for row in rows:
+            gearSet = {}
+            for name in COLUMNS:
+                value = row.get(name)
+                if value is None or value == '':
+                    if name not in DEFAULTS:
+                        raise ValueError(f'missing column {name!r} in {row}')
+                    value = DEFAULTS[name]
+                gearSet[name] = int(value) if name in ('numTeeth', 'numTeeth1') else float(value)
+            for name, default in OPTIONAL.items():
+                value = row.get(name)
+                gearSet[name] = default if value is None or value == '' else type(default)(value)
+            yield gearSet
+
+
+# Builds the GearSpec for a table row, converting the table units to the
+# internal ones (cm, radians). tolerance is in mm.
+def tableSpec(gearSet, tolerance=DEFAULT_TOLERANCE):
+    return GearSpec(gearSet['module'], gearSet['numTeeth'], gearSet['numTeeth1'],
+                    gearSet['pressureAngle'] * (math.pi/180), gearSet['backlash'] / 10,
+                    gearSet['thickness'] / 10, gearSet['holeDiam'] / 10, tolerance / 10, gearSet['rootFilletRad'] / 10)
+
+
+# Formats an internal length (cm) in the table units, for the validation
+# messages of table rows.
+def formatMm(length):
+    return f'{length * 10:g} mm'
+
+
+# Computes the cross section of one table row and returns a JSON ready dict.
+def gearSetGeometry(index, gearSet, tolerance=DEFAULT_TOLERANCE):
+    result = {'index': index, 'input': gearSet}
+    try:
+        spec = tableSpec(gearSet, tolerance)
+        invalid = spec.inputError(formatMm)
+        if invalid:
+            result['invalid'] = invalid
+        result['geometry'] = crossSection.crossSectionToDict(spec.crossSection)
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+    return result
+
+
+# Calls function(*args) for every tuple in argsList in a process pool and
+# yields the results as they finish, not in order. At most a few batches per
+# worker are in flight so huge tables don't sit in memory as pending futures.
+# function must be picklable, i.e. defined at module level.
+def boundedMap(function, argsList, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for args in argsList:
+            yield function(*args)
+        return
+
+    maxPending = workers * 4
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for args in argsList:
+            pending.add(executor.submit(function, *args))
+            if len(pending) >= maxPending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in concurrent.futures.as_completed(pending):
+            yield future.result()
+
+
+# Yields geometry for every gear set as it finishes, not in table order.
+def generateGeometry(gearSets, workers=None, tolerance=DEFAULT_TOLERANCE):
+    args = ((index, gearSet, tolerance) for index, gearSet in enumerate(gearSets))
+    return boundedMap(gearSetGeometry, args, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gearlib.batch', description='Compute bevel gear set geometry for a table of gear sets.')
+    parser.add_argument('table', help='CSV or JSONL file of gear sets')
+    parser.add_argument('-o', '--output', help='JSONL file to write (default: stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='involute chord tolerance in mm')
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    failed = 0
+    try:
+        for result in generateGeometry(readTable(args.table), args.workers, args.tolerance):
+            if 'error' in result:
+                failed += 1
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
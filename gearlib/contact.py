@@ -0,0 +1,272 @@
+# Mesh analysis of a bevel gear set: contact ratio, unloaded transmission
+# error, backlash and tip clearance over a mesh cycle, computed from the same
+# tooth profiles drawToothProfile draws.
+#
+#   python -m gearlib.contact --module 2 --teeth 20 --teeth1 10
+#   python -m gearlib.contact gears.csv -o contact.csv --workers 8
+#
+# Following Tredgold, the set meshes like the two virtual spur gears of its
+# back cones: the tooth profiles with pitch radii R0 and R0', their centers
+# R0 + R0' apart. The wheel is turned through one tooth pitch in small steps
+# and, for every step at once, each wheel outline point is moved into the
+# pinion's frame and compared with the pinion flanks at the same radius. The
+# angular gap there is how far the pinion has to turn for the two to touch.
+#
+# The table is the same as for gearlib.batch, so gearlib.sweep output can be
+# passed straight in.
+
+import argparse
+import collections
+import csv
+import math
+import sys
+
+import numpy as np
+
+from . import batch, involute
+from .mesh import toothOutline
+
+
+# Default number of roll angles in a mesh cycle, points on each flank and
+# the gap (cm) under which a tooth pair counts as touching.
+ROLL_ANGLES = 1024
+FLANK_POINTS = 64
+CONTACT_TOLERANCE = 1e-4
+
+
+# rollAngles (N,) are the wheel angles in the back cone plane over one tooth
+# pitch. transmissionError, backlash and clearance are (N,) arrays in cm:
+# the pinion's lead or lag measured along its pitch circle, less the mean; the
+# play between the pinion and wheel teeth along the same circle; and the
+# smallest radial gap between a tooth tip and the other gear's root circle.
+# teethInContact (N,) counts the tooth pairs touching on the drive side.
+# contactRatio is the mean of teethInContact, theoreticalContactRatio the
+# textbook value for the virtual spur gears (the two differ, see
+# theoreticalContactRatio). interference is True when teeth overlap somewhere
+# in the cycle.
+ContactAnalysis = collections.namedtuple('ContactAnalysis', [
+    'rollAngles', 'transmissionError', 'backlash', 'clearance', 'teethInContact',
+    'contactRatio', 'theoreticalContactRatio', 'interference'])
+
+
+# Contact ratio of a pair of spur gears with pitch radii R0, R1, module and
+# pressure angle. Arguments may be arrays, e.g. columns of a sweep table,
+# with the back cone radii for a bevel set.
+#
+# The measured contactRatio of analyzeContact differs from it in two ways.
+# This formula runs the path of contact out to both tip circles, but the
+# involute ends at the base circle and the flank below it is a radial line,
+# so when a tip reaches past the other gear's interference point (the line of
+# action's tangency with its base circle, R sin(pressureAngle) from the pitch
+# point) the real path stops there: about 14% less for a 20/10 set at 20
+# degrees. And a tooth pair counts as in contact while its gap is within
+# contactTolerance, which the pair leaving contact keeps for a while, as the
+# gap opens with the square of the roll. That adds a few percent, more for
+# large virtual tooth counts, whose flanks are flatter, and for small modules:
+# about 8% for 200/50 at module 2 and 5% at module 5.
+def theoreticalContactRatio(R0, R1, module, pressureAngle):
+    R0, R1 = np.asarray(R0, dtype=float), np.asarray(R1, dtype=float)
+    cosAngle = np.cos(pressureAngle)
+    action = (np.sqrt((R0 + module)**2 - (R0 * cosAngle)**2) + np.sqrt((R1 + module)**2 - (R1 * cosAngle)**2)
+              - (R0 + R1) * np.sin(pressureAngle))
+    return action / (math.pi * module * cosAngle)
+
+
+# Half the angular thickness of a tooth at radii. The flanks are the
+# involutes the sampled flank1 of the profile lies on, which is what the
+# fitted splines in the sketch follow; below the first sample the flank is the
+# radial root line.
+def _halfThickness(toothProfile, radii):
+    start = toothProfile.flank1[0]
+    startRadius = math.hypot(*start)
+    baseRadius = toothProfile.baseCircleDia / 2
+    radii = np.maximum(radii, startRadius)
+    return (-math.atan2(start[1], start[0])
+            - (involute.involuteAngle(baseRadius, radii) - involute.involuteAngle(baseRadius, startRadius)))
+
+
+# Outline of a tooth like mesh.toothOutline, with flankPoints points on each
+# flank spaced evenly in radius.
+def _outline(toothProfile, flankPoints):
+    radii = np.linspace(math.hypot(*toothProfile.flank1[0]), toothProfile.outsideDia / 2, flankPoints)
+    angles = -_halfThickness(toothProfile, radii)
+    flank1 = np.stack((radii * np.cos(angles), radii * np.sin(angles)), axis=-1)
+    return toothOutline(toothProfile._replace(flank1=flank1, flank2=flank1 * (1.0, -1.0)))
+
+
+# Gaps between the outline points of one gear and the flanks of the other.
+# outline (P,2) is a tooth of the gear, teeth the tooth numbers to use,
+# angles (N,) the gear's rotation at each roll angle and otherAngles the other
+# gear's. Each gear's angles are measured from the line of centers, so the
+# same mapping works both ways. Angles are not wrapped at 2 pi, since the
+# virtual tooth counts are fractional. Returns (N, K, P) arrays: the distance
+# of every point from the other gear's center, the other gear's tooth below
+# it, and the angular gaps to the other gear's flanks below and above it, in
+# the other gear's angles (inf outside its tip circle).
+def _flankGaps(outline, teeth, pitch, angles, other, otherPitch, otherAngles, centerDistance):
+    # The points of every tooth, then turned by each roll angle with the sums
+    # of angles rather than a cos and sin per point.
+    turn = teeth[:, np.newaxis] * pitch
+    px = outline[:, 0] * np.cos(turn) - outline[:, 1] * np.sin(turn)
+    py = outline[:, 0] * np.sin(turn) + outline[:, 1] * np.cos(turn)
+    c = np.cos(angles)[:, np.newaxis, np.newaxis]
+    s = np.sin(angles)[:, np.newaxis, np.newaxis]
+    x = centerDistance - (px * c - py * s)
+    y = -(px * s + py * c)
+    r = np.hypot(x, y)
+
+    # Only points inside the other gear's tip circle can touch it, and they
+    # are a small part of the grid, so the rest is skipped.
+    inMesh = np.nonzero(r <= other.outsideDia / 2)
+    a = np.arctan2(y[inMesh], x[inMesh]) - otherAngles[inMesh[0]]
+
+    # The other gear's flanks as a table of half thicknesses evenly spaced in
+    # radius, interpolated by index: much quicker than np.interp's search.
+    radii, step = np.linspace(math.hypot(*other.flank1[0]), other.outsideDia / 2, 1024, retstep=True)
+    table = _halfThickness(other, radii)
+    u = np.clip((r[inMesh] - radii[0]) / step, 0, len(radii) - 1)
+    i = np.minimum(u.astype(int), len(radii) - 2)
+    halfSpace = otherPitch / 2 - (table[i] + (u - i) * (table[i + 1] - table[i]))
+
+    tooth = np.floor(a / otherPitch)
+    offset = a - (tooth + 0.5) * otherPitch
+    below = np.full(r.shape, np.inf)
+    above = np.full(r.shape, np.inf)
+    otherTooth = np.zeros(r.shape, dtype=int)
+    below[inMesh] = offset + halfSpace
+    above[inMesh] = halfSpace - offset
+    otherTooth[inMesh] = tooth
+    return r, otherTooth, below, above
+
+
+# Tooth numbers of a gear that come within the other gear's tip circle while
+# the gear turns through angles: the teeth with some point inside the angle
+# where the two tip circles cross.
+def _meshTeeth(outline, pitch, angles, tip, otherTip, centerDistance):
+    reach = math.acos(min(1.0, (tip**2 + centerDistance**2 - otherTip**2) / (2 * tip * centerDistance)))
+    reach += np.abs(np.arctan2(outline[:, 1], outline[:, 0])).max()
+    return np.arange(math.ceil((-reach - angles.max()) / pitch), math.floor((reach - angles.min()) / pitch) + 1)
+
+
+# Analyzes the GearSpec's gear set over rollAngles steps of one wheel tooth
+# pitch.
+def analyzeContact(spec, rollAngles=ROLL_ANGLES, flankPoints=FLANK_POINTS, contactTolerance=CONTACT_TOLERANCE):
+    cs = spec.crossSection
+    wheel, pinion = cs.wheel.profile, cs.pinion.profile
+    R0, R1 = wheel.pitchDia / 2, pinion.pitchDia / 2
+    centerDistance = R0 + R1
+    wheelPitch = 2 * math.pi / wheel.virtualTeeth
+    pinionPitch = 2 * math.pi / pinion.virtualTeeth
+
+    # The wheel turns through one tooth pitch. The pinion starts with a tooth
+    # space on the line of centers and rolls the other way.
+    theta = np.linspace(0.0, wheelPitch, rollAngles, endpoint=False)
+    phi = pinionPitch / 2 - theta * R0 / R1
+
+    # Wheel points against the pinion flanks and pinion points against the
+    # wheel flanks, so contact at either gear's tip is found. The lower gaps
+    # close when the pinion lags the wheel (drive side), the upper ones when
+    # it leads (coast side). Wheel angles are turned into pinion angles.
+    wheelOutline, pinionOutline = _outline(wheel, flankPoints), _outline(pinion, flankPoints)
+    wheelTip, pinionTip = wheel.outsideDia / 2, pinion.outsideDia / 2
+    wheelTeeth = _meshTeeth(wheelOutline, wheelPitch, theta, wheelTip, pinionTip, centerDistance)
+    pinionTeeth = _meshTeeth(pinionOutline, pinionPitch, phi, pinionTip, wheelTip, centerDistance)
+    wheelR, _, wheelDrive, wheelCoast = _flankGaps(
+        wheelOutline, wheelTeeth, wheelPitch, theta, pinion, pinionPitch, phi, centerDistance)
+    pinionR, pinionOn, pinionDrive, pinionCoast = _flankGaps(
+        pinionOutline, pinionTeeth, pinionPitch, phi, wheel, wheelPitch, theta, centerDistance)
+    pinionDrive = pinionDrive * (R0 / R1)
+    pinionCoast = pinionCoast * (R0 / R1)
+
+    # A wheel tooth is in contact when its drive side gap, seen from either
+    # gear, is within contactTolerance of the smallest.
+    driveGap = np.minimum(wheelDrive.min(axis=(1, 2)), pinionDrive.min(axis=(1, 2)))
+    coastGap = np.minimum(wheelCoast.min(axis=(1, 2)), pinionCoast.min(axis=(1, 2)))
+    limit = (driveGap + contactTolerance / R1)[:, np.newaxis]
+    touching = wheelDrive.min(axis=2) <= limit
+    near = pinionDrive <= limit[:, :, np.newaxis]
+    column = pinionOn[near] - wheelTeeth[0]
+    inRange = (column >= 0) & (column < len(wheelTeeth))
+    touching[np.nonzero(near)[0][inRange], column[inRange]] = True
+    teethInContact = np.count_nonzero(touching, axis=1)
+
+    # Tip clearance: wheel tips to the pinion root circle and pinion tips to
+    # the wheel root circle.
+    clearance = np.minimum(wheelR.min(axis=(1, 2)) - pinion.rootDia / 2, pinionR.min(axis=(1, 2)) - wheel.rootDia / 2)
+
+    backlash = (driveGap + coastGap) * R1
+    return ContactAnalysis(
+        theta, (driveGap - driveGap.mean()) * R1, backlash, clearance, teethInContact,
+        float(teethInContact.mean()), float(theoreticalContactRatio(R0, R1, spec.moduleCm, spec.pressureAngle)),
+        bool(backlash.min() < 0 or clearance.min() < 0))
+
+
+# Summary of analyzeContact for one table row as a JSON ready dict, lengths in
+# mm, like gearlib.batch results.
+def gearSetContact(index, gearSet, tolerance=batch.DEFAULT_TOLERANCE, rollAngles=ROLL_ANGLES):
+    result = {'index': index, 'input': gearSet}
+    try:
+        spec = batch.tableSpec(gearSet, tolerance)
+        invalid = spec.inputError()
+        if invalid:
+            result['invalid'] = invalid
+        analysis = analyzeContact(spec, rollAngles)
+        result.update({
+            'contactRatio': analysis.contactRatio,
+            'theoreticalContactRatio': analysis.theoreticalContactRatio,
+            'transmissionError': float(np.ptp(analysis.transmissionError) * 10),
+            'minBacklash': float(analysis.backlash.min() * 10),
+            'maxBacklash': float(analysis.backlash.max() * 10),
+            'minClearance': float(analysis.clearance.min() * 10),
+            'interference': analysis.interference,
+        })
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+    return result
+
+
+SUMMARY = ['contactRatio', 'theoreticalContactRatio', 'transmissionError', 'minBacklash', 'maxBacklash',
+           'minClearance', 'interference']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gearlib.contact', description='Analyze how bevel gear sets mesh.')
+    parser.add_argument('table', nargs='?', help='CSV or JSONL file of gear sets (default: the one set given by the options)')
+    parser.add_argument('-o', '--output', help='CSV file to write (default: stdout)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--module', type=float, default=2.0, help='module in mm')
+    parser.add_argument('--teeth', type=int, default=20, help='wheel teeth')
+    parser.add_argument('--teeth1', type=int, default=10, help='pinion teeth')
+    parser.add_argument('--pressure-angle', type=float, default=batch.DEFAULTS['pressureAngle'], help='degrees')
+    parser.add_argument('--backlash', type=float, default=batch.DEFAULTS['backlash'], help='mm')
+    parser.add_argument('--tolerance', type=float, default=batch.DEFAULT_TOLERANCE, help='involute chord tolerance in mm')
+    parser.add_argument('--roll-angles', type=int, default=ROLL_ANGLES, help='steps in a mesh cycle')
+    args = parser.parse_args(argv)
+
+    if args.table:
+        gearSets = batch.readTable(args.table)
+    else:
+        gearSets = [dict(batch.DEFAULTS, module=args.module, numTeeth=args.teeth, numTeeth1=args.teeth1,
+                         pressureAngle=args.pressure_angle, backlash=args.backlash)]
+    rows = ((index, gearSet, args.tolerance, args.roll_angles) for index, gearSet in enumerate(gearSets))
+
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    failed = 0
+    try:
+        writer = csv.writer(out)
+        writer.writerow(['index'] + batch.COLUMNS + SUMMARY)
+        for result in batch.boundedMap(gearSetContact, rows, 1 if not args.table else args.workers):
+            if 'error' in result:
+                failed += 1
+                print('%d: %s' % (result['index'], result['error']), file=sys.stderr)
+                continue
+            writer.writerow([result['index']] + [result['input'][name] for name in batch.COLUMNS]
+                            + [result[name] for name in SUMMARY])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# Cross section geometry of a bevel gear set, the same points and angles
+# drawGearSet lays out in its cross section sketch but without any Fusion
+# objects. Points are (x, y) tuples in sketch coordinates (cm).
+
+import collections
+import math
+
+from . import profile as gearProfile
+
+
+# Geometry for one gear of the set. backApex/backAngle define the back cone
+# plane the tooth profile is drawn on, coneA/coneB are the root cone points
+# projected from the tooth profile, face is where the cone slant is split at
+# the face width and axisSplit is the matching point on the gear's axis.
+GearSide = collections.namedtuple('GearSide', [
+    'numTeeth', 'ratio', 'backConeHeight', 'backApex', 'backAngle', 'profile',
+    'coneA', 'coneB', 'face', 'axisSplit'])
+
+CrossSection = collections.namedtuple('CrossSection', [
+    'module', 'pitchDia', 'pitchDia1', 'dedendum', 'rootDia', 'baseCircleDia', 'outsideDia',
+    'thickness', 'holeDiam', 'coneCenter', 'pitchTangent', 'pinionCenter', 'wheelCenter',
+    'wheel', 'pinion'])
+
+
+# Point distance along the line from start towards end.
+def splitPointAt(start, end, distance):
+    length = math.hypot(end[0] - start[0], end[1] - start[1])
+    return (start[0] + distance * (end[0] - start[0]) / length,
+            start[1] + distance * (end[1] - start[1]) / length)
+
+
+# Back cone of one gear: the height of its apex above the pitch circle and
+# the angle of the tooth profile plane. ratio is this gear's teeth over the
+# other gear's.
+def backCone(module, numTeeth, ratio, pitchDia):
+    backConeHeight = module * numTeeth * ratio /2
+    backAngle = math.atan(pitchDia / (backConeHeight*2))
+    return backConeHeight, backAngle
+
+
+# Projects the root point of the tooth profile onto the cross section for the
+# root cone. Returns (a, b), the root cone's height along the gear axis and its
+# radius there.
+def rootConeProjection(backConeHeight, backAngle, pitchDia, rootPoint):
+    a = backConeHeight-rootPoint[0]*math.cos(backAngle)
+    b = pitchDia/2 - a*math.tan(backAngle)
+    b = math.sqrt(b*b+rootPoint[1]*rootPoint[1])
+    return a, b
+
+
+# Tooth profile of the gear of a GearSpec with numTeeth, meshing with one
+# whose teeth make the given ratio (this gear's teeth over the other's).
+def sideToothProfile(spec, numTeeth, ratio):
+    return gearProfile.toothProfile(spec.moduleCm, numTeeth, spec.pressureAngle, spec.backlash, ratio, spec.dedendum,
+                                    spec.profileTolerance, spec.rootFilletRad)
+
+
+# Computes the cross section for a GearSpec.
+def computeCrossSection(spec):
+    module = spec.moduleCm
+    numTeeth = spec.numTeeth
+    numTeeth1 = spec.numTeeth1
+    thickness = spec.thickness
+    pitchDia = spec.pitchDia
+    pitchDia1 = spec.pitchDia1
+
+    # A rectangle defining the gears geometry based on their ratio
+    coneCenter = (0.0, -pitchDia1/2)
+    pitchTangent = (pitchDia/2, 0.0)
+    pinionCenter = (pitchDia/2, -pitchDia1/2)
+    wheelCenter = (0.0, 0.0)
+
+    ##### Wheel, using the gear's back cone for the tooth profile plane
+    ratio = numTeeth/numTeeth1
+    backConeHeight, backAngle = backCone(module, numTeeth, ratio, pitchDia)
+
+    # actually extended by 2x so plane's origin on z-axis
+    backApex = (-pitchDia/2, backConeHeight*2)
+    wheelProfile = sideToothProfile(spec, numTeeth, ratio)
+
+    # Project points from the tooth profile for the root cone
+    a, b = rootConeProjection(backConeHeight, backAngle, pitchDia, wheelProfile.profilePoint)
+    wheelConeA = (0.0, a)
+    wheelConeB = (b, a)
+    wheelFace = splitPointAt(wheelConeB, coneCenter, thickness)
+    wheel = GearSide(numTeeth, ratio, backConeHeight, backApex, backAngle, wheelProfile,
+                     wheelConeA, wheelConeB, wheelFace, (0.0, wheelFace[1]))
+
+    ##### Pinion, with the back cone plane at an angle based on gear ratio
+    ratio = numTeeth1/numTeeth
+    backConeHeight, backAngle = backCone(module, numTeeth1, ratio, pitchDia1)
+
+    # actually extended by 2x so plane origin's on z-axis
+    backApex = (pitchDia/2+backConeHeight*2, -pitchDia1)
+    pinionProfile = sideToothProfile(spec, numTeeth1, ratio)
+
+    a, b = rootConeProjection(backConeHeight, backAngle, pitchDia1, pinionProfile.profilePoint)
+    pinionConeA = (pitchDia/2+a, -pitchDia1/2)
+    pinionConeB = (pitchDia/2+a, b-pitchDia1/2)
+    pinionFace = splitPointAt(pinionConeB, coneCenter, thickness)
+    pinion = GearSide(numTeeth1, ratio, backConeHeight, backApex, backAngle, pinionProfile,
+                      pinionConeA, pinionConeB, pinionFace, (pinionFace[0], pinionCenter[1]))
+
+    return CrossSection(module, pitchDia, pitchDia1, spec.dedendum, spec.rootDia, spec.baseCircleDia, spec.outsideDia,
+                        thickness, spec.holeDiam, coneCenter, pitchTangent, pinionCenter, wheelCenter,
+                        wheel, pinion)
+
+
+# Plain dict/list version of a cross section for writing out as JSON.
+def crossSectionToDict(crossSection):
+    def convert(value):
+        if hasattr(value, '_asdict'):
+            return {k: convert(v) for k, v in value._asdict().items()}
+        if hasattr(value, 'tolist'):
+            return value.tolist()
+        if isinstance(value, tuple):
+            return [convert(v) for v in value]
+        return value
+    return convert(crossSection)
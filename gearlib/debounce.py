@@ -0,0 +1,39 @@
+# Debounces bursts of events. trigger() is called on every event; callback
+# runs once, on a timer thread, after delay seconds without another trigger.
+
+import threading
+import time
+
+
+class Debouncer:
+    def __init__(self, delay, callback, clock=time.monotonic):
+        self.delay = delay
+        self.callback = callback
+        self.clock = clock
+        self._last = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def trigger(self):
+        with self._lock:
+            self._last = self.clock()
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    # True when no event has arrived within the last delay seconds.
+    def isSettled(self):
+        return self._last is None or self.clock() - self._last >= self.delay
+
+    def cancel(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+        self.callback()
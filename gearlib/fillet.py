@@ -0,0 +1,148 @@
+# Trochoidal root fillet of a tooth profile. The virtual spur gear of the back
+# cone is cut by a rack whose teeth have their tip corners rounded to the
+# fillet radius. The center of that rounding traces a trochoid as the gear
+# rolls along the rack, and the fillet is the trochoid offset by the radius:
+# for the rack tip rounding centered (u, v) from the pitch line, rolled by
+# phi, the fillet point is
+#
+#   Rot(phi) . ((a, r - v) + radius * (a, -v) / |(a, v)|),   a = u + r*phi
+#
+# with r the pitch radius. It runs from the root circle, where a = 0, up to
+# the point cut by the end of the rounding, where the straight rack flank
+# starts cutting the involute, tangent to it. If the rounding reaches below
+# the interference point the fillet cuts into the involute instead (undercut)
+# and the two meet at a corner where they cross.
+#
+# Points are in the tooth profile's frame, with flank1's involute turned by
+# rotateAngle, see profile.computeToothProfile. Lengths are in cm.
+
+import collections
+import math
+
+import numpy as np
+
+from . import involute
+
+
+# points is an (N,2) array from the root circle up to where the fillet meets
+# the involute, at formRadius, and dense the same stretch of fillet sampled
+# finely, for measuring curves against. undercut tells if it meets the
+# involute at a corner.
+RootFillet = collections.namedtuple('RootFillet', ['points', 'dense', 'formRadius', 'undercut'])
+
+# Fillet points sampled to look for where it crosses the involute and to
+# measure how far the points drawn are from it.
+DENSE_SAMPLES = 256
+
+
+# Half the tooth space on the pitch line: half the circular pitch, less half
+# the tooth thickness, which the backlash thins by backlash/4 on each side.
+def _halfSpace(module, backlash):
+    return math.pi * module / 4 + backlash / 4
+
+
+# The largest root fillet radius for a module, pressure angle, dedendum and
+# backlash: the radius at which the roundings of the two rack tip corners
+# meet in the middle of the tooth space. It never exceeds the dedendum.
+def maxFilletRadius(module, pressureAngle, dedendum, backlash):
+    room = _halfSpace(module, backlash) - dedendum * math.tan(pressureAngle)
+    return max(0.0, min(room * math.cos(pressureAngle) / (1 - math.sin(pressureAngle)), dedendum))
+
+
+# Distance from each of points (K,2) to the polyline (M,2).
+def polylineDistance(points, polyline):
+    starts = polyline[:-1][np.newaxis]
+    segments = (polyline[1:] - polyline[:-1])[np.newaxis]
+    offsets = points[:, np.newaxis] - starts
+    lengths = np.maximum((segments * segments).sum(axis=-1), 1e-300)
+    t = np.clip((offsets * segments).sum(axis=-1) / lengths, 0.0, 1.0)
+    nearest = offsets - t[..., np.newaxis] * segments
+    return np.sqrt((nearest * nearest).sum(axis=-1)).min(axis=1)
+
+
+class _Trochoid:
+    '''
+    The fillet of one tooth flank as a function of the roll angle, in the
+    profile frame.
+    '''
+    def __init__(self, module, pitchRadius, pressureAngle, dedendum, backlash, radius, rotateAngle):
+        self.pitchRadius = pitchRadius
+        self.radius = radius
+        self.v = dedendum - radius
+        halfSpace = _halfSpace(module, backlash)
+        self.u = -(halfSpace - self.v * math.tan(pressureAngle) - radius / math.cos(pressureAngle))
+
+        # The rack flank cuts the pitch point at roll angle halfSpace/r, which
+        # puts it at angle pi/2 + halfSpace/r before turning to the profile's
+        # flank1, whose pitch point is at rotateAngle + inv(pressureAngle).
+        baseRadius = pitchRadius * math.cos(pressureAngle)
+        pitchAngle = rotateAngle + float(involute.involuteAngle(baseRadius, pitchRadius))
+        self.turn = pitchAngle - (math.pi / 2 + halfSpace / pitchRadius)
+
+        # From the root circle to the end of the rounding.
+        self.rootRoll = -self.u / pitchRadius
+        self.formRoll = (-self.v / math.tan(pressureAngle) - self.u) / pitchRadius
+
+        # Undercut when the end of the rounding is deeper than the
+        # interference point, r sin^2(pressureAngle) below the pitch line.
+        self.undercut = self.v + radius * math.sin(pressureAngle) > pitchRadius * math.sin(pressureAngle) ** 2
+
+    def points(self, rolls):
+        r, v = self.pitchRadius, self.v
+        a = self.u + r * rolls
+        length = np.hypot(a, v)
+        x = a + self.radius * a / length
+        y = (r - v) - self.radius * v / length
+        angle = rolls + self.turn
+        c, s = np.cos(angle), np.sin(angle)
+        return np.stack((x * c - y * s, x * s + y * c), axis=-1)
+
+
+# Roll angle where the undercutting fillet last crosses the involute of
+# baseRadius turned by rotateAngle, going up from the root.
+def _crossingRoll(trochoid, baseRadius, rotateAngle):
+    rolls = np.linspace(trochoid.rootRoll, trochoid.formRoll, DENSE_SAMPLES)
+    points = trochoid.points(rolls)
+    radii = np.hypot(points[:, 0], points[:, 1])
+    gap = np.arctan2(points[:, 1], points[:, 0]) - rotateAngle - involute.involuteAngle(baseRadius, np.maximum(radii, baseRadius))
+    gap[radii < baseRadius] = np.inf
+    inside = np.flatnonzero(gap > 0)
+    if len(inside) == 0 or inside[-1] == len(rolls) - 1:
+        return trochoid.formRoll
+    k = inside[-1]
+    g0, g1 = min(gap[k], 1.0), gap[k + 1]
+    return rolls[k] + (rolls[k + 1] - rolls[k]) * g0 / (g0 - g1)
+
+
+# Picks roll angles between start and end so a spline fitted through the
+# fillet points stays within tolerance of the dense fillet, splitting spans
+# that are out of tolerance like involute.adaptiveInvoluteRadii.
+# The roll angle can run either way, so spans are split as fractions of the
+# way from start to end.
+def _adaptiveRolls(trochoid, dense, start, end, tolerance, minPoints=4, maxPoints=40):
+    fractions = np.linspace(0.0, 1.0, minPoints)
+    while True:
+        rolls = start + (end - start) * fractions
+        samples = involute.fittedSplineSamples(trochoid.points(rolls))
+        deviation = polylineDistance(samples.reshape(-1, 2), dense).reshape(samples.shape[:2]).max(axis=1)
+        tooFar = np.flatnonzero(deviation > tolerance)
+        room = maxPoints - len(rolls)
+        if len(tooFar) == 0 or room <= 0:
+            return rolls
+        tooFar = tooFar[np.argsort(deviation[tooFar])[::-1][:room]]
+        fractions = np.sort(np.concatenate((fractions, (fractions[tooFar] + fractions[tooFar + 1]) / 2)))
+
+
+# The root fillet of flank1 for a fillet radius, sampled within tolerance.
+# module, pitchRadius and dedendum are the virtual spur gear's, see
+# profile.tredgold.
+def rootFillet(module, pitchRadius, pressureAngle, dedendum, backlash, radius, rotateAngle, tolerance):
+    trochoid = _Trochoid(module, pitchRadius, pressureAngle, dedendum, backlash, radius, rotateAngle)
+    end = trochoid.formRoll
+    if trochoid.undercut:
+        end = _crossingRoll(trochoid, pitchRadius * math.cos(pressureAngle), rotateAngle)
+    dense = trochoid.points(np.linspace(trochoid.rootRoll, end, DENSE_SAMPLES))
+    points = trochoid.points(_adaptiveRolls(trochoid, dense, trochoid.rootRoll, end, tolerance))
+    for array in (points, dense):
+        array.flags.writeable = False
+    return RootFillet(points, dense, float(np.hypot(*points[-1])), trochoid.undercut)
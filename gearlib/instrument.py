@@ -0,0 +1,121 @@
+# Per stage timing for gear generation. A StageTimer is started once per
+# generation and begin() marks the start of each named stage, which also ends
+# the previous one. An optional counter callable reports how many features and
+# bodies exist, so each stage records how many it created.
+
+import json
+import os
+import time
+
+
+class StageTimer:
+    def __init__(self, name, counter=None, clock=time.perf_counter):
+        self.name = name
+        self.counter = counter
+        self.clock = clock
+        self.stages = []
+        self.info = {}
+        self.total = None
+        self._start = clock()
+        self._current = None
+
+    def _counts(self):
+        if not self.counter:
+            return {}
+        try:
+            return dict(self.counter())
+        except Exception:
+            return {}
+
+    # Ends the current stage (if any) and starts a new one called name.
+    def begin(self, name):
+        self._end()
+        self._current = (name, self.clock(), self._counts())
+
+    def _end(self):
+        if not self._current:
+            return
+        name, start, before = self._current
+        stage = {'name': name, 'seconds': self.clock() - start}
+        after = self._counts()
+        for key, value in after.items():
+            stage[key] = value - before.get(key, 0)
+        self.stages.append(stage)
+        self._current = None
+
+    # Ends the last stage and returns the record for this generation.
+    def finish(self):
+        self._end()
+        if self.total is None:
+            self.total = self.clock() - self._start
+        return self.record()
+
+    def elapsed(self):
+        return self.total if self.total is not None else self.clock() - self._start
+
+    def record(self):
+        record = {'name': self.name, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  'total': self.elapsed()}
+        record.update(self.info)
+        record['stages'] = self.stages
+        return record
+
+    # Short human readable summary, e.g. for a component attribute.
+    def summary(self):
+        parts = ['%s %.3fs' % (stage['name'], stage['seconds']) for stage in self.stages]
+        return 'total %.3fs; ' % self.elapsed() + '; '.join(parts)
+
+
+# Dialog start times over one add-in session. The first dialog is a cold
+# start, which also pays for loading the add-in (loadSeconds) and registering
+# its command (registerSeconds); the add-in stays loaded between dialogs, so
+# the later ones are warm.
+class StartupTimer:
+    def __init__(self, loadSeconds=0.0, registerSeconds=0.0):
+        self.loadSeconds = loadSeconds
+        self.registerSeconds = registerSeconds
+        self.cold = None
+        self.warm = []
+
+    @property
+    def invocations(self):
+        return len(self.warm) + (self.cold is not None)
+
+    # Records a dialog that took seconds to open and returns its record, with
+    # any info added.
+    def record(self, seconds, **info):
+        record = {'name': 'commandStart', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  'invocation': self.invocations + 1, 'dialogSeconds': seconds}
+        if self.cold is None:
+            self.cold = self.loadSeconds + self.registerSeconds + seconds
+            record.update(start='cold', seconds=self.cold, loadSeconds=self.loadSeconds,
+                          registerSeconds=self.registerSeconds)
+        else:
+            self.warm.append(seconds)
+            record.update(start='warm', seconds=seconds)
+        record.update(info)
+        return record
+
+    def summary(self):
+        if self.cold is None:
+            return 'no dialogs opened'
+        summary = 'cold start %.3fs (load %.3fs, register %.3fs)' % (self.cold, self.loadSeconds, self.registerSeconds)
+        if self.warm:
+            summary += ', warm start %.3fs mean over %d' % (sum(self.warm) / len(self.warm), len(self.warm))
+        return summary
+
+
+# Appends one JSON line to path, creating its folder if needed. Logging must
+# never break generation, so errors are swallowed and False is returned.
+def writeRecord(path, record):
+    if not path:
+        return False
+    try:
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        return True
+    except (OSError, TypeError, ValueError):
+        return False
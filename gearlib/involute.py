@@ -0,0 +1,108 @@
+# Vectorized involute kernel. Works on NumPy arrays of radii so a whole flank
+# (or a whole batch of flanks) is computed in one call instead of one point at
+# a time. Points stay as (N,2) arrays until they reach the sketch.
+
+import collections
+
+import numpy as np
+
+
+# Result of adaptiveInvoluteRadii: the sample radii, how many there are and the
+# largest distance between the fitted spline and the true involute.
+InvoluteSampling = collections.namedtuple('InvoluteSampling', ['radii', 'pointCount', 'maxDeviation'])
+
+
+# Polar angle of the involute of a circle with radius baseRadius at the given
+# radii (the involute function inv(phi) = tan(phi) - phi).
+def involuteAngle(baseRadius, radii):
+    baseRadius = np.asarray(baseRadius, dtype=float)
+    radii = np.asarray(radii, dtype=float)
+    ratio = np.clip(baseRadius / radii, -1.0, 1.0)
+    return np.sqrt(np.maximum(radii * radii - baseRadius * baseRadius, 0.0)) / baseRadius - np.arccos(ratio)
+
+
+# Calculate points along the involute curve as an (..., N, 2) array. The last
+# axis of radii holds the sample radii, baseRadius broadcasts against the other
+# axes.
+def involutePoints(baseRadius, radii):
+    baseRadius = np.asarray(baseRadius, dtype=float)[..., np.newaxis]
+    radii = np.asarray(radii, dtype=float)
+    theta = involuteAngle(baseRadius, radii)
+    return np.stack((radii * np.cos(theta), radii * np.sin(theta)), axis=-1)
+
+
+# Both flanks of a tooth. The involute is rotated by rotateAngle so the middle
+# of the tooth lies on the x axis and then mirrored about the x axis for the
+# second flank. radii has shape (..., N), baseRadius and rotateAngle broadcast
+# against the leading axes. Returns (flank1, flank2), each (..., N, 2).
+def involuteFlanks(radii, baseRadius, rotateAngle):
+    points = involutePoints(baseRadius, radii)
+    rotateAngle = np.asarray(rotateAngle, dtype=float)[..., np.newaxis]
+    cosAngle = np.cos(rotateAngle)
+    sinAngle = np.sin(rotateAngle)
+    x = points[..., 0]
+    y = points[..., 1]
+    flank1 = np.stack((x * cosAngle - y * sinAngle, x * sinAngle + y * cosAngle), axis=-1)
+    flank2 = flank1 * np.array((1.0, -1.0))
+    return flank1, flank2
+
+
+# Evaluates a natural cubic spline through points (N,2) with chord length
+# parameterization, which is a close stand in for what sketchFittedSplines
+# builds. Returns samplesPerSpan points inside each span as (N-1, samplesPerSpan, 2).
+def fittedSplineSamples(points, samplesPerSpan=8):
+    points = np.asarray(points, dtype=float)
+    count = len(points)
+    h = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    slopes = np.diff(points, axis=0) / h[:, np.newaxis]
+
+    # Solve for the second derivatives, which are zero at both ends.
+    secondDerivs = np.zeros_like(points)
+    if count > 2:
+        matrix = np.zeros((count - 2, count - 2))
+        index = np.arange(count - 2)
+        matrix[index, index] = 2 * (h[:-1] + h[1:])
+        matrix[index[1:], index[:-1]] = h[1:-1]
+        matrix[index[:-1], index[1:]] = h[1:-1]
+        secondDerivs[1:-1] = np.linalg.solve(matrix, 6 * np.diff(slopes, axis=0))
+
+    s = (np.arange(1, samplesPerSpan + 1) / (samplesPerSpan + 1))[np.newaxis, :, np.newaxis]
+    h = h[:, np.newaxis, np.newaxis]
+    p0 = points[:-1, np.newaxis, :]
+    p1 = points[1:, np.newaxis, :]
+    m0 = secondDerivs[:-1, np.newaxis, :]
+    m1 = secondDerivs[1:, np.newaxis, :]
+    return (1 - s) * p0 + s * p1 + h * h / 6 * (((1 - s) ** 3 - (1 - s)) * m0 + (s ** 3 - s) * m1)
+
+
+# Largest deviation of the fitted spline from the true involute in each span.
+# Spline samples are compared to the involute point at the same radius, which
+# never underestimates the normal distance between the curves.
+def splineDeviation(baseRadius, points, samplesPerSpan=8):
+    samples = fittedSplineSamples(points, samplesPerSpan)
+    radii = np.hypot(samples[..., 0], samples[..., 1])
+    angle = np.arctan2(samples[..., 1], samples[..., 0])
+    trueAngle = involuteAngle(baseRadius, np.maximum(radii, baseRadius))
+    return (radii * np.abs(angle - trueAngle)).max(axis=1)
+
+
+# Picks the radii to sample the involute between innerRadius and outerRadius
+# so the fitted spline stays within tolerance of the true curve. Spans that
+# are out of tolerance are split at their midpoint until every span passes or
+# maxPoints is reached. Radii inside the base circle are skipped.
+def adaptiveInvoluteRadii(baseRadius, innerRadius, outerRadius, tolerance, minPoints=4, maxPoints=100):
+    radii = np.linspace(max(innerRadius, baseRadius), outerRadius, minPoints)
+    while True:
+        deviation = splineDeviation(baseRadius, involutePoints(baseRadius, radii))
+        tooFar = deviation > tolerance
+        room = maxPoints - len(radii)
+        if not tooFar.any() or room <= 0:
+            break
+
+        # Split the worst spans first when there isn't room to split them all.
+        spans = np.flatnonzero(tooFar)
+        spans = spans[np.argsort(deviation[spans])[::-1][:room]]
+        midRadii = (radii[spans] + radii[spans + 1]) / 2
+        radii = np.sort(np.concatenate((radii, midRadii)))
+
+    return InvoluteSampling(radii, len(radii), float(deviation.max()))
@@ -0,0 +1,32 @@
+# Modules imported on first use instead of when Gears.py loads, so the command
+# dialog can come up before NumPy and the geometry code are loaded. Each
+# import is timed, and loadTimes holds the seconds by module name for the
+# startup profile.
+
+import importlib
+import time
+
+loadTimes = {}
+
+
+class LazyModule:
+    '''
+    Stands in for a module until one of its attributes is used, and then
+    imports it. name and package are as for importlib.import_module.
+    '''
+    def __init__(self, name, package=None):
+        self._name = name
+        self._package = package
+        self._module = None
+
+    @property
+    def isLoaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self._name, self._package)
+            loadTimes[module.__name__] = time.perf_counter() - start
+            self._module = module
+        return getattr(self._module, attribute)
@@ -0,0 +1,232 @@
+# Triangle meshes of a bevel gear set, built straight from the gear math
+# without Fusion, and written out as binary STL.
+#
+#   python -m gearlib.mesh gears.csv -o stl/ --workers 8
+#
+# The table is the same as for gearlib.batch. Every row gives two files,
+# <row>-wheel.stl and <row>-pinion.stl, in mm.
+#
+# Each gear uses the same Tredgold tooth profile as drawToothProfile, drawn
+# on the back cone and scaled towards the cone apex like the loft in
+# drawGearSet. The teeth run from the back cone to the face width given by
+# thickness. The back and front of the gear are flat at the root of the teeth,
+# like the root cone in drawGearSet, and the shaft bore is a cylinder.
+# Triangles are generated one tooth at a time and streamed to the file, so
+# memory use doesn't grow with the tooth count or tessellation.
+
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+from . import batch
+from .stl import StlWriter
+
+
+# Default number of segments for the tip arc and the root between two teeth,
+# and for the teeth along the face width.
+TIP_SEGMENTS = 4
+ROOT_SEGMENTS = 4
+FACE_SEGMENTS = 1
+
+
+# Outline of one tooth on its back cone plane as an (N,2) array, from the
+# root on the flank1 side, around the tip, to the root on the flank2 side.
+# Coordinates are the profile's: x from the back cone apex, y across the tooth.
+def toothOutline(profile, tipSegments=TIP_SEGMENTS):
+    flank1, flank2 = profile.flank1, profile.flank2
+    tipRadius = math.hypot(*flank1[-1])
+    angle1 = math.atan2(flank1[-1, 1], flank1[-1, 0])
+    angle2 = math.atan2(flank2[-1, 1], flank2[-1, 0])
+    angles = np.linspace(angle1, angle2, tipSegments + 1)[1:-1]
+    tip = tipRadius * np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+
+    parts = [flank1, tip, flank2[::-1]]
+    if profile.fillet is not None:
+        fillet = profile.fillet.points[:-1]
+        parts = [fillet] + parts + [fillet[::-1] * (1.0, -1.0)]
+    elif profile.rootPoints is not None:
+        parts = [np.array([profile.rootPoints[0]])] + parts + [np.array([profile.rootPoints[1]])]
+    return np.concatenate(parts)
+
+
+# The back cone plane of the tooth on the x axis, as the 3D position of the
+# back cone apex and the unit vectors of the profile's x and y axes. The gear
+# axis is z and the pitch cone apex is at the origin, teeth pointing up.
+def backConeFrame(pitchRadius, coneAngle):
+    coneDistance = pitchRadius / math.sin(coneAngle)
+    backConeDistance = pitchRadius / math.cos(coneAngle)
+    apex = np.array((0.0, 0.0, -coneDistance * math.cos(coneAngle) - backConeDistance * math.sin(coneAngle)))
+    xAxis = np.array((math.cos(coneAngle), 0.0, math.sin(coneAngle)))
+    yAxis = np.array((0.0, 1.0, 0.0))
+    return apex, xAxis, yAxis
+
+
+def _rotation(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array(((c, -s, 0.0), (s, c, 0.0), (0.0, 0.0, 1.0)))
+
+
+# Splits quads (a0, a1, b1, b0) between two rows of points into triangles.
+# a and b are (N,3); the triangles face the way a0 -> a1 -> b1 turns.
+def _strip(a, b):
+    first = np.stack((a[:-1], a[1:], b[1:]), axis=1)
+    second = np.stack((a[:-1], b[1:], b[:-1]), axis=1)
+    return np.concatenate((first, second))
+
+
+# Triangles between a row of points and a single point.
+def _fan(a, point):
+    return np.stack((a[:-1], a[1:], np.broadcast_to(point, a[:-1].shape)), axis=1)
+
+
+class GearMesh:
+    '''
+    Mesh of one gear of a set, in cm. side is the GearSide from the cross
+    section and pitchRadius its pitch radius. The gear axis is z with the flat
+    back at z = 0.
+    '''
+    def __init__(self, side, pitchRadius, thickness, holeDiam,
+                 tipSegments=TIP_SEGMENTS, rootSegments=ROOT_SEGMENTS, faceSegments=FACE_SEGMENTS):
+        self.numTeeth = side.numTeeth
+        self.coneAngle = math.atan(side.ratio)
+        self.faceSegments = max(1, int(faceSegments))
+        self.holeRadius = holeDiam / 2
+
+        coneDistance = pitchRadius / math.sin(self.coneAngle)
+        if thickness >= coneDistance:
+            raise ValueError('the gear thickness must be less than the cone distance %.4g' % coneDistance)
+        self.innerScale = 1 - thickness / coneDistance
+
+        # The first tooth on its back cone, then along the root to where the
+        # next tooth starts. base is the same outline slid down the back cone
+        # to the root, where the back of the gear is flat.
+        apex, xAxis, yAxis = backConeFrame(pitchRadius, self.coneAngle)
+        outline = toothOutline(side.profile, tipSegments)
+        rootX = outline[:, 0].min()
+        self.backZ = apex[2] + rootX * xAxis[2]
+        tooth = apex + outline[:, :1] * xAxis + outline[:, 1:] * yAxis
+        toothBase = apex + rootX * xAxis + outline[:, 1:] * yAxis
+        root = self._root(tooth[-1], tooth[0] @ _rotation(2 * math.pi / self.numTeeth).T, rootSegments, self.backZ)
+        self.chunk = np.concatenate((tooth, root))
+        self.chunkBase = np.concatenate((toothBase, root))
+
+        # The front is the back scaled towards the apex, so it is flat too.
+        self.frontZ = self.backZ * self.innerScale
+        radii = np.hypot(self.chunkBase[:, 0], self.chunkBase[:, 1])
+        if self.holeRadius >= radii.min() * self.innerScale:
+            raise ValueError('the hole must be smaller than the root at the face width, %.4g'
+                             % (2 * radii.min() * self.innerScale))
+
+    # Points along the root between the end of one tooth and the start of the
+    # next at height z, interpolated in cylindrical coordinates so they follow
+    # the root circle.
+    @staticmethod
+    def _root(start, end, segments, z):
+        r0, r1 = math.hypot(start[0], start[1]), math.hypot(end[0], end[1])
+        a0, a1 = math.atan2(start[1], start[0]), math.atan2(end[1], end[0])
+        a1 = a0 + (a1 - a0) % (2 * math.pi)
+        t = np.linspace(0, 1, segments + 1)[1:-1, np.newaxis]
+        r = r0 + (r1 - r0) * t
+        a = a0 + (a1 - a0) * t
+        return np.concatenate((r * np.cos(a), r * np.sin(a), np.full_like(t, z)), axis=1)
+
+    # Triangles for tooth i, with the root up to tooth i + 1, as (N,3,3).
+    def toothTriangles(self, i):
+        step = 2 * math.pi / self.numTeeth
+        turn = _rotation(step * i).T
+        nextTurn = _rotation(step).T
+        loop = np.concatenate((self.chunk, self.chunk[:1] @ nextTurn)) @ turn
+        base = np.concatenate((self.chunkBase, self.chunkBase[:1] @ nextTurn)) @ turn
+
+        # Tooth flanks, tip and root, scaled towards the apex at the origin.
+        scales = np.linspace(self.innerScale, 1.0, self.faceSegments + 1)
+        parts = [_strip(loop * outer, loop * inner) for inner, outer in zip(scales[:-1], scales[1:])]
+
+        # The back and front of the teeth, down to the flat back and front.
+        front = loop * self.innerScale
+        frontBase = base * self.innerScale
+        parts += [_strip(base, loop), _strip(front, frontBase)]
+
+        if self.holeRadius > 0:
+            bore = self.holeRadius * base[:, :2] / np.hypot(base[:, 0], base[:, 1])[:, np.newaxis]
+            backBore = np.concatenate((bore, np.full((len(bore), 1), self.backZ)), axis=1)
+            frontBore = np.concatenate((bore, np.full((len(bore), 1), self.frontZ)), axis=1)
+            parts += [_strip(backBore, base), _strip(frontBase, frontBore), _strip(frontBore, backBore)]
+        else:
+            parts += [_fan(base[::-1], (0.0, 0.0, self.backZ)), _fan(frontBase, (0.0, 0.0, self.frontZ))]
+
+        # The back and front of the teeth have no height at the root.
+        triangles = np.concatenate(parts)
+        area = np.linalg.norm(np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]), axis=1)
+        triangles = triangles[area > 1e-12]
+        triangles[..., 2] -= self.backZ
+        return triangles
+
+    def triangles(self):
+        for i in range(self.numTeeth):
+            yield self.toothTriangles(i)
+
+    def write(self, path, name=''):
+        with StlWriter(path, name, scale=10.0) as writer:
+            for triangles in self.triangles():
+                writer.write(triangles)
+        return writer.count
+
+
+# Both gears of a GearSpec: (wheel, pinion).
+def gearSetMeshes(spec, **options):
+    cs = spec.crossSection
+    wheel = GearMesh(cs.wheel, cs.pitchDia / 2, spec.thickness, spec.holeDiam, **options)
+    pinion = GearMesh(cs.pinion, cs.pitchDia1 / 2, spec.thickness, spec.holeDiam, **options)
+    return wheel, pinion
+
+
+# Writes the two STL files for one table row. Returns a result dict like
+# gearlib.batch does.
+def writeGearSet(index, gearSet, outputDir, tolerance=batch.DEFAULT_TOLERANCE, options=None):
+    options = options or {}
+    result = {'index': index, 'input': gearSet}
+    try:
+        spec = batch.tableSpec(gearSet, tolerance)
+        invalid = spec.inputError(batch.formatMm)
+        if invalid:
+            result['invalid'] = invalid
+        wheel, pinion = gearSetMeshes(spec, **options)
+        for name, gear in (('wheel', wheel), ('pinion', pinion)):
+            path = os.path.join(outputDir, '%d-%s.stl' % (index, name))
+            label = 'bevel gear %d/%d %s, module %g' % (spec.numTeeth, spec.numTeeth1, name, spec.module)
+            result[name] = {'path': path, 'triangles': gear.write(path, label)}
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gearlib.mesh', description='Write STL meshes for a table of bevel gear sets.')
+    parser.add_argument('table', help='CSV or JSONL file of gear sets')
+    parser.add_argument('-o', '--output', default='.', help='folder for the STL files (default: current folder)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--tolerance', type=float, default=batch.DEFAULT_TOLERANCE, help='involute chord tolerance in mm')
+    parser.add_argument('--tip-segments', type=int, default=TIP_SEGMENTS, help='segments in each tooth tip arc')
+    parser.add_argument('--root-segments', type=int, default=ROOT_SEGMENTS, help='segments along the root between teeth')
+    parser.add_argument('--face-segments', type=int, default=FACE_SEGMENTS, help='segments along the face width')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    options = {'tipSegments': args.tip_segments, 'rootSegments': args.root_segments, 'faceSegments': args.face_segments}
+    rows = ((index, gearSet, args.output, args.tolerance, options) for index, gearSet in enumerate(batch.readTable(args.table)))
+    failed = 0
+    for result in batch.boundedMap(writeGearSet, rows, args.workers):
+        if 'error' in result:
+            failed += 1
+            print('%d: %s' % (result['index'], result['error']), file=sys.stderr)
+        else:
+            print('%d: %d + %d triangles' % (result['index'], result['wheel']['triangles'], result['pinion']['triangles']))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# Cubic B-spline approximations of the involute flanks, for drawing them as
+# fixed NURBS curves rather than fitted splines. The control points are a
+# least squares fit to a dense sample of the true flank with the end points
+# held, and the count is raised until the curve is within tolerance of the
+# involute. When the flank starts at a root line, the second control point is
+# held on the line's direction, so the curve leaves the line tangent to it
+# and the sketch needs no tangent constraint. Root fillets are fitted the
+# same way, held tangent to the involute where the two meet.
+
+import collections
+import functools
+import math
+
+import numpy as np
+
+from . import fillet as rootFillet
+from . import involute
+
+
+# controlPoints is (N,2), knots the full clamped knot vector (N + degree + 1
+# values) and maxError the largest distance from the true flank.
+FlankCurve = collections.namedtuple('FlankCurve', ['controlPoints', 'knots', 'degree', 'maxError'])
+
+DEGREE = 3
+
+# Points the flank is sampled at for the fit, and how many times as many the
+# fitted curve is checked at.
+FIT_SAMPLES = 64
+CHECK_FACTOR = 4
+
+MAX_CONTROL_POINTS = 40
+
+
+# Clamped knot vector with uniform inner knots on [0, 1].
+def clampedKnots(count, degree=DEGREE):
+    inner = np.arange(1, count - degree) / (count - degree)
+    return np.concatenate((np.zeros(degree + 1), inner, np.ones(degree + 1)))
+
+
+# Values of all B-spline basis functions at params, as a (len(params), count)
+# array, by the Cox-de Boor recursion.
+def basisMatrix(knots, degree, params):
+    knots = np.asarray(knots, dtype=float)
+    u = np.asarray(params, dtype=float)[:, np.newaxis]
+    basis = ((knots[:-1] <= u) & (u < knots[1:])).astype(float)
+
+    # The end of the range belongs to the last non empty span.
+    last = np.flatnonzero(knots[:-1] < knots[1:])[-1]
+    atEnd = u[:, 0] >= knots[-1]
+    basis[atEnd] = 0.0
+    basis[atEnd, last] = 1.0
+
+    for p in range(1, degree + 1):
+        count = basis.shape[1] - 1
+        span1 = knots[p:p + count] - knots[:count]
+        span2 = knots[p + 1:p + 1 + count] - knots[1:1 + count]
+        left = np.divide(u - knots[:count], span1, out=np.zeros((len(u), count)), where=span1 > 0)
+        right = np.divide(knots[p + 1:p + 1 + count] - u, span2, out=np.zeros((len(u), count)), where=span2 > 0)
+        basis = left * basis[:, :-1] + right * basis[:, 1:]
+    return basis
+
+
+# Points on a FlankCurve at params in [0, 1].
+def evaluate(curve, params):
+    return basisMatrix(curve.knots, curve.degree, params) @ curve.controlPoints
+
+
+# Least squares control points for count control points through points (M,2)
+# at params, with the end points held and, given startDirection, the second
+# control point on the ray from the first along it. Returns None if the
+# second point would have to go backwards along startDirection.
+def _fitControlPoints(points, params, count, startDirection):
+    knots = clampedKnots(count)
+    basis = basisMatrix(knots, DEGREE, params)
+    start, end = points[0], points[-1]
+    residual = points - np.outer(basis[:, 0], start) - np.outer(basis[:, -1], end)
+
+    if startDirection is None:
+        inner = np.linalg.lstsq(basis[:, 1:-1], residual, rcond=None)[0]
+        return knots, np.vstack((start, inner, end))
+
+    # Unknowns are the distance along startDirection and the x and y of the
+    # control points after the second.
+    residual = residual - np.outer(basis[:, 1], start)
+    rows = len(points)
+    free = count - 3
+    system = np.zeros((2 * rows, 1 + 2 * free))
+    system[:rows, 0] = basis[:, 1] * startDirection[0]
+    system[rows:, 0] = basis[:, 1] * startDirection[1]
+    system[:rows, 1:1 + free] = basis[:, 2:-1]
+    system[rows:, 1 + free:] = basis[:, 2:-1]
+    solution = np.linalg.lstsq(system, np.concatenate((residual[:, 0], residual[:, 1])), rcond=None)[0]
+    if solution[0] <= 0:
+        return None
+    inner = np.column_stack((solution[1:1 + free], solution[1 + free:]))
+    return knots, np.vstack((start, start + solution[0] * startDirection, inner, end))
+
+
+# Fits a FlankCurve to points (M,2), dense samples of the flank in order,
+# with the fewest control points that keep distance(curvePoints), the
+# largest distance of (K,2) points from the true flank, within tolerance.
+# Gives the closest fit found if none is.
+def fitFlank(points, distance, tolerance, startDirection=None, maxControlPoints=MAX_CONTROL_POINTS):
+    points = np.asarray(points, dtype=float)
+    chords = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    params = np.concatenate(([0.0], np.cumsum(chords))) / chords.sum()
+    if startDirection is not None:
+        startDirection = np.asarray(startDirection, dtype=float)
+        startDirection = startDirection / np.linalg.norm(startDirection)
+
+    checkParams = np.linspace(0.0, 1.0, len(points) * CHECK_FACTOR)
+    best = None
+    for count in range(DEGREE + 1 + (startDirection is not None), maxControlPoints + 1):
+        fit = _fitControlPoints(points, params, count, startDirection)
+        if fit is None:
+            continue
+        knots, controlPoints = fit
+        curve = FlankCurve(controlPoints, knots, DEGREE, 0.0)
+        curve = curve._replace(maxError=float(distance(evaluate(curve, checkParams))))
+        if best is None or curve.maxError < best.maxError:
+            best = curve
+        if curve.maxError <= tolerance:
+            break
+    return best
+
+
+# FlankCurve for the involute of baseRadius between innerRadius and
+# outerRadius, turned by rotateAngle like involute.involuteFlanks. Cached, as
+# the same gear's flanks are fitted again on every regeneration.
+@functools.lru_cache(maxsize=256)
+def involuteFlankCurve(baseRadius, innerRadius, outerRadius, rotateAngle, tolerance, startDirection=None):
+    # Even in roll angle, which puts more samples where the involute bends most.
+    rollAngles = np.linspace(math.sqrt(max(innerRadius * innerRadius / (baseRadius * baseRadius) - 1, 0.0)),
+                             math.sqrt(outerRadius * outerRadius / (baseRadius * baseRadius) - 1), FIT_SAMPLES)
+    radii = baseRadius * np.sqrt(1 + rollAngles * rollAngles)
+    radii[0], radii[-1] = innerRadius, outerRadius
+    points = involute.involuteFlanks(radii, baseRadius, rotateAngle)[0]
+
+    def distance(samples):
+        radii = np.hypot(samples[:, 0], samples[:, 1])
+        angle = np.arctan2(samples[:, 1], samples[:, 0]) - rotateAngle
+        trueAngle = involute.involuteAngle(baseRadius, np.maximum(radii, baseRadius))
+        return (radii * np.abs(angle - trueAngle)).max()
+
+    return fitFlank(points, distance, tolerance, startDirection)
+
+
+# Direction of the involute of baseRadius, turned by rotateAngle, going out
+# at radius.
+def involuteDirection(baseRadius, radius, rotateAngle):
+    roll = math.sqrt(max(radius * radius / (baseRadius * baseRadius) - 1, 0.0))
+    return (math.cos(roll + rotateAngle), math.sin(roll + rotateAngle))
+
+
+# The profile's involute turn, see profile.computeToothProfile.
+def _rotateAngle(profile):
+    x, y = profile.flank1[0]
+    return math.atan2(y, x) - float(involute.involuteAngle(profile.baseCircleDia / 2, profile.sampling.radii[0]))
+
+
+# FlankCurve for a root fillet given as its dense points (bytes of an (N,2)
+# float array, to be hashable), fitted from the involute end down to the root
+# circle so the tangency is held at the start, then reversed. Cached like
+# involuteFlankCurve.
+@functools.lru_cache(maxsize=256)
+def _filletCurve(denseBytes, tolerance, endDirection=None):
+    dense = np.frombuffer(denseBytes).reshape(-1, 2)
+    startDirection = None if endDirection is None else (-endDirection[0], -endDirection[1])
+
+    def distance(samples):
+        return rootFillet.polylineDistance(samples, dense).max()
+
+    curve = fitFlank(dense[::-1], distance, tolerance, startDirection)
+    return curve._replace(controlPoints=curve.controlPoints[::-1].copy())
+
+
+# FlankCurves for both flanks of a profile.ToothProfile, within tolerance
+# (cm) of the involute. The second is the first mirrored about the x axis,
+# like the profile's flank2.
+def profileFlankCurves(profile, tolerance):
+    baseRadius = profile.baseCircleDia / 2
+    radii = profile.sampling.radii
+    x, y = profile.flank1[0]
+    rotateAngle = _rotateAngle(profile)
+    startDirection = None
+    if profile.rootPoints is not None:
+        rootPoint = profile.rootPoints[0]
+        startDirection = (float(x - rootPoint[0]), float(y - rootPoint[1]))
+    elif profile.fillet is not None and not profile.fillet.undercut:
+        startDirection = involuteDirection(float(baseRadius), float(radii[0]), rotateAngle)
+    curve1 = involuteFlankCurve(float(baseRadius), float(radii[0]), float(radii[-1]), rotateAngle,
+                                float(tolerance), startDirection)
+    curve2 = curve1._replace(controlPoints=curve1.controlPoints * np.array((1.0, -1.0)))
+    return curve1, curve2
+
+
+# FlankCurves for the root fillets of a profile.ToothProfile that has them,
+# within tolerance (cm) of the trochoid and, unless undercut, tangent to the
+# involute where they meet it. The second is mirrored like flank2's. Each
+# ends exactly on the first control point of its flank's curve (see
+# profileFlankCurves), so the fixed splines share an endpoint in the sketch.
+def profileFilletCurves(profile, tolerance):
+    fillet = profile.fillet
+    endDirection = None
+    if not fillet.undercut:
+        endDirection = involuteDirection(float(profile.baseCircleDia / 2), float(profile.sampling.radii[0]),
+                                         _rotateAngle(profile))
+    curve1 = _filletCurve(np.ascontiguousarray(fillet.dense, dtype=float).tobytes(), float(tolerance), endDirection)
+
+    # Moving the end control point moves the curve by no more than the gap,
+    # since the basis functions are at most 1.
+    flankStart = profileFlankCurves(profile, tolerance)[0].controlPoints[0]
+    controlPoints = curve1.controlPoints.copy()
+    gap = float(np.hypot(*(flankStart - controlPoints[-1])))
+    controlPoints[-1] = flankStart
+    curve1 = curve1._replace(controlPoints=controlPoints, maxError=curve1.maxError + gap)
+    curve2 = curve1._replace(controlPoints=curve1.controlPoints * np.array((1.0, -1.0)))
+    return curve1, curve2
@@ -0,0 +1,166 @@
+# Tooth profile geometry for one bevel gear, computed without touching a sketch.
+# Profiles are kept in a bounded LRU cache keyed on the gear parameters so
+# regenerating the same gear skips the math entirely.
+
+import collections
+import math
+import threading
+
+from . import fillet as rootFillet
+from . import involute
+
+
+# The 2D tooth profile drawn on the back cone plane. flank1/flank2 are (N,2)
+# arrays, tipMidPoint is the middle of the tip arc, rootPoints is None when the
+# involute reaches the root circle or else the two root line end points, and
+# profilePoint is the point at the tooth's root used for the root cone.
+# fillet is the fillet.RootFillet from the root circle to flank1, or None
+# without a root fillet; flank2's is its mirror image. With a fillet there
+# are no root lines.
+ToothProfile = collections.namedtuple('ToothProfile', [
+    'flank1', 'flank2', 'tipMidPoint', 'rootPoints', 'profilePoint',
+    'sampling', 'pitchDia', 'rootDia', 'baseCircleDia', 'outsideDia', 'virtualTeeth', 'fillet'],
+    defaults=(None,))
+
+
+# Tredgold's approximation: the back cone slant height R0, used as the pitch
+# radius of the tooth profile, and Zi, the tooth count of the imaginary spur
+# gear with that pitch radius.
+def tredgold(module, numTeeth, ratio):
+    pitchDia = numTeeth * module
+    bca = module * numTeeth * ratio
+    R0 = math.sqrt(bca*bca + pitchDia*pitchDia) / 2
+    Zi = 2*R0/module
+    return R0, Zi
+
+
+def computeToothProfile(module, numTeeth, pressureAngle, backlash, ratio, dedendum, tolerance, rootFilletRad=0.0):
+    '''
+    For proper tooth shape in a bevel gear, R0 should be larger than value given by 
+    spur gear calculation (m*z/2). Using Tredgold's approximation, reference pitch
+    radius is the slant height of the back cone: 
+        https://en.wikipedia.org/wiki/List_of_gear_nomenclature#Back_cone
+    r0 = m*z/2;          // Reference pitch radius by tooth and module
+    R0 = r0/sin(atan(ratio));   // Tredgold's approximation
+    Zi = 2*R0/m;                // tooth count of the imaginary spur gear
+    Rb = R0*cos(alpha); // Base pitch radius
+    Ra = R0+m;          // Addendum circle radius
+    Rd = R0-(m+c*m);    // Dedendum circle radius
+
+    module and dedendum are in cm, see spec.dedendum for the dedendum rule.
+    With rootFilletRad (cm), the involute starts where the trochoidal root
+    fillet cut by a rack with that tip radius meets it, see fillet.py.
+    '''
+
+    # Compute the various values for a gear.
+    R0, Zi = tredgold(module, numTeeth, ratio)
+
+    pitchDia = R0 * 2
+    rootDia = pitchDia - (2 * dedendum)
+    baseCircleDia = pitchDia * math.cos(pressureAngle)
+    outsideDia = pitchDia + 2 * module
+
+    # Get the angle to the point along the tooth that's at the pitch diameter.
+    pitchPointAngle = float(involute.involuteAngle(baseCircleDia / 2.0, pitchDia / 2.0))
+
+    # Determine the angle defined by the tooth thickness as measured at
+    # the pitch diameter circle.
+    toothThicknessAngle = (2 * math.pi) / (2 * Zi)
+    
+    # Determine the angle needed for the specified backlash.
+    backlashAngle = (backlash / (pitchDia / 2.0)) * .25
+    
+    # Determine the angle to rotate the curve.
+    rotateAngle = -((toothThicknessAngle/2) + pitchPointAngle - backlashAngle)
+
+    # The fillet, if any, replaces the involute up to where the two meet.
+    fillet = None
+    innerRadius = rootDia / 2.0
+    if rootFilletRad > 0:
+        fillet = rootFillet.rootFillet(module, R0, pressureAngle, dedendum, backlash, rootFilletRad, rotateAngle, tolerance)
+        innerRadius = fillet.formRadius
+
+    # Calculate points along the involute curve, skipping any below the base circle.
+    sampling = involute.adaptiveInvoluteRadii(baseCircleDia / 2.0, innerRadius, outsideDia / 2.0, tolerance)
+    
+    # Rotate the involute so the middle of the tooth lies on the x axis and
+    # mirror it about the X axis for the other side of the tooth.
+    flank1, flank2 = involute.involuteFlanks(sampling.radii, baseCircleDia / 2.0, rotateAngle)
+    flank1.flags.writeable = False
+    flank2.flags.writeable = False
+
+    # Check to see if involute goes down to the root or not.  If not, then
+    # there are lines to connect the involute to the root.
+    if fillet is not None:
+        rootPoints = None
+        profilePoint = (float(fillet.points[0, 0]), float(fillet.points[0, 1]))
+    elif baseCircleDia < rootDia:
+        rootPoints = None
+        profilePoint = (float(flank1[0, 0]), float(flank1[0, 1]))
+    else:
+        curve1Angle0 = math.atan(flank1[0, 1] / flank1[0, 0])
+        curve2Angle0 = math.atan(flank2[0, 1] / flank2[0, 0])
+        rootPoint1 = ((rootDia / 2 - 0.001) * math.cos(curve1Angle0), (rootDia / 2) * math.sin(curve1Angle0))
+        rootPoint2 = ((rootDia / 2 - 0.001) * math.cos(curve2Angle0), (rootDia / 2) * math.sin(curve2Angle0))
+        rootPoints = (rootPoint1, rootPoint2)
+        profilePoint = rootPoint1
+
+    return ToothProfile(flank1, flank2, (outsideDia / 2, 0.0), rootPoints, profilePoint,
+                        sampling, pitchDia, rootDia, baseCircleDia, outsideDia, Zi, fillet)
+
+
+# Bounded LRU cache of ToothProfile objects. Parameters are normalized to 12
+# significant digits so values that went through a units round trip still hit.
+# It is shared with the speculation worker thread (see speculate.py).
+class ProfileCache:
+    def __init__(self, maxSize=256):
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._profiles = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(module, numTeeth, pressureAngle, backlash, ratio, dedendum, tolerance, rootFilletRad=0.0):
+        return (float('%.12g' % module), int(numTeeth), float('%.12g' % pressureAngle),
+                float('%.12g' % backlash), float('%.12g' % ratio), float('%.12g' % dedendum),
+                float('%.12g' % tolerance), float('%.12g' % rootFilletRad))
+
+    # Profiles are computed outside the lock, so two threads asking for the
+    # same new profile may both compute it.
+    def toothProfile(self, module, numTeeth, pressureAngle, backlash, ratio, dedendum, tolerance, rootFilletRad=0.0):
+        key = self.key(module, numTeeth, pressureAngle, backlash, ratio, dedendum, tolerance, rootFilletRad)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self.hits += 1
+                self._profiles.move_to_end(key)
+                return profile
+            self.misses += 1
+
+        profile = computeToothProfile(*key)
+        with self._lock:
+            self._profiles[key] = profile
+            while len(self._profiles) > self.maxSize:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._profiles), 'maxSize': self.maxSize}
+
+
+# Shared cache used by Gears.py and the headless tools.
+profileCache = ProfileCache()
+
+
+def toothProfile(module, numTeeth, pressureAngle, backlash, ratio, dedendum, tolerance, rootFilletRad=0.0):
+    return profileCache.toothProfile(module, numTeeth, pressureAngle, backlash, ratio, dedendum, tolerance, rootFilletRad)
@@ -0,0 +1,77 @@
+# The closed regions of the cross section sketch, worked out from the points
+# drawGearSet draws its lines through. drawGearSet revolves every region to
+# trim the teeth and the two root cone regions again for the root cones; with
+# the regions known up front it can tell them apart by their bounding boxes,
+# which Fusion keeps with each profile, instead of computing profile areas.
+#
+# The lines are the gear axes (split at axisSplit), the root cone base and
+# slant of each gear (the slant split at face) and the face line between the
+# two face points. They close five regions:
+#
+#   wheelRootCone    coneA, coneB, face, axisSplit of the wheel
+#   pinionRootCone   the same for the pinion
+#   wheelTrim        wheel axisSplit, wheel face, cone center
+#   pinionTrim       pinion axisSplit, pinion face, cone center
+#   apexTrim         wheel face, pinion face, cone center
+#
+# Each root cone region also runs through its gear's center on the axis,
+# which doesn't change its bounding box.
+
+import collections
+
+
+WHEEL_ROOT_CONE = 'wheelRootCone'
+PINION_ROOT_CONE = 'pinionRootCone'
+WHEEL_TRIM = 'wheelTrim'
+PINION_TRIM = 'pinionTrim'
+APEX_TRIM = 'apexTrim'
+
+# How far a profile's bounding box may be from its region's, as a fraction of
+# the region's bounding box diagonal.
+BOX_TOLERANCE = 0.01
+
+Region = collections.namedtuple('Region', ['name', 'vertices', 'box'])
+
+
+# Bounding box (minX, minY, maxX, maxY) of (x, y) points.
+def boundingBox(points):
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _region(name, vertices):
+    return Region(name, tuple(vertices), boundingBox(vertices))
+
+
+# The regions of a CrossSection, in sketch coordinates (cm).
+def crossSectionRegions(cs):
+    wheel, pinion = cs.wheel, cs.pinion
+    return [
+        _region(WHEEL_ROOT_CONE, (wheel.coneA, wheel.coneB, wheel.face, wheel.axisSplit)),
+        _region(PINION_ROOT_CONE, (pinion.coneA, pinion.coneB, pinion.face, pinion.axisSplit)),
+        _region(WHEEL_TRIM, (wheel.axisSplit, wheel.face, cs.coneCenter)),
+        _region(PINION_TRIM, (pinion.axisSplit, pinion.face, cs.coneCenter)),
+        _region(APEX_TRIM, (wheel.face, pinion.face, cs.coneCenter)),
+    ]
+
+
+class RegionIndex:
+    '''
+    Classifies the profiles of a cross section sketch by their bounding boxes.
+    '''
+    def __init__(self, cs, tolerance=BOX_TOLERANCE):
+        self.regions = crossSectionRegions(cs)
+        self.tolerance = tolerance
+
+    # Name of the region whose bounding box matches box (minX, minY, maxX,
+    # maxY), or None if there isn't one.
+    def classify(self, box):
+        best, bestDistance = None, None
+        for region in self.regions:
+            distance = max(abs(a - b) for a, b in zip(box, region.box))
+            if bestDistance is None or distance < bestDistance:
+                best, bestDistance = region, distance
+        minX, minY, maxX, maxY = best.box
+        diagonal = ((maxX - minX) ** 2 + (maxY - minY) ** 2) ** 0.5
+        return best.name if bestDistance <= self.tolerance * diagonal else None
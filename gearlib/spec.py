@@ -0,0 +1,247 @@
+# The parameters of one bevel gear set and everything derived from them.
+# GearSpec is immutable; derived values are computed on first use and cached
+# on the instance, so every dialog event for the same inputs shares the work.
+
+import collections
+import math
+import threading
+
+from .lazy import LazyModule
+
+# The geometry modules load NumPy, so they are only imported once a derived
+# value needs them, after the command dialog is up.
+crossSection = LazyModule('.crosssection', __package__)
+rootFillet = LazyModule('.fillet', __package__)
+
+
+# The input values of a GearSpec, in constructor order.
+FIELDS = ('module', 'numTeeth', 'numTeeth1', 'pressureAngle', 'backlash',
+          'thickness', 'holeDiam', 'profileTolerance', 'rootFilletRad')
+
+
+# Dedendum for a module in cm. This is the one rule used by the dialog, the
+# tooth profiles and the cross section.
+def dedendum(module):
+    if (1/module < (20 *(math.pi/180))-0.000001):
+        return 1.157 * module
+    circularPitch = math.pi * module
+    if circularPitch >= 20:
+        return 1.25 * module
+    return (1.2 * module) + (.002 * 2.54)
+
+
+# Guards the derived value caches, which the speculation worker fills while
+# the dialog thread copies them (see inherit). Values are computed outside it.
+_derivedLock = threading.Lock()
+
+
+# Decorator for GearSpec values that are computed once and then cached.
+def _derived(method):
+    name = method.__name__
+    def getter(self):
+        cache = self._derived
+        if name in cache:
+            return cache[name]
+        value = method(self)
+        with _derivedLock:
+            return cache.setdefault(name, value)
+    getter.__doc__ = method.__doc__
+    return property(getter)
+
+
+class GearSpec:
+    '''
+    A bevel gear set. module is in mm like the dialog, the other lengths are in
+    cm and the pressure angle is in radians. A rootFilletRad of 0 leaves the
+    teeth without root fillets.
+    '''
+    __slots__ = FIELDS + ('_derived',)
+
+    def __init__(self, module, numTeeth, numTeeth1, pressureAngle, backlash, thickness, holeDiam, profileTolerance,
+                 rootFilletRad=0.0):
+        setAttr = object.__setattr__
+        setAttr(self, 'module', float(module))
+        setAttr(self, 'numTeeth', int(numTeeth))
+        setAttr(self, 'numTeeth1', int(numTeeth1))
+        setAttr(self, 'pressureAngle', float(pressureAngle))
+        setAttr(self, 'backlash', float(backlash))
+        setAttr(self, 'thickness', float(thickness))
+        setAttr(self, 'holeDiam', float(holeDiam))
+        setAttr(self, 'profileTolerance', float(profileTolerance))
+        setAttr(self, 'rootFilletRad', float(rootFilletRad))
+        setAttr(self, '_derived', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GearSpec is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('GearSpec is immutable')
+
+    @property
+    def key(self):
+        return tuple(getattr(self, name) for name in FIELDS)
+
+    def __eq__(self, other):
+        return isinstance(other, GearSpec) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __reduce__(self):
+        return (GearSpec, self.key)
+
+    def __repr__(self):
+        return 'GearSpec(%s)' % ', '.join('%s=%r' % (name, getattr(self, name)) for name in FIELDS)
+
+    # Returns a copy with some of the values replaced.
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in FIELDS}
+        values.update(changes)
+        return GearSpec(**values)
+
+    # Copies the cached derived values of another spec that don't depend on
+    # any input that differs between the two, so changing one input in the
+    # dialog only recomputes what depends on it.
+    def inherit(self, other):
+        if other is None or other is self:
+            return self
+        changed = {name for name in FIELDS if getattr(self, name) != getattr(other, name)}
+        with _derivedLock:
+            for name, value in list(other._derived.items()):
+                if not (DEPENDENCIES[name] & changed):
+                    self._derived.setdefault(name, value)
+        return self
+
+    @_derived
+    def moduleCm(self):
+        return self.module / 10
+
+    @_derived
+    def pitchDia(self):
+        return self.numTeeth * self.moduleCm
+
+    @_derived
+    def pitchDia1(self):
+        return self.numTeeth1 * self.moduleCm
+
+    @_derived
+    def dedendum(self):
+        return dedendum(self.moduleCm)
+
+    @_derived
+    def rootDia(self):
+        return self.pitchDia - (2 * self.dedendum)
+
+    @_derived
+    def rootDia1(self):
+        return self.pitchDia1 - (2 * self.dedendum)
+
+    @_derived
+    def baseCircleDia(self):
+        return self.pitchDia * math.cos(self.pressureAngle)
+
+    @_derived
+    def outsideDia(self):
+        return (self.numTeeth + 2) * self.moduleCm
+
+    @_derived
+    def ratio(self):
+        return self.numTeeth / self.numTeeth1
+
+    @_derived
+    def coneDistance(self):
+        '''The pitch cone's slant length, the most face width the teeth have room for.'''
+        return math.hypot(self.pitchDia, self.pitchDia1) / 2
+
+    @_derived
+    def maxHoleDiam(self):
+        '''The largest bore that leaves material in both root cones.'''
+        return min(self.rootDia, self.rootDia1) - 0.01
+
+    @_derived
+    def maxRootFilletRad(self):
+        '''The largest root fillet the rack tip has room for, see fillet.py.'''
+        return rootFillet.maxFilletRadius(self.moduleCm, self.pressureAngle, self.dedendum, self.backlash)
+
+    @_derived
+    def crossSection(self):
+        return crossSection.computeCrossSection(self)
+
+    # Checks the values the same way the command dialog does. Returns an
+    # error message, or '' if the gear set can be built. formatLength turns a
+    # length in cm into display text.
+    def inputError(self, formatLength=str):
+        for rule in RULES:
+            message = rule.check(self, formatLength)
+            if message:
+                return message
+        return ''
+
+
+# The inputs each derived value of GearSpec depends on.
+DEPENDENCIES = {
+    'moduleCm': frozenset(('module',)),
+    'pitchDia': frozenset(('module', 'numTeeth')),
+    'pitchDia1': frozenset(('module', 'numTeeth1')),
+    'dedendum': frozenset(('module',)),
+    'rootDia': frozenset(('module', 'numTeeth')),
+    'rootDia1': frozenset(('module', 'numTeeth1')),
+    'baseCircleDia': frozenset(('module', 'numTeeth', 'pressureAngle')),
+    'outsideDia': frozenset(('module', 'numTeeth')),
+    'ratio': frozenset(('numTeeth', 'numTeeth1')),
+    'coneDistance': frozenset(('module', 'numTeeth', 'numTeeth1')),
+    'maxHoleDiam': frozenset(('module', 'numTeeth', 'numTeeth1')),
+    'maxRootFilletRad': frozenset(('module', 'pressureAngle', 'backlash')),
+    'crossSection': frozenset(FIELDS),
+}
+
+
+# A validity check on a GearSpec. dependencies are the FIELDS the check reads,
+# so a validator only needs to rerun it when one of those changes. check takes
+# the spec and a length formatter and returns an error message or ''.
+Rule = collections.namedtuple('Rule', ['name', 'dependencies', 'check'])
+
+
+def _checkTeeth(spec, formatLength):
+    if spec.numTeeth < 4 or spec.numTeeth1 < 4:
+        return 'The number of teeth must be 4 or more.'
+    return ''
+
+
+def _checkHoleDiam(spec, formatLength):
+    if spec.holeDiam >= spec.maxHoleDiam:
+        return 'The center hole diameter is too large.  It must be less than ' + formatLength(spec.maxHoleDiam)
+    return ''
+
+
+# The face width is measured along the cone from the back of the teeth, so
+# it has to end before the apex, where the cross section's regions would
+# cross over.
+def _checkThickness(spec, formatLength):
+    if spec.thickness >= spec.coneDistance:
+        return 'The gear thickness is too large.  It must be less than ' + formatLength(spec.coneDistance)
+    return ''
+
+
+def _checkProfileTolerance(spec, formatLength):
+    if spec.profileTolerance <= 0:
+        return 'The profile tolerance must be greater than zero.'
+    return ''
+
+
+def _checkRootFillet(spec, formatLength):
+    if spec.rootFilletRad < 0:
+        return 'The root fillet radius must not be negative.'
+    if spec.rootFilletRad >= spec.maxRootFilletRad:
+        return 'The root fillet radius is too large.  It must be less than ' + formatLength(spec.maxRootFilletRad)
+    return ''
+
+
+# The checks, in the order their messages take priority.
+RULES = (
+    Rule('teeth', frozenset(('numTeeth', 'numTeeth1')), _checkTeeth),
+    Rule('holeDiam', frozenset(('module', 'numTeeth', 'numTeeth1', 'holeDiam')), _checkHoleDiam),
+    Rule('thickness', frozenset(('module', 'numTeeth', 'numTeeth1', 'thickness')), _checkThickness),
+    Rule('profileTolerance', frozenset(('profileTolerance',)), _checkProfileTolerance),
+    Rule('rootFillet', frozenset(('module', 'pressureAngle', 'backlash', 'rootFilletRad')), _checkRootFillet),
+)
@@ -0,0 +1,107 @@
+# Speculative work on a background thread. While the command dialog is open,
+# every valid input change submits the gear set, and the worker computes its
+# pure math (tooth profiles, cone geometry, cross section) ahead of OK. The
+# results land in the usual caches, so execute only has the Fusion API calls
+# left to make. Only the latest submission matters: one that has not started
+# is replaced, and one that is running is cancelled, which the work sees by
+# polling cancelled() between its steps.
+
+import threading
+import time
+
+
+class Speculator:
+    '''
+    Runs work(key, cancelled) on a worker thread for the latest key submitted.
+    Keys are compared by identity, since the work leaves its results cached on
+    the key (a GearSpec's derived values).
+    '''
+    def __init__(self, work):
+        self.work = work
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.seconds = 0.0
+        self._condition = threading.Condition()
+        self._pending = None
+        self._running = None
+        self._cancelRunning = False
+        self._completed = None
+        self._stopped = False
+        self._thread = None
+
+    # Asks for work on key, dropping any other key pending or running.
+    def submit(self, key):
+        with self._condition:
+            if self._stopped:
+                return
+            if self._running is key and not self._cancelRunning:
+                self._pending = None
+                return
+            if self._completed is key:
+                self._pending = None
+                return
+            if self._running is not None:
+                self._cancelRunning = True
+            self._pending = key
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='Speculator', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    # Waits up to timeout seconds (None for no limit) for the work on key to
+    # finish, if it is pending or running. Returns whether the work on key
+    # has completed; if not, the caller does it itself.
+    def wait(self, key, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending is key or (self._running is key and not self._cancelRunning):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._completed is key
+
+    # Cancels everything and ends the worker thread.
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._pending = None
+            self._cancelRunning = True
+            self._condition.notify_all()
+
+    def report(self):
+        return {'started': self.started, 'completed': self.completed, 'cancelled': self.cancelled,
+                'seconds': self.seconds}
+
+    def _isCancelled(self):
+        return self._cancelRunning
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                key, self._pending = self._pending, None
+                self._running, self._cancelRunning = key, False
+                self.started += 1
+
+            start = time.perf_counter()
+            try:
+                self.work(key, self._isCancelled)
+                failed = False
+            except Exception:
+                # The main thread does the work again and reports the error.
+                failed = True
+
+            with self._condition:
+                self.seconds += time.perf_counter() - start
+                if self._cancelRunning:
+                    self.cancelled += 1
+                elif not failed:
+                    self.completed += 1
+                    self._completed = key
+                self._running = None
+                self._condition.notify_all()
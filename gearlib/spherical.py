@@ -0,0 +1,278 @@
+# Bevel gear tooth flanks as 3D point grids, from one of three tiers:
+#
+#   tredgold  the back cone approximation drawToothProfile uses: the planar
+#             involute of a spur gear with Zi teeth, lofted to the cone apex.
+#   exact     the spherical involute (octoid) of the base cone.
+#   table     the exact flank, taken from a cache of flanks on the unit sphere.
+#             The flank's shape there doesn't depend on the module, so every
+#             module of a catalog shares one entry.
+#
+#   python -m gearlib.spherical --module 2 --teeth 10 --teeth1 10
+#
+# Both kinds of flank are cones through the apex, so each is described by the
+# curve it cuts on the unit sphere: the azimuth of the flank around the gear
+# axis as a function of the polar angle from the axis. Points are in cm with
+# the cone apex at the origin and the gear axis along -z, like gearlib.mesh.
+
+import argparse
+import collections
+import math
+import sys
+import time
+
+import numpy as np
+
+from . import profile as gearProfile
+from .spec import GearSpec
+
+
+TIERS = ('tredgold', 'exact', 'table')
+
+# Default grid size: points across the flank, from root to tip, and along the
+# face width.
+PROFILE_POINTS = 32
+FACE_POINTS = 8
+
+
+# One flank of a tooth. polarAngles and azimuths (N,) are the flank on the
+# unit sphere; points (faceCount, N, 3) is the flank surface between the back
+# cone and the face width. The other flank is the mirror image, with the
+# azimuths and y coordinates negated.
+FlankSurface = collections.namedtuple('FlankSurface', [
+    'tier', 'polarAngles', 'azimuths', 'slantDistances', 'points'])
+
+
+# Cone angles of one gear of a set: pitch, base, root and tip, in radians,
+# plus the cone distance (cm). Addendum is one module and the dedendum follows
+# spec.dedendum, like the tooth profile.
+ConeAngles = collections.namedtuple('ConeAngles', ['pitch', 'base', 'root', 'tip', 'coneDistance'])
+
+
+def coneAngles(module, numTeeth, numTeeth1, pressureAngle, dedendum):
+    pitch = math.atan(numTeeth / numTeeth1)
+    coneDistance = numTeeth * module / 2 / math.sin(pitch)
+    return ConeAngles(pitch, math.asin(math.sin(pitch) * math.cos(pressureAngle)),
+                      pitch - math.atan(dedendum / coneDistance), pitch + math.atan(module / coneDistance),
+                      coneDistance)
+
+
+# The spherical involute function: azimuth of the involute of a base cone with
+# half angle baseAngle at polar angles theta, measured from where it leaves
+# the base circle. Tends to the planar tan(phi) - phi for small cones.
+def sphericalInvolute(baseAngle, theta):
+    theta = np.maximum(np.asarray(theta, dtype=float), baseAngle)
+    sinBase = math.sin(baseAngle)
+    roll = np.arccos(np.clip(np.cos(theta) / math.cos(baseAngle), -1.0, 1.0))
+    return roll / sinBase - np.arctan(np.tan(roll) / sinBase)
+
+
+# Azimuth of the flank at the pitch cone: half the tooth thickness, less the
+# share of the backlash one flank takes (the same quarter as the tooth profile).
+def _pitchAzimuth(module, numTeeth, backlash):
+    pitchRadius = numTeeth * module / 2
+    return -(math.pi / (2 * numTeeth) - backlash / 4 / pitchRadius)
+
+
+# Exact flank on the unit sphere at polarAngles. Below the base cone the flank
+# continues radially, like the root lines of the tooth profile.
+def exactAzimuths(module, numTeeth, numTeeth1, pressureAngle, backlash, dedendum, polarAngles):
+    cones = coneAngles(module, numTeeth, numTeeth1, pressureAngle, dedendum)
+    rotate = _pitchAzimuth(module, numTeeth, backlash) - sphericalInvolute(cones.base, cones.pitch)
+    return sphericalInvolute(cones.base, polarAngles) + rotate
+
+
+# The Tredgold flank on the unit sphere: flank1 of the tooth profile placed on
+# the back cone plane and projected from the apex.
+def tredgoldAzimuths(module, numTeeth, numTeeth1, pressureAngle, backlash, dedendum, tolerance):
+    ratio = numTeeth / numTeeth1
+    toothProfile = gearProfile.toothProfile(module, numTeeth, pressureAngle, backlash, ratio, dedendum, tolerance)
+    cones = coneAngles(module, numTeeth, numTeeth1, pressureAngle, dedendum)
+    x, y = toothProfile.flank1[:, 0], toothProfile.flank1[:, 1]
+    if toothProfile.rootPoints is not None:
+        x = np.concatenate(([toothProfile.rootPoints[0][0]], x))
+        y = np.concatenate(([toothProfile.rootPoints[0][1]], y))
+
+    # Profile x runs from the back cone apex through the pitch point, which is
+    # cone distance from the apex, and profile y goes around the gear axis.
+    along = x - toothProfile.pitchDia / 2
+    planeAngle = cones.pitch + np.arctan2(along, cones.coneDistance)
+    radial = np.hypot(along, cones.coneDistance) * np.sin(planeAngle)
+    height = np.hypot(along, cones.coneDistance) * np.cos(planeAngle)
+    return np.arctan2(np.hypot(radial, y), height), np.arctan2(y, radial)
+
+
+# Cache of exact flanks on the unit sphere, keyed by the values the shape
+# depends on: tooth counts, pressure angle and backlash and dedendum as
+# fractions of the module. Each entry holds the flank sampled at tableSize
+# polar angles from root to tip; other polar angles are interpolated.
+class FlankTable:
+    def __init__(self, maxSize=1024, tableSize=256):
+        self.maxSize = maxSize
+        self.tableSize = tableSize
+        self.hits = 0
+        self.misses = 0
+        self._flanks = collections.OrderedDict()
+
+    def key(self, module, numTeeth, numTeeth1, pressureAngle, backlash, dedendum):
+        return (int(numTeeth), int(numTeeth1), float('%.12g' % pressureAngle),
+                float('%.12g' % (backlash / module)), float('%.12g' % (dedendum / module)))
+
+    # Normalized polar angle and azimuth arrays for a gear.
+    def flank(self, module, numTeeth, numTeeth1, pressureAngle, backlash, dedendum):
+        key = self.key(module, numTeeth, numTeeth1, pressureAngle, backlash, dedendum)
+        flank = self._flanks.get(key)
+        if flank is not None:
+            self.hits += 1
+            self._flanks.move_to_end(key)
+            return flank
+
+        self.misses += 1
+        numTeeth, numTeeth1, pressureAngle, backlash, dedendum = key
+        cones = coneAngles(1.0, numTeeth, numTeeth1, pressureAngle, dedendum)
+        theta = np.linspace(cones.root, cones.tip, self.tableSize)
+        flank = (theta, exactAzimuths(1.0, numTeeth, numTeeth1, pressureAngle, backlash, dedendum, theta))
+        for array in flank:
+            array.flags.writeable = False
+        self._flanks[key] = flank
+        while len(self._flanks) > self.maxSize:
+            self._flanks.popitem(last=False)
+        return flank
+
+    def azimuths(self, module, numTeeth, numTeeth1, pressureAngle, backlash, dedendum, polarAngles):
+        theta, azimuths = self.flank(module, numTeeth, numTeeth1, pressureAngle, backlash, dedendum)
+        return np.interp(polarAngles, theta, azimuths)
+
+    # Fills the table for every combination ahead of time, e.g. for a catalog.
+    def precompute(self, teeth, teeth1, pressureAngles, backlash=0.0, dedendum=1.25):
+        for numTeeth in teeth:
+            for numTeeth1 in teeth1:
+                for pressureAngle in pressureAngles:
+                    self.flank(1.0, numTeeth, numTeeth1, pressureAngle, backlash, dedendum)
+
+    # Saves the table to, or loads it from, a NumPy .npz file.
+    def save(self, path):
+        keys = list(self._flanks)
+        np.savez_compressed(path, keys=np.array(keys, dtype=float),
+                            theta=np.array([self._flanks[k][0] for k in keys]).reshape(len(keys), -1),
+                            azimuths=np.array([self._flanks[k][1] for k in keys]).reshape(len(keys), -1))
+
+    def load(self, path):
+        data = np.load(path)
+        for key, theta, azimuths in zip(data['keys'], data['theta'], data['azimuths']):
+            key = (int(key[0]), int(key[1]), float(key[2]), float(key[3]), float(key[4]))
+            theta.flags.writeable = False
+            azimuths.flags.writeable = False
+            self._flanks[key] = (theta, azimuths)
+        while len(self._flanks) > self.maxSize:
+            self._flanks.popitem(last=False)
+
+    def clear(self):
+        self._flanks.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._flanks)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._flanks), 'maxSize': self.maxSize}
+
+
+# Shared table used by the table tier.
+flankTable = FlankTable()
+
+
+# The gear of a spec ('wheel' or 'pinion') as (numTeeth, numTeeth1) with
+# numTeeth the gear's own count.
+def _teeth(spec, gear):
+    if gear == 'wheel':
+        return spec.numTeeth, spec.numTeeth1
+    if gear == 'pinion':
+        return spec.numTeeth1, spec.numTeeth
+    raise ValueError('gear must be wheel or pinion, not %r' % (gear,))
+
+
+# Flank of one gear of a GearSpec as a point grid, computed with tier.
+def flankSurface(spec, gear='wheel', tier='exact', profilePoints=PROFILE_POINTS, facePoints=FACE_POINTS):
+    numTeeth, numTeeth1 = _teeth(spec, gear)
+    args = (spec.moduleCm, numTeeth, numTeeth1, spec.pressureAngle, spec.backlash, spec.dedendum)
+    cones = coneAngles(spec.moduleCm, numTeeth, numTeeth1, spec.pressureAngle, spec.dedendum)
+
+    if tier == 'tredgold':
+        theta, azimuths = tredgoldAzimuths(*args, spec.profileTolerance)
+    elif tier == 'exact':
+        theta = np.linspace(cones.root, cones.tip, profilePoints)
+        azimuths = exactAzimuths(*args, theta)
+    elif tier == 'table':
+        theta = np.linspace(cones.root, cones.tip, profilePoints)
+        azimuths = flankTable.azimuths(*args, theta)
+    else:
+        raise ValueError('tier must be one of %s, not %r' % (', '.join(TIERS), tier))
+
+    slant = np.linspace(cones.coneDistance - min(spec.thickness, cones.coneDistance), cones.coneDistance, facePoints)
+    direction = np.stack((np.sin(theta) * np.cos(azimuths), np.sin(theta) * np.sin(azimuths), -np.cos(theta)), axis=-1)
+    return FlankSurface(tier, theta, azimuths, slant, slant[:, np.newaxis, np.newaxis] * direction)
+
+
+# Largest distance, in cm at the back cone, between the flank of a tier and
+# the exact one, measured around the gear axis over the polar angles both
+# cover.
+def flankDeviation(surface, exact):
+    low = max(surface.polarAngles[0], exact.polarAngles[0])
+    high = min(surface.polarAngles[-1], exact.polarAngles[-1])
+    theta = exact.polarAngles[(exact.polarAngles >= low) & (exact.polarAngles <= high)]
+    difference = np.interp(theta, surface.polarAngles, surface.azimuths) - np.interp(theta, exact.polarAngles, exact.azimuths)
+    return float(np.max(np.abs(difference) * np.sin(theta)) * exact.slantDistances[-1]) if len(theta) else 0.0
+
+
+# Computes the flank with every tier and returns, for each, the seconds it
+# took and its deviation from the exact flank. The table tier is timed cold
+# (empty cache entry) and warm. The profile cache is cleared first so the
+# Tredgold time includes the tooth profile.
+def compareTiers(spec, gear='wheel', profilePoints=PROFILE_POINTS, facePoints=FACE_POINTS):
+    def timed(tier):
+        start = time.perf_counter()
+        surface = flankSurface(spec, gear, tier, profilePoints, facePoints)
+        return surface, time.perf_counter() - start
+
+    gearProfile.profileCache.clear()
+    numTeeth, numTeeth1 = _teeth(spec, gear)
+    flankTable._flanks.pop(flankTable.key(spec.moduleCm, numTeeth, numTeeth1, spec.pressureAngle,
+                                          spec.backlash, spec.dedendum), None)
+
+    exact, exactSeconds = timed('exact')
+    tredgold, tredgoldSeconds = timed('tredgold')
+    cold, coldSeconds = timed('table')
+    warm, warmSeconds = timed('table')
+    return {
+        'tredgold': {'seconds': tredgoldSeconds, 'deviation': flankDeviation(tredgold, exact)},
+        'exact': {'seconds': exactSeconds, 'deviation': 0.0},
+        'table': {'seconds': warmSeconds, 'coldSeconds': coldSeconds, 'deviation': flankDeviation(warm, exact)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gearlib.spherical', description='Compare the Tredgold, exact and table bevel gear flanks.')
+    parser.add_argument('--module', type=float, default=2.0, help='module in mm')
+    parser.add_argument('--teeth', type=int, default=20, help='wheel teeth')
+    parser.add_argument('--teeth1', type=int, default=10, help='pinion teeth')
+    parser.add_argument('--pressure-angle', type=float, default=20.0, help='degrees')
+    parser.add_argument('--backlash', type=float, default=0.0, help='mm')
+    parser.add_argument('--thickness', type=float, default=10.0, help='face width in mm')
+    parser.add_argument('--tolerance', type=float, default=0.001, help='Tredgold involute chord tolerance in mm')
+    parser.add_argument('--profile-points', type=int, default=PROFILE_POINTS)
+    parser.add_argument('--face-points', type=int, default=FACE_POINTS)
+    args = parser.parse_args(argv)
+
+    spec = GearSpec(args.module, args.teeth, args.teeth1, math.radians(args.pressure_angle),
+                    args.backlash / 10, args.thickness / 10, 0.0, args.tolerance / 10)
+    for gear in ('wheel', 'pinion'):
+        numTeeth = _teeth(spec, gear)[0]
+        for tier, result in compareTiers(spec, gear, args.profile_points, args.face_points).items():
+            print('%-6s %3d teeth  %-8s  deviation %9.5f mm  %8.1f us' % (
+                gear, numTeeth, tier, result['deviation'] * 10, result['seconds'] * 1e6))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# Binary STL writer that streams triangles to disk. Triangles are written in
+# chunks as they are generated, so the size of a mesh is limited by the disk
+# rather than by memory. The triangle count in the header is patched in when
+# the file is closed.
+
+import struct
+
+import numpy as np
+
+
+# One binary STL record: normal, three vertices and the attribute word.
+_RECORD = np.dtype([('normal', '<f4', 3), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+
+class StlWriter:
+    def __init__(self, path, name='', scale=1.0):
+        self.path = path
+        self.scale = scale
+        self.count = 0
+        self._file = open(path, 'wb')
+        header = name.encode('ascii', 'replace')[:80]
+        self._file.write(header.ljust(80, b' '))
+        self._file.write(struct.pack('<I', 0))
+
+    # Writes an (N,3,3) array of triangles, vertices counterclockwise seen
+    # from outside. Normals are computed from the vertices.
+    def write(self, triangles):
+        triangles = np.asarray(triangles, dtype=float) * self.scale
+        if not len(triangles):
+            return
+        normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+        records = np.zeros(len(triangles), dtype=_RECORD)
+        records['normal'] = normals
+        records['vertices'] = triangles
+        self._file.write(records.tobytes())
+        self.count += len(triangles)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.seek(80)
+        self._file.write(struct.pack('<I', self.count))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# Reads a binary STL back as an (N,3,3) array of triangles.
+def readStl(path):
+    with open(path, 'rb') as f:
+        f.seek(80)
+        count, = struct.unpack('<I', f.read(4))
+        records = np.frombuffer(f.read(count * _RECORD.itemsize), dtype=_RECORD)
+    return records['vertices'].astype(float)
@@ -0,0 +1,145 @@
+# Vectorized design space sweep. Evaluates the same validity rules as the
+# command dialog, plus the derived gear geometry, as NumPy arrays over every
+# combination of the given parameter ranges and returns the feasible gear sets
+# as a ranked table.
+#
+#   python -m gearlib.sweep --teeth 10:60 --teeth1 10:30 --module 0.5,1,1.5,2 --top 20
+#
+# Inputs and outputs use the dialog units: lengths in mm, angles in degrees.
+
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from .contact import theoreticalContactRatio
+
+
+# Columns of the table returned by sweep, in output order.
+COLUMNS = [
+    'numTeeth', 'numTeeth1', 'module', 'pressureAngle', 'holeDiam', 'thickness', 'ratio',
+    'pitchDia', 'pitchDia1', 'coneAngle', 'coneAngle1', 'coneDistance', 'rootDia', 'rootDia1',
+    'backConeRadius', 'backConeRadius1', 'virtualTeeth', 'virtualTeeth1', 'contactRatio', 'undercut']
+
+
+# Dedendum for a module in mm, a vectorized spec.dedendum.
+def dedendum(module):
+    module = np.asarray(module, dtype=float) / 10
+    small = np.where(np.pi * module >= 20, 1.25 * module, (1.2 * module) + (.002 * 2.54))
+    return 10 * np.where(1/module < (20 *(np.pi/180))-0.000001, 1.157 * module, small)
+
+
+# Candidates evaluated per block, which bounds the memory used by a sweep.
+BLOCK_SIZE = 1 << 20
+
+
+# Feasible gear sets in one block of the grid as an unsorted table.
+def _evaluateBlock(axes):
+    z, z1, m, pa, hole, face = np.ix_(*axes)
+
+    # The validity rules from the command dialog, applied to both gears.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ded = dedendum(m)
+        rootDia = z * m - 2 * ded
+        rootDia1 = z1 * m - 2 * ded
+        feasible = (z >= 4) & (z1 >= 4) & (rootDia > 0) & (rootDia1 > 0)
+        feasible = feasible & (hole < rootDia - 0.1) & (hole < rootDia1 - 0.1)
+        feasible = feasible & (face < m * np.hypot(z, z1) / 2)
+        feasible = np.broadcast_to(feasible, tuple(len(a) for a in axes))
+
+        index = np.nonzero(feasible)
+        z, z1, m, pa, hole, face = (a[i] for a, i in zip(axes, index))
+        ded = dedendum(m)
+        ratio = z / z1
+
+        # Tredgold's back cone radius and the virtual spur gear tooth count.
+        backConeRadius = z * m * np.sqrt(1 + ratio * ratio) / 2
+        backConeRadius1 = z1 * m * np.sqrt(1 + 1 / (ratio * ratio)) / 2
+        virtualTeeth = 2 * backConeRadius / m
+        virtualTeeth1 = 2 * backConeRadius1 / m
+        minTeeth = 2 / np.sin(np.radians(pa)) ** 2
+
+    return {
+        'numTeeth': z, 'numTeeth1': z1, 'module': m, 'pressureAngle': pa, 'holeDiam': hole,
+        'thickness': face, 'ratio': ratio,
+        'pitchDia': z * m, 'pitchDia1': z1 * m,
+        'coneAngle': np.degrees(np.arctan2(z, z1)), 'coneAngle1': np.degrees(np.arctan2(z1, z)),
+        'coneDistance': m * np.hypot(z, z1) / 2,
+        'rootDia': z * m - 2 * ded, 'rootDia1': z1 * m - 2 * ded,
+        'backConeRadius': backConeRadius, 'backConeRadius1': backConeRadius1,
+        'virtualTeeth': virtualTeeth, 'virtualTeeth1': virtualTeeth1,
+        'contactRatio': theoreticalContactRatio(backConeRadius, backConeRadius1, m, np.radians(pa)),
+        'undercut': virtualTeeth1 < minTeeth,
+    }
+
+
+# Sorts a table by rank and keeps the first limit rows.
+def _rank(table, targetRatio, limit):
+    keys = [-table['virtualTeeth1'], table['pitchDia']]
+    if targetRatio is not None:
+        keys.append(np.abs(table['ratio'] - targetRatio))
+    order = np.lexsort(keys)[:limit]
+    return {name: table[name][order] for name in COLUMNS}
+
+
+# Evaluates every combination of the given values. Each argument is a
+# sequence (or scalar). Returns a dict of 1D arrays, one entry per COLUMNS
+# name, holding only the feasible gear sets sorted by rank. When targetRatio is
+# given sets closest to it come first, otherwise the smallest wheel pitch
+# diameter does; ties are broken by the larger pinion virtual tooth count.
+# The grid is evaluated in blocks of wheel tooth counts, keeping only the best
+# limit sets of each block, so large sweeps with a limit run in bounded memory.
+def sweep(numTeeth, numTeeth1, module, pressureAngle=(20.0,), holeDiam=(8.0,), targetRatio=None, limit=None,
+          thickness=(10.0,)):
+    axes = [np.asarray(numTeeth, dtype=int).ravel(), np.asarray(numTeeth1, dtype=int).ravel(),
+            np.asarray(module, dtype=float).ravel(), np.asarray(pressureAngle, dtype=float).ravel(),
+            np.asarray(holeDiam, dtype=float).ravel(), np.asarray(thickness, dtype=float).ravel()]
+    perTooth = max(1, len(axes[1]) * len(axes[2]) * len(axes[3]) * len(axes[4]) * len(axes[5]))
+    step = max(1, BLOCK_SIZE // perTooth)
+
+    blocks = []
+    for start in range(0, len(axes[0]), step):
+        block = _evaluateBlock([axes[0][start:start + step]] + axes[1:])
+        blocks.append(_rank(block, targetRatio, limit) if limit is not None else block)
+
+    if not blocks:
+        return {name: np.empty(0) for name in COLUMNS}
+    table = {name: np.concatenate([b[name] for b in blocks]) for name in COLUMNS}
+    return _rank(table, targetRatio, limit)
+
+
+# Parses '10:60' (inclusive), '10:60:5' or '0.5,1,2' into a list of values.
+def parseRange(text, kind=float):
+    if ':' in text:
+        parts = [kind(p) for p in text.split(':')]
+        step = parts[2] if len(parts) > 2 else 1
+        return np.arange(parts[0], parts[1] + step / 2, step)
+    return [kind(p) for p in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gearlib.sweep', description='List feasible bevel gear sets over ranges of parameters.')
+    parser.add_argument('--teeth', required=True, help='wheel teeth, e.g. 10:60 or 20,30,40')
+    parser.add_argument('--teeth1', required=True, help='pinion teeth')
+    parser.add_argument('--module', required=True, help='module in mm')
+    parser.add_argument('--pressure-angle', default='20', help='pressure angle in degrees')
+    parser.add_argument('--hole', default='8', help='hole diameter in mm')
+    parser.add_argument('--thickness', default='10', help='gear thickness (face width) in mm')
+    parser.add_argument('--ratio', type=float, default=None, help='rank by closeness to this wheel/pinion ratio')
+    parser.add_argument('--top', type=int, default=None, help='only list the best N sets')
+    args = parser.parse_args(argv)
+
+    table = sweep(parseRange(args.teeth, int), parseRange(args.teeth1, int), parseRange(args.module),
+                  parseRange(args.pressure_angle), parseRange(args.hole), args.ratio, args.top,
+                  parseRange(args.thickness))
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(COLUMNS)
+    for row in zip(*(table[name].tolist() for name in COLUMNS)):
+        writer.writerow(row)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# Index of the faces of a B-rep body, built once per body so features like
+# the shaft hole can ask for "the planar face farthest from the apex along
+# this axis" in one lookup, rather than scanning the faces and relying on the
+# order the kernel returns them in. Faces are kept as opaque objects; the
+# caller passes in their geometry as plain tuples, so the index works without
+# Fusion.
+
+import collections
+import math
+
+
+# Fusion's SurfaceTypes.PlaneSurfaceType.
+PLANE = 0
+
+# Unit normals closer than this (per component) are grouped together.
+NORMAL_TOLERANCE = 1e-6
+
+FaceEntry = collections.namedtuple('FaceEntry', ['face', 'surfaceType', 'normal', 'point'])
+
+
+def _unit(vector):
+    length = math.sqrt(sum(c * c for c in vector))
+    return tuple(c / length for c in vector)
+
+
+# Key for grouping a plane normal. A plane and its flipped normal share the
+# key, so faces on either side of a body are found by the same axis.
+def _normalKey(normal):
+    normal = _unit(normal)
+    if next(c for c in normal if abs(c) > NORMAL_TOLERANCE) < 0:
+        normal = tuple(-c for c in normal)
+    return tuple(round(c / NORMAL_TOLERANCE) for c in normal)
+
+
+class FaceIndex:
+    '''
+    Faces of one body grouped by surface type and, for planar faces, by
+    normal. Planar faces along an axis are sorted by their distance along it
+    on first use and the order is kept for later queries.
+    '''
+    def __init__(self):
+        self._byType = collections.defaultdict(list)
+        self._planes = collections.defaultdict(list)
+        self._along = {}
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._byType.values())
+
+    # Adds a face. Planar faces need their normal and a point on the plane as
+    # (x, y, z) tuples.
+    def add(self, face, surfaceType, normal=None, point=None):
+        entry = FaceEntry(face, surfaceType, normal, point)
+        self._byType[surfaceType].append(entry)
+        if surfaceType == PLANE:
+            self._planes[_normalKey(normal)].append(entry)
+            self._along.clear()
+        return entry
+
+    # Faces of one surface type, in the order they were added.
+    def faces(self, surfaceType):
+        return [entry.face for entry in self._byType.get(surfaceType, ())]
+
+    # Planar faces perpendicular to the axis through origin along direction,
+    # as (distance along the axis, face) sorted by distance.
+    def planesAlong(self, origin, direction):
+        direction = _unit(direction)
+        key = (tuple(origin), direction)
+        planes = self._along.get(key)
+        if planes is None:
+            entries = self._planes.get(_normalKey(direction), ())
+            planes = [(sum((p - o) * d for p, o, d in zip(entry.point, origin, direction)), entry.face)
+                      for entry in entries]
+            planes.sort(key=lambda plane: plane[0])
+            self._along[key] = planes
+        return planes
+
+    # The planar face perpendicular to the axis nearest to, or farthest from,
+    # origin along direction, or None if there isn't one.
+    def nearestPlane(self, origin, direction):
+        planes = self.planesAlong(origin, direction)
+        return planes[0][1] if planes else None
+
+    def farthestPlane(self, origin, direction):
+        planes = self.planesAlong(origin, direction)
+        return planes[-1][1] if planes else None
@@ -0,0 +1,141 @@
+# Layout and instancing for assemblies of bevel gear sets: gear trains, where
+# each stage's wheel sits on the shaft of the stage before's pinion, and
+# differentials, where the wheel of a gear set is the side gear and several
+# copies of its pinion carry a second side gear. Gear sets and gears with the
+# same parameters have the same geometry, so Gears.py builds each one once and
+# places the others as more occurrences of its component; parameterHash is
+# the key it uses and Instancer keeps the score.
+#
+# Transforms are 4x4 row major nested tuples that map a gear set's own frame,
+# as drawGearSet builds it, into its parent's. In that frame the wheel axis
+# is z, the cone apex is at (0, 0, pitchDia1/2) and the pinion axis runs
+# along x through the apex. Lengths are in cm.
+
+import hashlib
+import math
+
+
+IDENTITY = ((1.0, 0.0, 0.0, 0.0), (0.0, 1.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, 0.0, 0.0, 1.0))
+
+# Gap between a stage's pinion and the next stage's wheel on the same shaft.
+STAGE_GAP = 0.5
+
+
+# Short hash of a gear set's parameters plus anything else that changes what
+# gets built, e.g. the builder or the number of differential pinions.
+def parameterHash(spec, *extra):
+    return hashlib.sha1(repr((spec.key,) + extra).encode()).hexdigest()[:16]
+
+
+def multiply(a, b):
+    return tuple(tuple(sum(a[i][k] * b[k][j] for k in range(4)) for j in range(4)) for i in range(4))
+
+
+def translation(x, y, z):
+    return ((1.0, 0.0, 0.0, x), (0.0, 1.0, 0.0, y), (0.0, 0.0, 1.0, z), (0.0, 0.0, 0.0, 1.0))
+
+
+# Rotation by angle about the axis through origin along a coordinate axis
+# (0, 1 or 2 for x, y or z).
+def rotation(axis, angle, origin=(0.0, 0.0, 0.0)):
+    c, s = math.cos(angle), math.sin(angle)
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    cells = [list(row) for row in IDENTITY]
+    cells[i][i], cells[i][j], cells[j][i], cells[j][j] = c, -s, s, c
+    around = tuple(tuple(row) for row in cells)
+    return multiply(translation(*origin), multiply(around, translation(*(-o for o in origin))))
+
+
+# The cone apex, where the wheel and pinion axes cross.
+def apex(spec):
+    return (0.0, 0.0, -spec.crossSection.coneCenter[1])
+
+
+# Where the next stage of a train goes in this stage's frame: its wheel on
+# this stage's pinion shaft, back to back with the pinion, STAGE_GAP apart.
+# The next stage's z axis becomes this stage's x axis.
+def stageTransform(spec, nextSpec, gap=STAGE_GAP):
+    pinionBack = spec.crossSection.pinion.coneA[0]
+    nextWheelBack = -nextSpec.crossSection.wheel.coneA[1]
+    place = translation(pinionBack + gap - nextWheelBack, 0.0, apex(spec)[2])
+    return multiply(place, rotation(1, math.pi / 2))
+
+
+# Transforms placing each stage of a train of specs, in the first's frame.
+def trainTransforms(specs, gap=STAGE_GAP):
+    transforms = [IDENTITY]
+    for spec, nextSpec in zip(specs, specs[1:]):
+        transforms.append(multiply(transforms[-1], stageTransform(spec, nextSpec, gap)))
+    return transforms
+
+
+# Why a gear set can't be a differential with this many pinions, or '' if
+# it can. Every pinion has to mesh the wheel where it is placed, which needs
+# the wheel teeth to divide evenly between them, and the second side gear,
+# the wheel turned half way about the pinion axis, only meshes a pinion
+# that looks the same turned half way, one with an even number of teeth.
+def differentialError(spec, pinions):
+    if pinions == 0:
+        return ''
+    if pinions < 2:
+        return 'A differential needs at least 2 pinions.'
+    if spec.numTeeth % pinions:
+        return 'The wheel teeth must be a multiple of the number of differential pinions.'
+    if spec.numTeeth1 % 2:
+        return 'A differential needs an even number of pinion teeth.'
+    pinionBack = spec.crossSection.pinion.coneA[0]
+    if math.atan2((spec.numTeeth1 + 2) * spec.moduleCm / 2, pinionBack) >= math.pi / pinions:
+        return 'The differential pinions would overlap, use fewer of them.'
+    return ''
+
+
+# Transforms for the gears a differential adds to a gear set, in the gear
+# set's frame: the second side gear (the wheel turned half way about the
+# pinion axis) and the pinions after the first, spaced evenly about the
+# wheel axis.
+def differentialTransforms(spec, pinions):
+    sideGear = rotation(0, math.pi, apex(spec))
+    extraPinions = [rotation(2, 2 * math.pi * k / pinions) for k in range(1, pinions)]
+    return sideGear, extraPinions
+
+
+class Instancer:
+    '''
+    The components built so far by parameter hash, and what placing more
+    occurrences of them saved compared to building them again.
+    '''
+    def __init__(self):
+        self._built = {}
+        self.built = 0
+        self.instances = 0
+        self.savedSeconds = 0.0
+        self.savedBodies = 0
+        self.savedTimelineObjects = 0
+
+    # Records a component built for key and what building it cost.
+    def add(self, key, item, seconds, bodies=0, timelineObjects=0):
+        self._built[key] = (item, (seconds, bodies, timelineObjects))
+        self.built += 1
+
+    # The component built for key, counting its cost as saved, or None.
+    def find(self, key):
+        if key not in self._built:
+            return None
+        item, cost = self._built[key]
+        self.saved(*cost)
+        return item
+
+    # Counts one more instance that saved the given build cost.
+    def saved(self, seconds, bodies=0, timelineObjects=0):
+        self.instances += 1
+        self.savedSeconds += seconds
+        self.savedBodies += bodies
+        self.savedTimelineObjects += timelineObjects
+
+    def report(self):
+        return {'built': self.built, 'instances': self.instances, 'savedSeconds': self.savedSeconds,
+                'savedBodies': self.savedBodies, 'savedTimelineObjects': self.savedTimelineObjects}
+
+    def summary(self):
+        return ('Placed %d instances, saving about %.2fs, %d bodies and %d timeline objects'
+                % (self.instances, self.savedSeconds, self.savedBodies, self.savedTimelineObjects))
@@ -0,0 +1,69 @@
+# Incremental validation for the command dialog. Expression values are
+# memoized so repeated events don't go back to the units manager, and each
+# rule only reruns when one of the inputs it depends on has changed.
+
+import collections
+
+from .spec import FIELDS
+
+
+# Memoizes evaluated value expressions by (expression, unitType). evaluate is
+# called on a miss and returns (isValid, value) like getCommandInputValue.
+class ExpressionCache:
+    def __init__(self, evaluate, maxSize=512):
+        self.evaluate = evaluate
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._values = collections.OrderedDict()
+
+    def value(self, expression, unitType):
+        key = (expression, unitType)
+        result = self._values.get(key)
+        if result is not None:
+            self.hits += 1
+            self._values.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = self.evaluate(expression, unitType)
+        self._values[key] = result
+        while len(self._values) > self.maxSize:
+            self._values.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Runs spec.RULES (or any rules with the same shape) against a stream of
+# GearSpecs, rerunning only the rules whose dependencies changed since the
+# previous call. formatLength must give the same text for the same length for
+# as long as the engine is used.
+class ValidationEngine:
+    def __init__(self, rules):
+        self.rules = rules
+        self.evaluations = 0
+        self._values = {}
+        self._results = {}
+
+    def validate(self, spec, formatLength=str):
+        values = {name: getattr(spec, name) for name in FIELDS}
+        changed = {name for name, value in values.items() if self._values.get(name) != value}
+        self._values = values
+
+        for rule in self.rules:
+            if rule.name not in self._results or changed & rule.dependencies:
+                self.evaluations += 1
+                self._results[rule.name] = rule.check(spec, formatLength)
+
+        for rule in self.rules:
+            if self._results[rule.name]:
+                return self._results[rule.name]
+        return ''
+
+    def reset(self):
+        self._values = {}
+        self._results = {}
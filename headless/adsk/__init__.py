@@ -0,0 +1,116 @@
+# Recording stand-in for the parts of the Fusion 360 adsk package used by
+# Gears.py. Put the headless folder at the front of sys.path to use it. Every
+# method call, property read and property write on an API object is logged to
+# adsk.recorder, so a headless run reports how many API round trips the same
+# code would make inside Fusion.
+
+import collections
+import functools
+
+
+class Recorder:
+    def __init__(self):
+        self.enabled = True
+        self.keepCalls = True
+        self.reset()
+
+    def reset(self):
+        self.calls = []
+        self.counts = collections.Counter()
+
+    def record(self, name, args=()):
+        if not self.enabled:
+            return
+        self.counts[name] += 1
+        if self.keepCalls:
+            self.calls.append((name, args))
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    # Total calls whose name starts with prefix, e.g. 'SketchLines.'.
+    def countOf(self, prefix):
+        return sum(n for name, n in self.counts.items() if name.startswith(prefix))
+
+
+recorder = Recorder()
+
+
+# Base class of every stand-in API object. Public attribute access goes
+# through the recorder; state the stand-in keeps for itself lives in
+# underscore attributes, which are not recorded.
+class ApiObject:
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if name.startswith('_'):
+            return value
+        qualified = type(self).__name__ + '.' + name
+        if callable(value) and not isinstance(value, (ApiObject, type)):
+            @functools.wraps(value)
+            def call(*args, **kwargs):
+                recorder.record(qualified, args)
+                return value(*args, **kwargs)
+            return call
+        recorder.record(qualified)
+        return value
+
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            recorder.record(type(self).__name__ + '.' + name + '=', (value,))
+        object.__setattr__(self, name, value)
+
+    # Sets attributes without recording, for the stand-in's own use.
+    def _init(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def cast(cls, obj):
+        recorder.record(cls.__name__ + '.cast', (obj,))
+        return obj if isinstance(obj, cls) else None
+
+    @property
+    def isValid(self):
+        return True
+
+    @property
+    def objectType(self):
+        return type(self).__module__ + '::' + type(self).__name__
+
+
+# Records a call to a static or class level API function.
+def recorded(function):
+    qualified = function.__qualname__
+
+    @functools.wraps(function)
+    def call(*args, **kwargs):
+        recorder.record(qualified, args)
+        return function(*args, **kwargs)
+    return call
+
+
+_autoTerminate = True
+_terminated = False
+
+
+def autoTerminate(value):
+    global _autoTerminate
+    recorder.record('adsk.autoTerminate', (value,))
+    _autoTerminate = value
+
+
+def terminate():
+    global _terminated
+    recorder.record('adsk.terminate')
+    _terminated = True
+
+
+# Delivers custom events fired with Application.fireCustomEvent.
+def doEvents():
+    recorder.record('adsk.doEvents')
+    from . import core
+    core.Application.get()._deliverCustomEvents()
+
+
+from . import core, fusion
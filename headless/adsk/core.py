@@ -0,0 +1,821 @@
+# Stand-in for adsk.core: geometry, collections, the application, user
+# interface, commands, command inputs and events.
+
+import math
+import queue
+import re
+
+from . import ApiObject, recorder, recorded
+
+
+class Base(ApiObject):
+    pass
+
+
+##### Geometry
+
+class Point3D(ApiObject):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self._init(x=float(x), y=float(y), z=float(z))
+
+    @staticmethod
+    @recorded
+    def create(x=0.0, y=0.0, z=0.0):
+        return Point3D(x, y, z)
+
+    def distanceTo(self, other):
+        return ((self._x() - other._x()) ** 2 + (self._y() - other._y()) ** 2 + (self._z() - other._z()) ** 2) ** 0.5
+
+    def copy(self):
+        return Point3D(self._x(), self._y(), self._z())
+
+    def vectorTo(self, point):
+        return Vector3D(point._x() - self._x(), point._y() - self._y(), point._z() - self._z())
+
+    # Unrecorded coordinate access for the stand-in itself.
+    def _x(self):
+        return object.__getattribute__(self, 'x')
+
+    def _y(self):
+        return object.__getattribute__(self, 'y')
+
+    def _z(self):
+        return object.__getattribute__(self, 'z')
+
+    def _xyz(self):
+        return (self._x(), self._y(), self._z())
+
+    def __repr__(self):
+        return 'Point3D(%g, %g, %g)' % self._xyz()
+
+
+class Vector3D(ApiObject):
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self._init(x=float(x), y=float(y), z=float(z))
+
+    @staticmethod
+    @recorded
+    def create(x=0.0, y=0.0, z=0.0):
+        return Vector3D(x, y, z)
+
+    def _xyz(self):
+        return tuple(object.__getattribute__(self, name) for name in 'xyz')
+
+    def dotProduct(self, vector):
+        return sum(a * b for a, b in zip(self._xyz(), vector._xyz()))
+
+    def crossProduct(self, vector):
+        (ax, ay, az), (bx, by, bz) = self._xyz(), vector._xyz()
+        return Vector3D(ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx)
+
+
+class Matrix3D(ApiObject):
+    def __init__(self):
+        self._cells = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+    @staticmethod
+    @recorded
+    def create():
+        return Matrix3D()
+
+    def setCell(self, row, column, value):
+        self._cells[row][column] = float(value)
+        return True
+
+    def getCell(self, row, column):
+        return self._cells[row][column]
+
+    def setWithArray(self, cells):
+        self._cells = [[float(cell) for cell in cells[row * 4:row * 4 + 4]] for row in range(4)]
+        return True
+
+    # Rotation by angle about the axis through origin (Rodrigues' formula).
+    def setToRotation(self, angle, axis, origin):
+        x, y, z = (object.__getattribute__(axis, name) for name in 'xyz')
+        length = (x * x + y * y + z * z) ** 0.5
+        x, y, z = x / length, y / length, z / length
+        c, s = math.cos(angle), math.sin(angle)
+        t = 1 - c
+        rotation = [[t * x * x + c, t * x * y - s * z, t * x * z + s * y],
+                    [t * x * y + s * z, t * y * y + c, t * y * z - s * x],
+                    [t * x * z - s * y, t * y * z + s * x, t * z * z + c]]
+        point = origin._xyz()
+        for i in range(3):
+            self._cells[i][:3] = rotation[i]
+            self._cells[i][3] = point[i] - sum(rotation[i][j] * point[j] for j in range(3))
+        return True
+
+    @property
+    def translation(self):
+        return Vector3D(self._cells[0][3], self._cells[1][3], self._cells[2][3])
+
+    @translation.setter
+    def translation(self, vector):
+        self._cells[0][3] = object.__getattribute__(vector, 'x')
+        self._cells[1][3] = object.__getattribute__(vector, 'y')
+        self._cells[2][3] = object.__getattribute__(vector, 'z')
+
+    def copy(self):
+        matrix = Matrix3D()
+        matrix._cells = [row[:] for row in self._cells]
+        return matrix
+
+
+class BoundingBox3D(ApiObject):
+    def __init__(self, minPoint, maxPoint):
+        self._init(_minPoint=minPoint, _maxPoint=maxPoint)
+
+    @staticmethod
+    @recorded
+    def create(minPoint, maxPoint):
+        return BoundingBox3D(minPoint.copy(), maxPoint.copy())
+
+    @property
+    def minPoint(self):
+        return self._minPoint
+
+    @property
+    def maxPoint(self):
+        return self._maxPoint
+
+
+class NurbsCurve3D(ApiObject):
+    def __init__(self, controlPoints, degree, knots, isRational, weights, isPeriodic):
+        self._init(_controlPoints=list(controlPoints), _degree=degree, _knots=list(knots),
+                   _isRational=isRational, _weights=list(weights or []), _isPeriodic=isPeriodic)
+
+    @staticmethod
+    @recorded
+    def createNonRational(controlPoints, degree, knots, isPeriodic):
+        return NurbsCurve3D(controlPoints, degree, knots, False, None, isPeriodic)
+
+    @property
+    def controlPointCount(self):
+        return len(self._controlPoints)
+
+    @property
+    def degree(self):
+        return self._degree
+
+    @property
+    def controlPoints(self):
+        return list(self._controlPoints)
+
+    @property
+    def knots(self):
+        return list(self._knots)
+
+
+##### Collections
+
+class Collection(ApiObject):
+    def __init__(self, items=None):
+        self._items = list(items or [])
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def item(self, index):
+        return self._items[index] if 0 <= index < len(self._items) else None
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+
+class ObjectCollection(Collection):
+    @staticmethod
+    @recorded
+    def create():
+        return ObjectCollection()
+
+    def add(self, item):
+        self._items.append(item)
+        return True
+
+    def clear(self):
+        self._items.clear()
+        return True
+
+
+##### Values
+
+class ValueInput(ApiObject):
+    def __init__(self, realValue=None, stringValue=None):
+        self._init(_realValue=realValue, _stringValue=stringValue)
+
+    @staticmethod
+    @recorded
+    def createByReal(value):
+        return ValueInput(realValue=float(value))
+
+    @staticmethod
+    @recorded
+    def createByString(value):
+        return ValueInput(stringValue=value)
+
+    @property
+    def realValue(self):
+        return self._realValue
+
+    @property
+    def stringValue(self):
+        return self._stringValue
+
+
+# Internal units are cm and radians, like Fusion.
+_UNIT_SCALE = {'mm': 0.1, 'cm': 1.0, 'm': 100.0, 'in': 2.54, 'ft': 30.48,
+               'deg': 3.141592653589793 / 180, 'rad': 1.0, '': 1.0}
+
+_EXPRESSION = re.compile(r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([a-z]*)\s*$')
+
+
+# Evaluates a plain number with an optional unit, the subset of Fusion
+# expressions the stand-in understands. Returns None if it can't.
+def _evaluate(expression, unitType):
+    match = _EXPRESSION.match(expression or '')
+    if not match:
+        return None
+    unit = match.group(2) or unitType or ''
+    if unit not in _UNIT_SCALE:
+        return None
+    return float(match.group(1)) * _UNIT_SCALE[unit]
+
+
+def _format(value, unitType):
+    scale = _UNIT_SCALE.get(unitType or '', 1.0)
+    return ('%.6g %s' % (value / scale, unitType)).strip()
+
+
+##### Events
+
+class Event(ApiObject):
+    def __init__(self, name=''):
+        self._init(_name=name, _handlers=[])
+
+    def add(self, handler):
+        self._handlers.append(handler)
+        return True
+
+    def remove(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+        return True
+
+    def _fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+
+
+class CommandCreatedEvent(Event):
+    pass
+
+
+class CommandEvent(Event):
+    pass
+
+
+class InputChangedEvent(Event):
+    pass
+
+
+class ValidateInputsEvent(Event):
+    pass
+
+
+class CustomEvent(Event):
+    pass
+
+
+# Handler base classes. Gears.py subclasses these and overrides notify.
+class CommandCreatedEventHandler:
+    def __init__(self):
+        pass
+
+
+class CommandEventHandler:
+    def __init__(self):
+        pass
+
+
+class InputChangedEventHandler:
+    def __init__(self):
+        pass
+
+
+class ValidateInputsEventHandler:
+    def __init__(self):
+        pass
+
+
+class CustomEventHandler:
+    def __init__(self):
+        pass
+
+
+class EventArgs(ApiObject):
+    pass
+
+
+class CommandCreatedEventArgs(EventArgs):
+    def __init__(self, command):
+        self._init(_command=command)
+
+    @property
+    def command(self):
+        return self._command
+
+
+class CommandEventArgs(EventArgs):
+    def __init__(self, command):
+        self._init(_command=command, isValidResult=True, executeFailed=False, executeFailedMessage='')
+
+    @property
+    def command(self):
+        return self._command
+
+
+class InputChangedEventArgs(EventArgs):
+    def __init__(self, input, inputs):
+        self._init(_input=input, _inputs=inputs)
+
+    @property
+    def input(self):
+        return self._input
+
+    @property
+    def inputs(self):
+        return self._inputs
+
+
+class ValidateInputsEventArgs(EventArgs):
+    def __init__(self, inputs):
+        self._init(_inputs=inputs, areInputsValid=True)
+
+    @property
+    def inputs(self):
+        return self._inputs
+
+
+class CustomEventArgs(EventArgs):
+    def __init__(self, additionalInfo=''):
+        self._init(_additionalInfo=additionalInfo)
+
+    @property
+    def additionalInfo(self):
+        return self._additionalInfo
+
+
+##### Command inputs
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    CheckBoxDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+class CommandInput(ApiObject):
+    def __init__(self, id, name):
+        self._init(_id=id, _name=name, isVisible=True, isEnabled=True, isFullWidth=False, tooltip='')
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def name(self):
+        return self._name
+
+
+class ListItem(ApiObject):
+    def __init__(self, name, isSelected):
+        self._init(_name=name, _isSelected=isSelected)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def isSelected(self):
+        return self._isSelected
+
+
+class ListItems(Collection):
+    def add(self, name, isSelected, icon=''):
+        if isSelected:
+            for listItem in self._items:
+                listItem._isSelected = False
+        listItem = ListItem(name, isSelected)
+        self._items.append(listItem)
+        return listItem
+
+
+class DropDownCommandInput(CommandInput):
+    def __init__(self, id, name, style):
+        super().__init__(id, name)
+        self._init(_listItems=ListItems(), _style=style)
+
+    @property
+    def listItems(self):
+        return self._listItems
+
+    @property
+    def selectedItem(self):
+        for listItem in self._listItems._items:
+            if listItem._isSelected:
+                return listItem
+        return None
+
+    def _select(self, name):
+        for listItem in self._listItems._items:
+            listItem._isSelected = listItem._name == name
+
+
+class ValueCommandInput(CommandInput):
+    def __init__(self, id, name, unitType, initialValue):
+        super().__init__(id, name)
+        if initialValue._realValue is not None:
+            expression = _format(initialValue._realValue, unitType)
+        else:
+            expression = initialValue._stringValue
+        self._init(_unitType=unitType, _expression=expression)
+
+    @property
+    def unitType(self):
+        return self._unitType
+
+    @property
+    def expression(self):
+        return self._expression
+
+    @expression.setter
+    def expression(self, value):
+        self._expression = value
+
+    @property
+    def value(self):
+        value = _evaluate(self._expression, self._unitType)
+        return 0.0 if value is None else value
+
+    @value.setter
+    def value(self, value):
+        self._expression = _format(value, self._unitType)
+
+    @property
+    def isValidExpression(self):
+        return _evaluate(self._expression, self._unitType) is not None
+
+
+class StringValueCommandInput(CommandInput):
+    def __init__(self, id, name, value):
+        super().__init__(id, name)
+        self._init(value=value)
+
+
+class BoolValueCommandInput(CommandInput):
+    def __init__(self, id, name, isCheckBox, resourceFolder, value):
+        super().__init__(id, name)
+        self._init(value=value, _isCheckBox=isCheckBox)
+
+
+class TextBoxCommandInput(CommandInput):
+    def __init__(self, id, name, text, numRows, isReadOnly):
+        super().__init__(id, name)
+        self._init(text=text, numRows=numRows, _isReadOnly=isReadOnly)
+
+
+class CommandInputs(Collection):
+    def __init__(self, command):
+        super().__init__()
+        self._command = command
+
+    def _add(self, commandInput):
+        self._items.append(commandInput)
+        return commandInput
+
+    def addDropDownCommandInput(self, id, name, dropDownStyle):
+        return self._add(DropDownCommandInput(id, name, dropDownStyle))
+
+    def addValueInput(self, id, name, unitType, initialValue):
+        return self._add(ValueCommandInput(id, name, unitType, initialValue))
+
+    def addStringValueInput(self, id, name, initialValue=''):
+        return self._add(StringValueCommandInput(id, name, initialValue))
+
+    def addBoolValueInput(self, id, name, isCheckBox, resourceFolder='', initialValue=False):
+        return self._add(BoolValueCommandInput(id, name, isCheckBox, resourceFolder, initialValue))
+
+    def addTextBoxCommandInput(self, id, name, formattedText, numRows, isReadOnly):
+        return self._add(TextBoxCommandInput(id, name, formattedText, numRows, isReadOnly))
+
+    def itemById(self, id):
+        for commandInput in self._items:
+            if commandInput._id == id:
+                return commandInput
+        return None
+
+    @property
+    def command(self):
+        return self._command
+
+
+##### Commands
+
+class Command(ApiObject):
+    def __init__(self, definition):
+        self._init(_definition=definition, _isValid=True, isExecutedWhenPreEmpted=True,
+                   _commandInputs=None, _execute=CommandEvent('execute'),
+                   _executePreview=CommandEvent('executePreview'),
+                   _inputChanged=InputChangedEvent('inputChanged'),
+                   _validateInputs=ValidateInputsEvent('validateInputs'),
+                   _destroy=CommandEvent('destroy'))
+        self._commandInputs = CommandInputs(self)
+
+    @property
+    def parentCommandDefinition(self):
+        return self._definition
+
+    @property
+    def commandInputs(self):
+        return self._commandInputs
+
+    @property
+    def isValid(self):
+        return self._isValid
+
+    @property
+    def execute(self):
+        return self._execute
+
+    @property
+    def executePreview(self):
+        return self._executePreview
+
+    @property
+    def inputChanged(self):
+        return self._inputChanged
+
+    @property
+    def validateInputs(self):
+        return self._validateInputs
+
+    @property
+    def destroy(self):
+        return self._destroy
+
+    # Shows the preview. Whatever the preview creates is rolled back
+    # afterwards, the way Fusion discards it before the next event.
+    def doExecutePreview(self):
+        if self._validate():
+            design = Application._instance._activeProduct
+            mark = design._mark()
+            self._executePreview._fire(CommandEventArgs(self))
+            design._rollback(mark)
+        return True
+
+    # Clicks OK: validates, executes and, when terminate is True, closes the
+    # dialog. Returns whether the execute event ran.
+    def doExecute(self, terminate=True):
+        executed = self._validate()
+        if executed:
+            self._execute._fire(CommandEventArgs(self))
+        if terminate:
+            self._close()
+        return executed
+
+    def _validate(self):
+        args = ValidateInputsEventArgs(self._commandInputs)
+        self._validateInputs._fire(args)
+        return object.__getattribute__(args, 'areInputsValid')
+
+    def _close(self):
+        if self._isValid:
+            self._destroy._fire(CommandEventArgs(self))
+            self._isValid = False
+
+    # Sets an input the way a user would and fires the resulting events.
+    # value is an expression for value inputs, text for string inputs, an
+    # item name for drop downs and a bool for check boxes.
+    def _changeInput(self, id, value):
+        commandInput = [i for i in self._commandInputs._items if i._id == id][0]
+        if isinstance(commandInput, ValueCommandInput):
+            commandInput._expression = value
+        elif isinstance(commandInput, DropDownCommandInput):
+            commandInput._select(value)
+        else:
+            object.__setattr__(commandInput, 'value', value)
+        self._inputChanged._fire(InputChangedEventArgs(commandInput, self._commandInputs))
+        self.doExecutePreview()
+
+
+class CommandDefinition(ApiObject):
+    def __init__(self, id, name, tooltip, resourceFolder):
+        self._init(_id=id, _name=name, tooltip=tooltip, _resourceFolder=resourceFolder,
+                   _commandCreated=CommandCreatedEvent('commandCreated'), _lastCommand=None)
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def commandCreated(self):
+        return self._commandCreated
+
+    # Opens the command dialog: fires commandCreated and then the first
+    # validate and preview, like Fusion does when the dialog appears. The
+    # command is kept in _lastCommand so a harness can drive it.
+    def execute(self, input=None):
+        command = Command(self)
+        self._lastCommand = command
+        self._commandCreated._fire(CommandCreatedEventArgs(command))
+        command.doExecutePreview()
+        return True
+
+    def deleteMe(self):
+        definitions = Application.get()._ui._commandDefinitions
+        definitions._items = [d for d in definitions._items if d is not self]
+        return True
+
+
+class CommandDefinitions(Collection):
+    def itemById(self, id):
+        for definition in self._items:
+            if definition._id == id:
+                return definition
+        return None
+
+    def addButtonDefinition(self, id, name, tooltip, resourceFolder=''):
+        definition = CommandDefinition(id, name, tooltip, resourceFolder)
+        self._items.append(definition)
+        return definition
+
+
+class CommandControl(ApiObject):
+    def __init__(self, definition):
+        self._init(_definition=definition, isPromoted=False, isVisible=True)
+
+    @property
+    def commandDefinition(self):
+        return self._definition
+
+    def deleteMe(self):
+        return True
+
+
+class ToolbarControls(Collection):
+    def addCommand(self, definition, positionID='', isBefore=True):
+        control = CommandControl(definition)
+        self._items.append(control)
+        return control
+
+    def itemById(self, id):
+        for control in self._items:
+            if control._definition._id == id:
+                return control
+        return None
+
+
+class ToolbarPanel(ApiObject):
+    def __init__(self, id):
+        self._init(_id=id, _controls=ToolbarControls())
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def controls(self):
+        return self._controls
+
+
+class ToolbarPanels(Collection):
+    def itemById(self, id):
+        for panel in self._items:
+            if panel._id == id:
+                return panel
+        panel = ToolbarPanel(id)
+        self._items.append(panel)
+        return panel
+
+
+class ProgressDialog(ApiObject):
+    def __init__(self):
+        self._init(_isShowing=False, _wasCancelled=False, progressValue=0, maximumValue=100,
+                   minimumValue=0, message='', title='', isCancelButtonShown=True)
+
+    def show(self, title, message, minimumValue, maximumValue, delay=0):
+        self._init(title=title, message=message, minimumValue=minimumValue, maximumValue=maximumValue)
+        self._isShowing = True
+        return True
+
+    def hide(self):
+        self._isShowing = False
+        return True
+
+    @property
+    def isShowing(self):
+        return self._isShowing
+
+    @property
+    def wasCancelled(self):
+        return self._wasCancelled
+
+
+class UserInterface(ApiObject):
+    def __init__(self):
+        self._init(_commandDefinitions=CommandDefinitions(), _panels=ToolbarPanels(), _messages=[])
+
+    @property
+    def commandDefinitions(self):
+        return self._commandDefinitions
+
+    @property
+    def allToolbarPanels(self):
+        return self._panels
+
+    def messageBox(self, text, title='', buttons=0, icon=0):
+        self._messages.append(text)
+        return 0
+
+    def createProgressDialog(self):
+        return ProgressDialog()
+
+
+class Application(ApiObject):
+    _instance = None
+
+    def __init__(self):
+        self._init(_ui=UserInterface(), _activeProduct=None, _customEvents={},
+                   _pendingEvents=queue.Queue())
+
+    @staticmethod
+    @recorded
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+            from . import fusion
+            Application._instance._activeProduct = fusion.Design()
+        return Application._instance
+
+    # Throws away the application and its design, for a fresh headless run.
+    @staticmethod
+    def _reset():
+        Application._instance = None
+
+    @property
+    def userInterface(self):
+        return self._ui
+
+    @property
+    def activeProduct(self):
+        return self._activeProduct
+
+    @property
+    def version(self):
+        return 'headless'
+
+    @property
+    def pointTolerance(self):
+        return 1e-8
+
+    def registerCustomEvent(self, eventId):
+        event = self._customEvents.get(eventId)
+        if event is None:
+            event = CustomEvent(eventId)
+            self._customEvents[eventId] = event
+        return event
+
+    def unregisterCustomEvent(self, eventId):
+        return self._customEvents.pop(eventId, None) is not None
+
+    # Custom events may be fired from any thread; they are delivered by
+    # adsk.doEvents() on the calling thread, like Fusion's main thread.
+    def fireCustomEvent(self, eventId, additionalInfo=''):
+        if eventId not in self._customEvents:
+            return False
+        self._pendingEvents.put((eventId, additionalInfo))
+        return True
+
+    def _deliverCustomEvents(self):
+        while True:
+            try:
+                eventId, additionalInfo = self._pendingEvents.get_nowait()
+            except queue.Empty:
+                return
+            event = self._customEvents.get(eventId)
+            if event:
+                event._fire(CustomEventArgs(additionalInfo))
+
+
+class UserInterfaceGeneralCommand(ApiObject):
+    pass
@@ -0,0 +1,1466 @@
+# Stand-in for adsk.fusion: the design, components, sketches, construction
+# planes, features, bodies, attributes and the timeline.
+#
+# Geometry is only modeled as far as Gears.py needs it. Sketch profiles are
+# found from the sketch curves (curves are flattened to polylines), so profile
+# counts and centroids match what Fusion would report. Features track bodies
+# and faces by count and surface type, not by shape.
+
+import math
+
+from . import ApiObject, recorded
+from . import core
+
+
+class FeatureOperations:
+    JoinFeatureOperation = 0
+    CutFeatureOperation = 1
+    IntersectFeatureOperation = 2
+    NewBodyFeatureOperation = 3
+    NewComponentFeatureOperation = 4
+
+
+class CalculationAccuracy:
+    LowCalculationAccuracy = 0
+    MediumCalculationAccuracy = 1
+    HighCalculationAccuracy = 2
+    VeryHighCalculationAccuracy = 3
+
+
+class ExtentDirections:
+    PositiveExtentDirection = 0
+    NegativeExtentDirection = 1
+    SymmetricExtentDirection = 2
+
+
+class BooleanTypes:
+    DifferenceBooleanType = 0
+    IntersectBooleanType = 1
+    UnionBooleanType = 2
+
+
+class DesignTypes:
+    DirectDesignType = 0
+    ParametricDesignType = 1
+
+
+class SurfaceTypes:
+    PlaneSurfaceType = 0
+    CylinderSurfaceType = 1
+    ConeSurfaceType = 2
+    SphereSurfaceType = 3
+    TorusSurfaceType = 4
+    EllipticalCylinderSurfaceType = 5
+    EllipticalConeSurfaceType = 6
+    NurbsSurfaceType = 7
+
+
+# Points closer than this are treated as the same sketch vertex, in cm.
+_TOLERANCE = 1e-7
+
+
+##### Units
+
+class UnitsManager(ApiObject):
+    def __init__(self):
+        self._init(defaultLengthUnits='mm')
+
+    def isValidExpression(self, expression, units):
+        return core._evaluate(expression, units) is not None
+
+    def evaluateExpression(self, expression, units=''):
+        value = core._evaluate(expression, units)
+        if value is None:
+            raise RuntimeError('3 : invalid expression: ' + str(expression))
+        return value
+
+    def formatInternalValue(self, value, units='', showUnits=True):
+        scale = core._UNIT_SCALE.get(units or '', 1.0)
+        text = '%.3f' % (value / scale)
+        return text + ' ' + units if showUnits and units else text
+
+    def convert(self, value, inputUnits, outputUnits):
+        return value * core._UNIT_SCALE[inputUnits] / core._UNIT_SCALE[outputUnits]
+
+
+##### Attributes
+
+class Attribute(ApiObject):
+    def __init__(self, parent, groupName, name, value):
+        self._init(_parent=parent, _groupName=groupName, _name=name, value=value)
+
+    @property
+    def groupName(self):
+        return self._groupName
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def parent(self):
+        return self._parent
+
+    def deleteMe(self):
+        self._parent._attributes._items.remove(self)
+        return True
+
+
+class Attributes(core.Collection):
+    def __init__(self, parent):
+        super().__init__()
+        self._parent = parent
+
+    def add(self, groupName, name, value):
+        attribute = self._find(groupName, name)
+        if attribute:
+            object.__setattr__(attribute, 'value', value)
+        else:
+            attribute = Attribute(self._parent, groupName, name, value)
+            self._items.append(attribute)
+        return attribute
+
+    def itemByName(self, groupName, name):
+        return self._find(groupName, name)
+
+    def itemsByGroup(self, groupName):
+        return [attribute for attribute in self._items if attribute._groupName == groupName]
+
+    def _find(self, groupName, name):
+        for attribute in self._items:
+            if attribute._groupName == groupName and attribute._name == name:
+                return attribute
+        return None
+
+
+##### Timeline
+
+class TimelineObject(ApiObject):
+    def __init__(self, timeline, entity):
+        self._init(_timeline=timeline, _entity=entity, isSuppressed=False, isRolledBack=False)
+
+    @property
+    def index(self):
+        return self._timeline._items.index(self)
+
+    @property
+    def entity(self):
+        return self._entity
+
+
+class TimelineGroup(TimelineObject):
+    def __init__(self, timeline, startIndex, endIndex):
+        super().__init__(timeline, None)
+        self._init(name='', _startIndex=startIndex, _endIndex=endIndex, isCollapsed=True)
+
+    @property
+    def count(self):
+        return self._endIndex - self._startIndex + 1
+
+
+class TimelineGroups(core.Collection):
+    def __init__(self, timeline):
+        super().__init__()
+        self._timeline = timeline
+
+    def add(self, startIndex, endIndex):
+        group = TimelineGroup(self._timeline, startIndex, endIndex)
+        self._items.append(group)
+        return group
+
+
+class Timeline(core.Collection):
+    def __init__(self):
+        super().__init__()
+        self._init(_timelineGroups=TimelineGroups(self), _markerPosition=None)
+
+    @property
+    def timelineGroups(self):
+        return self._timelineGroups
+
+    @property
+    def markerPosition(self):
+        return len(self._items) if self._markerPosition is None else self._markerPosition
+
+    @markerPosition.setter
+    def markerPosition(self, position):
+        self._markerPosition = None if position >= len(self._items) else position
+
+    def moveToEnd(self):
+        self._markerPosition = None
+        return True
+
+    # Deletes everything after the marker, taking occurrences and their
+    # components out of the model with it.
+    def deleteAllAfterMarker(self):
+        position = self.markerPosition
+        for timelineObject in self._items[position:]:
+            timelineObject._entity._removeFromModel()
+        del self._items[position:]
+        self._markerPosition = None
+        return True
+
+    # New objects go in at the marker, like Fusion's, and the marker moves
+    # past them; with the marker at the end they are appended.
+    def _append(self, entity):
+        timelineObject = TimelineObject(self, entity)
+        if self._markerPosition is None:
+            self._items.append(timelineObject)
+        else:
+            self._items.insert(self._markerPosition, timelineObject)
+            self._markerPosition += 1
+        return timelineObject
+
+    # Takes out one object whose entity was deleted, keeping the marker
+    # between the same objects.
+    def _remove(self, timelineObject):
+        index = self._items.index(timelineObject)
+        del self._items[index]
+        if self._markerPosition is not None and index < self._markerPosition:
+            self.markerPosition = self._markerPosition - 1
+
+
+# Mixin for entities that appear on the timeline.
+class _TimelineEntity(ApiObject):
+    @property
+    def timelineObject(self):
+        return getattr(self, '_timelineObject', None)
+
+    # The timeline is only kept for parametric designs, like Fusion.
+    def _addToTimeline(self, design):
+        if design._designType == DesignTypes.ParametricDesignType:
+            self._timelineObject = design._timeline._append(self)
+
+    def _removeFromModel(self):
+        pass
+
+    # For deleteMe: takes the entity off the timeline and out of the model.
+    def _delete(self):
+        if self.timelineObject is not None:
+            self._timelineObject._timeline._remove(self._timelineObject)
+        self._removeFromModel()
+        return True
+
+
+##### Sketch geometry
+
+class Line3D(ApiObject):
+    def __init__(self, startPoint, endPoint):
+        self._init(_startPoint=startPoint, _endPoint=endPoint)
+
+    @property
+    def startPoint(self):
+        return core.Point3D(*self._startPoint._xyz())
+
+    @property
+    def endPoint(self):
+        return core.Point3D(*self._endPoint._xyz())
+
+    @property
+    def curveType(self):
+        return 0
+
+
+# Geometry of a curved profile curve; only its end points are modeled.
+class Curve3D(ApiObject):
+    def __init__(self, startPoint, endPoint, curveType):
+        self._init(_startPoint=startPoint, _endPoint=endPoint, _curveType=curveType)
+
+    @property
+    def startPoint(self):
+        return core.Point3D(*self._startPoint._xyz())
+
+    @property
+    def endPoint(self):
+        return core.Point3D(*self._endPoint._xyz())
+
+    @property
+    def curveType(self):
+        return self._curveType
+
+
+class SketchPoint(ApiObject):
+    def __init__(self, sketch, point):
+        self._init(_sketch=sketch, _point=core.Point3D(*point._xyz()), isFixed=False)
+
+    @property
+    def geometry(self):
+        return core.Point3D(*self._point._xyz())
+
+    @property
+    def worldGeometry(self):
+        return core.Point3D(*self._point._xyz())
+
+    @property
+    def parentSketch(self):
+        return self._sketch
+
+
+class SketchCurve(ApiObject):
+    def __init__(self, sketch):
+        self._init(_sketch=sketch, isConstruction=False, isFixed=False, isReference=False)
+
+    @property
+    def parentSketch(self):
+        return self._sketch
+
+    # The curve as a list of (x, y) tuples, for finding profiles.
+    def _polyline(self):
+        raise NotImplementedError
+
+    def _isProfileCurve(self):
+        return not object.__getattribute__(self, 'isConstruction')
+
+
+def _sketchPoint(sketch, point):
+    if isinstance(point, SketchPoint):
+        return point
+    return sketch._sketchPoints._add(point)
+
+
+def _xy(sketchPoint):
+    x, y, z = sketchPoint._point._xyz()
+    return (x, y)
+
+
+class SketchLine(SketchCurve):
+    def __init__(self, sketch, startSketchPoint, endSketchPoint):
+        super().__init__(sketch)
+        self._init(_start=startSketchPoint, _end=endSketchPoint)
+
+    @property
+    def startSketchPoint(self):
+        return self._start
+
+    @property
+    def endSketchPoint(self):
+        return self._end
+
+    @property
+    def geometry(self):
+        return Line3D(core.Point3D(*self._start._point._xyz()), core.Point3D(*self._end._point._xyz()))
+
+    @property
+    def length(self):
+        return math.dist(self._start._point._xyz(), self._end._point._xyz())
+
+    # Splits the line at the point nearest to splitPoint. This line becomes
+    # the first part; the second part is added to the sketch.
+    def split(self, splitPoint, createConstraints=True):
+        middle = self._sketch._sketchPoints._add(splitPoint)
+        end = self._end
+        self._end = middle
+        second = SketchLine(self._sketch, middle, end)
+        second._init(isConstruction=object.__getattribute__(self, 'isConstruction'))
+        self._sketch._addCurve(self._sketch._sketchCurves._sketchLines, second)
+        result = core.ObjectCollection()
+        result._items.extend([self, second])
+        return result
+
+    def _polyline(self):
+        return [_xy(self._start), _xy(self._end)]
+
+
+class SketchFittedSpline(SketchCurve):
+    def __init__(self, sketch, fitPoints):
+        super().__init__(sketch)
+        self._init(_fitPoints=fitPoints)
+
+    @property
+    def startSketchPoint(self):
+        return self._fitPoints[0]
+
+    @property
+    def endSketchPoint(self):
+        return self._fitPoints[-1]
+
+    @property
+    def fitPoints(self):
+        return core.ObjectCollection(self._fitPoints)
+
+    def _polyline(self):
+        return [_xy(point) for point in self._fitPoints]
+
+
+class SketchFixedSpline(SketchCurve):
+    def __init__(self, sketch, curve):
+        super().__init__(sketch)
+        points = curve._controlPoints
+        self._init(_curve=curve, _start=SketchPoint(sketch, points[0]), _end=SketchPoint(sketch, points[-1]))
+        sketch._sketchPoints._items.extend([self._start, self._end])
+
+    @property
+    def startSketchPoint(self):
+        return self._start
+
+    @property
+    def endSketchPoint(self):
+        return self._end
+
+    @property
+    def geometry(self):
+        return self._curve
+
+    # The control polygon stands in for the curve; it has the same ends.
+    def _polyline(self):
+        return [point._xyz()[:2] for point in self._curve._controlPoints]
+
+
+class SketchArc(SketchCurve):
+    _SEGMENTS = 16
+
+    def __init__(self, sketch, start, middle, end):
+        super().__init__(sketch)
+        self._init(_start=start, _middle=middle, _end=end)
+
+    @property
+    def startSketchPoint(self):
+        return self._start
+
+    @property
+    def endSketchPoint(self):
+        return self._end
+
+    def _polyline(self):
+        (ax, ay), (bx, by), (cx, cy) = _xy(self._start), self._middle, _xy(self._end)
+        d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+        if abs(d) < 1e-15:
+            return [(ax, ay), (cx, cy)]
+        ux = ((ax * ax + ay * ay) * (by - cy) + (bx * bx + by * by) * (cy - ay) + (cx * cx + cy * cy) * (ay - by)) / d
+        uy = ((ax * ax + ay * ay) * (cx - bx) + (bx * bx + by * by) * (ax - cx) + (cx * cx + cy * cy) * (bx - ax)) / d
+        radius = math.hypot(ax - ux, ay - uy)
+        a0 = math.atan2(ay - uy, ax - ux)
+        a1 = math.atan2(by - uy, bx - ux)
+        a2 = math.atan2(cy - uy, cx - ux)
+        # Sweep from start to end through the middle point.
+        sweep = (a2 - a0) % (2 * math.pi)
+        if (a1 - a0) % (2 * math.pi) > sweep:
+            sweep -= 2 * math.pi
+        points = [(ux + radius * math.cos(a0 + sweep * i / self._SEGMENTS),
+                   uy + radius * math.sin(a0 + sweep * i / self._SEGMENTS)) for i in range(1, self._SEGMENTS)]
+        return [(ax, ay)] + points + [(cx, cy)]
+
+
+class SketchCircle(SketchCurve):
+    def __init__(self, sketch, center, radius):
+        super().__init__(sketch)
+        self._init(_center=center, radius=float(radius))
+
+    @property
+    def centerSketchPoint(self):
+        return self._center
+
+    def _polyline(self):
+        return []
+
+
+class SketchPoints(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def add(self, point):
+        return self._add(point)
+
+    def _add(self, point):
+        sketchPoint = SketchPoint(self._sketch, point)
+        self._items.append(sketchPoint)
+        return sketchPoint
+
+
+class SketchLines(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByTwoPoints(self, startPoint, endPoint):
+        line = SketchLine(self._sketch, _sketchPoint(self._sketch, startPoint), _sketchPoint(self._sketch, endPoint))
+        return self._sketch._addCurve(self, line)
+
+
+class SketchFittedSplines(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def add(self, fitPoints):
+        points = [_sketchPoint(self._sketch, point) for point in fitPoints._items]
+        return self._sketch._addCurve(self, SketchFittedSpline(self._sketch, points))
+
+
+class SketchFixedSplines(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByNurbsCurve(self, nurbsCurve):
+        return self._sketch._addCurve(self, SketchFixedSpline(self._sketch, nurbsCurve))
+
+
+class SketchArcs(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByThreePoints(self, startPoint, point, endPoint):
+        start = _sketchPoint(self._sketch, startPoint)
+        end = _sketchPoint(self._sketch, endPoint)
+        x, y, z = point._xyz()
+        return self._sketch._addCurve(self, SketchArc(self._sketch, start, (x, y), end))
+
+
+class SketchCircles(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._sketch = sketch
+
+    def addByCenterRadius(self, centerPoint, radius):
+        circle = SketchCircle(self._sketch, _sketchPoint(self._sketch, centerPoint), radius)
+        return self._sketch._addCurve(self, circle)
+
+
+class SketchCurves(core.Collection):
+    def __init__(self, sketch):
+        super().__init__()
+        self._init(_sketchLines=SketchLines(sketch), _sketchFittedSplines=SketchFittedSplines(sketch),
+                   _sketchFixedSplines=SketchFixedSplines(sketch), _sketchArcs=SketchArcs(sketch),
+                   _sketchCircles=SketchCircles(sketch))
+
+    @property
+    def sketchLines(self):
+        return self._sketchLines
+
+    @property
+    def sketchFittedSplines(self):
+        return self._sketchFittedSplines
+
+    @property
+    def sketchFixedSplines(self):
+        return self._sketchFixedSplines
+
+    @property
+    def sketchArcs(self):
+        return self._sketchArcs
+
+    @property
+    def sketchCircles(self):
+        return self._sketchCircles
+
+
+class GeometricConstraint(ApiObject):
+    def __init__(self, kind, entities):
+        self._init(_kind=kind, _entities=entities)
+
+
+class GeometricConstraints(core.Collection):
+    def addTangent(self, curveOne, curveTwo):
+        constraint = GeometricConstraint('tangent', (curveOne, curveTwo))
+        self._items.append(constraint)
+        return constraint
+
+    def addCoincident(self, point, entity):
+        constraint = GeometricConstraint('coincident', (point, entity))
+        self._items.append(constraint)
+        return constraint
+
+
+##### Profiles
+
+class AreaProperties(ApiObject):
+    def __init__(self, area, centroid):
+        self._init(_area=area, _centroid=centroid)
+
+    @property
+    def area(self):
+        return self._area
+
+    @property
+    def centroid(self):
+        return core.Point3D(*self._centroid, 0)
+
+
+class ProfileCurve(ApiObject):
+    def __init__(self, entity, start, end):
+        self._init(_entity=entity, _start=start, _end=end)
+
+    @property
+    def sketchEntity(self):
+        return self._entity
+
+    @property
+    def geometry(self):
+        start, end = core.Point3D(*self._start, 0), core.Point3D(*self._end, 0)
+        if isinstance(self._entity, SketchLine):
+            return Line3D(start, end)
+        return Curve3D(start, end, 3)
+
+
+class ProfileLoop(ApiObject):
+    def __init__(self, profileCurves, isOuter):
+        self._init(_profileCurves=core.Collection(profileCurves), _isOuter=isOuter)
+
+    @property
+    def profileCurves(self):
+        return self._profileCurves
+
+    @property
+    def isOuter(self):
+        return self._isOuter
+
+
+class Profile(ApiObject):
+    def __init__(self, sketch, area, centroid, loops):
+        self._init(_sketch=sketch, _area=area, _centroid=centroid, _loops=core.Collection(loops))
+
+    def areaProperties(self, accuracy=CalculationAccuracy.LowCalculationAccuracy):
+        return AreaProperties(self._area, self._centroid)
+
+    # From the ends of the boundary curves, which is exact for lines.
+    @property
+    def boundingBox(self):
+        xs, ys = [self._centroid[0]], [self._centroid[1]]
+        for loop in self._loops._items:
+            for curve in loop._profileCurves._items:
+                radius = 0.0
+                if isinstance(curve._entity, SketchCircle):
+                    radius = object.__getattribute__(curve._entity, 'radius')
+                for x, y in (curve._start, curve._end):
+                    xs += [x - radius, x + radius]
+                    ys += [y - radius, y + radius]
+        return core.BoundingBox3D(core.Point3D(min(xs), min(ys), 0), core.Point3D(max(xs), max(ys), 0))
+
+    @property
+    def profileLoops(self):
+        return self._loops
+
+    @property
+    def parentSketch(self):
+        return self._sketch
+
+
+class Profiles(core.Collection):
+    pass
+
+
+# Segment intersection parameters (t, u) along p0->p1 and q0->q1, or None.
+def _intersect(p0, p1, q0, q1):
+    rx, ry = p1[0] - p0[0], p1[1] - p0[1]
+    sx, sy = q1[0] - q0[0], q1[1] - q0[1]
+    denominator = rx * sy - ry * sx
+    if abs(denominator) < 1e-18:
+        return None
+    qpx, qpy = q0[0] - p0[0], q0[1] - p0[1]
+    t = (qpx * sy - qpy * sx) / denominator
+    u = (qpx * ry - qpy * rx) / denominator
+    eps = 1e-9
+    if -eps <= t <= 1 + eps and -eps <= u <= 1 + eps:
+        return (min(max(t, 0.0), 1.0), min(max(u, 0.0), 1.0))
+    return None
+
+
+# Finds the bounded regions of the planar arrangement of the given curves.
+# Returns a list of (area, centroid, [(entity, start, end), ...]) with the
+# boundary of each region in counterclockwise order.
+def _regions(curves):
+    segments = []
+    for curve in curves:
+        points = curve._polyline()
+        for p0, p1 in zip(points, points[1:]):
+            if math.hypot(p1[0] - p0[0], p1[1] - p0[1]) > _TOLERANCE:
+                segments.append((curve, p0, p1, [0.0, 1.0]))
+
+    # Split the segments where they cross.
+    for i in range(len(segments)):
+        curve, p0, p1, cuts = segments[i]
+        xmin, xmax = min(p0[0], p1[0]) - _TOLERANCE, max(p0[0], p1[0]) + _TOLERANCE
+        ymin, ymax = min(p0[1], p1[1]) - _TOLERANCE, max(p0[1], p1[1]) + _TOLERANCE
+        for j in range(i + 1, len(segments)):
+            other, q0, q1, otherCuts = segments[j]
+            if max(q0[0], q1[0]) < xmin or min(q0[0], q1[0]) > xmax or \
+               max(q0[1], q1[1]) < ymin or min(q0[1], q1[1]) > ymax:
+                continue
+            hit = _intersect(p0, p1, q0, q1)
+            if hit:
+                cuts.append(hit[0])
+                otherCuts.append(hit[1])
+
+    # Merge coincident vertices and build the undirected edges.
+    vertices = []
+    index = {}
+
+    def vertex(point):
+        key = (round(point[0] / _TOLERANCE / 10), round(point[1] / _TOLERANCE / 10))
+        found = index.get(key)
+        if found is None:
+            found = len(vertices)
+            vertices.append(point)
+            index[key] = found
+        return found
+
+    edges = {}
+    for curve, p0, p1, cuts in segments:
+        cuts = sorted(set(cuts))
+        for t0, t1 in zip(cuts, cuts[1:]):
+            a = vertex((p0[0] + (p1[0] - p0[0]) * t0, p0[1] + (p1[1] - p0[1]) * t0))
+            b = vertex((p0[0] + (p1[0] - p0[0]) * t1, p0[1] + (p1[1] - p0[1]) * t1))
+            if a != b:
+                edges.setdefault((min(a, b), max(a, b)), curve)
+
+    # Drop dangling edges, they don't bound a region.
+    neighbours = {}
+    for a, b in edges:
+        neighbours.setdefault(a, set()).add(b)
+        neighbours.setdefault(b, set()).add(a)
+    dangling = [v for v, n in neighbours.items() if len(n) == 1]
+    while dangling:
+        v = dangling.pop()
+        for w in neighbours.pop(v, ()):
+            neighbours[w].discard(v)
+            edges.pop((min(v, w), max(v, w)), None)
+            if len(neighbours[w]) == 1:
+                dangling.append(w)
+
+    # Sort the edges around each vertex by angle and trace the faces, always
+    # taking the next edge clockwise from the one we arrived on.
+    around = {}
+    for v, n in neighbours.items():
+        x, y = vertices[v]
+        around[v] = sorted(n, key=lambda w: math.atan2(vertices[w][1] - y, vertices[w][0] - x))
+
+    visited = set()
+    regions = []
+    for a, b in edges:
+        for start in ((a, b), (b, a)):
+            if start in visited:
+                continue
+            loop = []
+            halfEdge = start
+            while halfEdge not in visited:
+                visited.add(halfEdge)
+                loop.append(halfEdge)
+                u, v = halfEdge
+                ring = around[v]
+                w = ring[(ring.index(u) - 1) % len(ring)]
+                halfEdge = (v, w)
+            area = cx = cy = 0.0
+            for u, v in loop:
+                (x0, y0), (x1, y1) = vertices[u], vertices[v]
+                cross = x0 * y1 - x1 * y0
+                area += cross
+                cx += (x0 + x1) * cross
+                cy += (y0 + y1) * cross
+            area /= 2
+            if area <= _TOLERANCE ** 2:
+                continue
+            centroid = (cx / (6 * area), cy / (6 * area))
+            boundary = []
+            for u, v in loop:
+                curve = edges[(min(u, v), max(u, v))]
+                if boundary and boundary[-1][0] is curve:
+                    boundary[-1] = (curve, boundary[-1][1], vertices[v])
+                else:
+                    boundary.append((curve, vertices[u], vertices[v]))
+            if len(boundary) > 1 and boundary[0][0] is boundary[-1][0]:
+                curve, start, end = boundary.pop()
+                boundary[0] = (curve, start, boundary[0][2])
+            regions.append((area, centroid, boundary))
+    return regions
+
+
+##### Sketches
+
+class Sketch(_TimelineEntity):
+    def __init__(self, component, planarEntity):
+        self._init(_component=component, _planarEntity=planarEntity, isComputeDeferred=False,
+                   name='Sketch', isVisible=True, _profiles=None)
+        self._init(_sketchPoints=SketchPoints(self), _sketchCurves=SketchCurves(self),
+                   _geometricConstraints=GeometricConstraints())
+
+    @property
+    def sketchPoints(self):
+        return self._sketchPoints
+
+    @property
+    def sketchCurves(self):
+        return self._sketchCurves
+
+    @property
+    def geometricConstraints(self):
+        return self._geometricConstraints
+
+    @property
+    def referencePlane(self):
+        return self._planarEntity
+
+    @property
+    def parentComponent(self):
+        return self._component
+
+    @property
+    def profiles(self):
+        if self._profiles is None:
+            self._profiles = self._findProfiles()
+        return self._profiles
+
+    def deleteMe(self):
+        self._component._sketches._items.remove(self)
+        return self._delete()
+
+    # Sketches on a component's xZ plane have their y axis along -z, like
+    # Fusion's. Others aren't placed in space and map to the same point.
+    def sketchToModelSpace(self, sketchPoint):
+        return core.Point3D(*self._toModel(sketchPoint._xyz()))
+
+    # Sketches on a planar face take their normal from the face's plane.
+    @property
+    def xDirection(self):
+        return core.Vector3D(*self._axes()[0])
+
+    @property
+    def yDirection(self):
+        return core.Vector3D(*self._axes()[1])
+
+    def _axes(self):
+        if self._planarEntity is self._component._xZ:
+            return (1.0, 0.0, 0.0), (0.0, 0.0, -1.0)
+        geometry = getattr(self._planarEntity, '_geometry', None)
+        if isinstance(geometry, Plane):
+            nx, ny, nz = geometry._normal
+            x = (-ny, nx, 0.0) if abs(nz) < 0.9 else (0.0, -nz, ny)
+            length = math.hypot(*x)
+            x = tuple(c / length for c in x)
+            return x, (ny * x[2] - nz * x[1], nz * x[0] - nx * x[2], nx * x[1] - ny * x[0])
+        return (1.0, 0.0, 0.0), (0.0, 1.0, 0.0)
+
+    def modelToSketchSpace(self, modelPoint):
+        x, y, z = modelPoint._xyz()
+        if self._planarEntity is self._component._xZ:
+            return core.Point3D(x, -z, y)
+        return core.Point3D(x, y, z)
+
+    def _toModel(self, point):
+        x, y, z = point
+        if self._planarEntity is self._component._xZ:
+            return (x, z, -y)
+        return (x, y, z)
+
+    def _addCurve(self, collection, curve):
+        collection._items.append(curve)
+        self._sketchCurves._items.append(curve)
+        self._profiles = None
+        return curve
+
+    def _findProfiles(self):
+        profiles = Profiles()
+        curves = [curve for curve in self._sketchCurves._items if curve._isProfileCurve()]
+
+        # A sketch on a face sees the face's own boundary as its first profile.
+        if isinstance(self._planarEntity, BRepFace):
+            profiles._items.append(Profile(self, 0.0, (0.0, 0.0), []))
+
+        for area, centroid, boundary in _regions([c for c in curves if not isinstance(c, SketchCircle)]):
+            curvesOfLoop = [ProfileCurve(curve, start, end) for curve, start, end in boundary]
+            profiles._items.append(Profile(self, area, centroid, [ProfileLoop(curvesOfLoop, True)]))
+
+        for circle in curves:
+            if isinstance(circle, SketchCircle):
+                radius = object.__getattribute__(circle, 'radius')
+                center = _xy(circle._center)
+                profiles._items.append(Profile(self, math.pi * radius * radius, center,
+                                               [ProfileLoop([ProfileCurve(circle, center, center)], True)]))
+        return profiles
+
+
+class Sketches(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, planarEntity, occurrenceForCreation=None):
+        sketch = Sketch(self._component, planarEntity)
+        sketch._addToTimeline(self._component._design)
+        self._items.append(sketch)
+        return sketch
+
+
+##### Construction planes
+
+class ConstructionPlane(_TimelineEntity):
+    def __init__(self, component, definition=None):
+        self._init(_component=component, _definition=definition, name='Plane', isLightBulbOn=True)
+
+    @property
+    def parent(self):
+        return self._component
+
+    def deleteMe(self):
+        self._component._constructionPlanes._items.remove(self)
+        return self._delete()
+
+
+class ConstructionPlaneInput(ApiObject):
+    def __init__(self):
+        self._init(_definition=None)
+
+    def setByAngle(self, linearEntity, angle, planarEntity):
+        self._definition = ('angle', linearEntity, angle, planarEntity)
+        return True
+
+    def setByOffset(self, planarEntity, offset):
+        self._definition = ('offset', planarEntity, offset)
+        return True
+
+    def setByPlane(self, plane):
+        self._definition = ('plane', plane)
+        return True
+
+
+class ConstructionPlanes(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, occurrenceForCreation=None):
+        return ConstructionPlaneInput()
+
+    def add(self, input):
+        plane = ConstructionPlane(self._component, input._definition)
+        plane._addToTimeline(self._component._design)
+        self._items.append(plane)
+        return plane
+
+
+##### Bodies
+
+class Surface(ApiObject):
+    def __init__(self, surfaceType):
+        self._init(_surfaceType=surfaceType)
+
+    @property
+    def surfaceType(self):
+        return self._surfaceType
+
+
+# A planar surface, for faces whose position the stand-in knows.
+class Plane(Surface):
+    def __init__(self, origin, normal):
+        super().__init__(SurfaceTypes.PlaneSurfaceType)
+        self._init(_origin=origin, _normal=normal)
+
+    @property
+    def origin(self):
+        return core.Point3D(*self._origin)
+
+    @property
+    def normal(self):
+        return core.Vector3D(*self._normal)
+
+
+class BRepFace(ApiObject):
+    def __init__(self, body, surfaceType):
+        self._init(_body=body, _geometry=Surface(surfaceType))
+
+    @property
+    def geometry(self):
+        return self._geometry
+
+    @property
+    def body(self):
+        return self._body
+
+
+class BRepFaces(core.Collection):
+    pass
+
+
+class BRepBody(ApiObject):
+    def __init__(self, component, surfaceTypes, name='Body'):
+        self._init(_component=component, name=name, isVisible=True, _faces=BRepFaces())
+        self._faces._items.extend(BRepFace(self, surfaceType) for surfaceType in surfaceTypes)
+
+    @property
+    def faces(self):
+        return self._faces
+
+    @property
+    def parentComponent(self):
+        return self._component
+
+    def copy(self):
+        return self._copy()
+
+    def _copy(self):
+        return BRepBody(self._component, [face._geometry._surfaceType for face in self._faces._items],
+                        object.__getattribute__(self, 'name'))
+
+    def deleteMe(self):
+        self._component._bRepBodies._items.remove(self)
+        return True
+
+
+# Bodies outside of any component, made by the TemporaryBRepManager.
+class TemporaryBRepManager(ApiObject):
+    @staticmethod
+    @recorded
+    def get():
+        return TemporaryBRepManager()
+
+    def copy(self, body):
+        return BRepBody(None, [face._geometry._surfaceType for face in body._faces._items],
+                        object.__getattribute__(body, 'name'))
+
+    def createCylinderOrCone(self, pointOne, pointOneRadius, pointTwo, pointTwoRadius):
+        side = SurfaceTypes.CylinderSurfaceType if pointOneRadius == pointTwoRadius else SurfaceTypes.ConeSurfaceType
+        return BRepBody(None, (SurfaceTypes.PlaneSurfaceType, side, SurfaceTypes.PlaneSurfaceType))
+
+    def transform(self, body, transform):
+        return True
+
+    # The target gets the tool's faces, or for a difference only its curved
+    # ones, as when a hole is cut through it.
+    def booleanOperation(self, targetBody, toolBody, booleanType):
+        faces = toolBody._faces._items
+        if booleanType == BooleanTypes.DifferenceBooleanType:
+            faces = [face for face in faces if face._geometry._surfaceType != SurfaceTypes.PlaneSurfaceType]
+        targetBody._faces._items.extend(BRepFace(targetBody, face._geometry._surfaceType) for face in faces)
+        return True
+
+
+class BRepBodies(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self, body, targetBaseFeature=None):
+        copy = BRepBody(self._component, [face._geometry._surfaceType for face in body._faces._items])
+        self._items.append(copy)
+        return copy
+
+    def itemByName(self, name):
+        for body in self._items:
+            if object.__getattribute__(body, 'name') == name:
+                return body
+        return None
+
+
+##### Features
+
+# Faces of the bodies each kind of feature creates.
+_LOFT_FACES = (SurfaceTypes.PlaneSurfaceType,) + (SurfaceTypes.NurbsSurfaceType,) * 4
+_REVOLVE_FACES = (SurfaceTypes.PlaneSurfaceType, SurfaceTypes.ConeSurfaceType, SurfaceTypes.PlaneSurfaceType)
+_EXTRUDE_FACES = (SurfaceTypes.PlaneSurfaceType, SurfaceTypes.CylinderSurfaceType, SurfaceTypes.PlaneSurfaceType)
+
+
+class Feature(_TimelineEntity):
+    def __init__(self, component, bodies):
+        self._init(_component=component, _bodies=core.Collection(bodies), name='Feature', isSuppressed=False)
+
+    @property
+    def bodies(self):
+        return self._bodies
+
+    @property
+    def parentComponent(self):
+        return self._component
+
+    def deleteMe(self):
+        return self._delete()
+
+
+class FeatureInput(ApiObject):
+    def __init__(self, operation=FeatureOperations.NewBodyFeatureOperation):
+        self._init(operation=operation, participantBodies=[], isSolid=True)
+
+
+# Creates the bodies for a feature. NewComponent puts a single body into a
+# new child component, NewBody adds one to the component itself and the
+# other operations modify existing bodies.
+def _createBodies(component, operation, surfaceTypes):
+    if operation == FeatureOperations.NewComponentFeatureOperation:
+        occurrence = component._occurrences._addNew(core.Matrix3D())
+        target = occurrence._component
+    elif operation == FeatureOperations.NewBodyFeatureOperation:
+        target = component
+    else:
+        return []
+    body = BRepBody(target, surfaceTypes)
+    target._bRepBodies._items.append(body)
+    return [body]
+
+
+class LoftSections(core.Collection):
+    def add(self, entity):
+        self._items.append(entity)
+        return entity
+
+
+class LoftFeatureInput(FeatureInput):
+    def __init__(self, operation):
+        super().__init__(operation)
+        self._init(_loftSections=LoftSections(), isClosed=False)
+
+    @property
+    def loftSections(self):
+        return self._loftSections
+
+
+class LoftFeatures(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, operation):
+        return LoftFeatureInput(operation)
+
+    def add(self, input):
+        if input._loftSections.count < 2:
+            raise RuntimeError('3 : a loft needs at least two sections')
+        operation = object.__getattribute__(input, 'operation')
+        return self._component._addFeature(self, _createBodies(self._component, operation, _LOFT_FACES))
+
+
+class RevolveFeatureInput(FeatureInput):
+    def __init__(self, profiles, axis, operation):
+        super().__init__(operation)
+        self._init(_profiles=profiles, _axis=axis, _angle=None)
+
+    def setAngleExtent(self, isSymmetric, angle):
+        self._angle = angle
+        return True
+
+
+class RevolveFeatures(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, profiles, axis, operation):
+        return RevolveFeatureInput(profiles, axis, operation)
+
+    def add(self, input):
+        operation = object.__getattribute__(input, 'operation')
+        bodies = _createBodies(self._component, operation, _REVOLVE_FACES)
+        if bodies and isinstance(input._profiles, Profile) and isinstance(input._axis, SketchLine):
+            _revolveFaces(bodies[0], input._profiles, input._axis)
+        return self._component._addFeature(self, bodies)
+
+
+# Gives a body revolved from a profile of straight lines its faces: a plane
+# for each line square to the axis, facing away from the profile, and a cone
+# or cylinder for each other line not on the axis.
+def _revolveFaces(body, profile, axis):
+    sketch = axis._sketch
+    (ax, ay), (bx, by) = _xy(axis._start), _xy(axis._end)
+    length = math.hypot(bx - ax, by - ay)
+    dx, dy = (bx - ax) / length, (by - ay) / length
+    modelDirection = [b - a for a, b in zip(sketch._toModel((ax, ay, 0.0)), sketch._toModel((bx, by, 0.0)))]
+    modelDirection = tuple(c / length for c in modelDirection)
+    cx, cy = profile._centroid
+
+    faces = []
+    for loop in profile._loops._items:
+        for curve in loop._profileCurves._items:
+            (x0, y0), (x1, y1) = curve._start, curve._end
+            along = (x1 - x0) * dx + (y1 - y0) * dy
+            across = [abs((x - ax) * dy - (y - ay) * dx) for x, y in ((x0, y0), (x1, y1))]
+            if max(across) < _TOLERANCE:
+                continue
+            surfaceType = SurfaceTypes.ConeSurfaceType
+            if abs(across[0] - across[1]) < _TOLERANCE:
+                surfaceType = SurfaceTypes.CylinderSurfaceType
+            face = BRepFace(body, surfaceType)
+            if abs(along) < _TOLERANCE:
+                sign = 1.0 if ((x0 - cx) * dx + (y0 - cy) * dy) > 0 else -1.0
+                face._geometry = Plane(sketch._toModel((x0, y0, 0.0)), tuple(sign * c for c in modelDirection))
+            faces.append(face)
+    body._faces._items[:] = faces
+
+
+class ExtrudeFeatureInput(FeatureInput):
+    def __init__(self, profile, operation):
+        super().__init__(operation)
+        self._init(_profile=profile, _extent=None)
+
+    def setOneSideExtent(self, extent, direction, taperAngle=None):
+        self._extent = (extent, direction)
+        return True
+
+    def setDistanceExtent(self, isSymmetric, distance):
+        self._extent = (distance, isSymmetric)
+        return True
+
+
+class ExtrudeFeatures(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, profile, operation):
+        return ExtrudeFeatureInput(profile, operation)
+
+    def add(self, input):
+        if input._profile is None:
+            raise RuntimeError('3 : no profile to extrude')
+        operation = object.__getattribute__(input, 'operation')
+        return self._component._addFeature(self, _createBodies(self._component, operation, _EXTRUDE_FACES))
+
+
+class CircularPatternFeatureInput(ApiObject):
+    def __init__(self, inputEntities, axis):
+        self._init(_inputEntities=inputEntities, _axis=axis, quantity=None,
+                   totalAngle=core.ValueInput(stringValue='360 deg'), isSymmetric=False)
+
+
+class CircularPatternFeatures(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def createInput(self, inputEntities, axis):
+        return CircularPatternFeatureInput(inputEntities, axis)
+
+    # Patterning bodies adds quantity - 1 copies of each of them.
+    def add(self, input):
+        quantity = object.__getattribute__(input, 'quantity')
+        count = int(round(quantity._realValue if quantity._realValue is not None
+                          else core._evaluate(quantity._stringValue, '')))
+        bodies = []
+        for entity in input._inputEntities._items:
+            if isinstance(entity, BRepBody):
+                for i in range(count - 1):
+                    body = entity._copy()
+                    entity._component._bRepBodies._items.append(body)
+                    bodies.append(body)
+        return self._component._addFeature(self, bodies)
+
+
+class BaseFeature(Feature):
+    def startEdit(self):
+        return True
+
+    def finishEdit(self):
+        return True
+
+
+class BaseFeatures(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def add(self):
+        return self._component._addFeature(self, [], BaseFeature)
+
+
+class Features(ApiObject):
+    def __init__(self, component):
+        self._init(_loftFeatures=LoftFeatures(component), _revolveFeatures=RevolveFeatures(component),
+                   _extrudeFeatures=ExtrudeFeatures(component),
+                   _circularPatternFeatures=CircularPatternFeatures(component),
+                   _baseFeatures=BaseFeatures(component))
+
+    @property
+    def loftFeatures(self):
+        return self._loftFeatures
+
+    @property
+    def revolveFeatures(self):
+        return self._revolveFeatures
+
+    @property
+    def extrudeFeatures(self):
+        return self._extrudeFeatures
+
+    @property
+    def circularPatternFeatures(self):
+        return self._circularPatternFeatures
+
+    @property
+    def baseFeatures(self):
+        return self._baseFeatures
+
+
+class ToEntityExtentDefinition(ApiObject):
+    def __init__(self, entity, isChained):
+        self._init(_entity=entity, _isChained=isChained)
+
+    @staticmethod
+    @recorded
+    def create(entity, isChained, offset=None):
+        return ToEntityExtentDefinition(entity, isChained)
+
+
+##### Components and occurrences
+
+class Occurrence(_TimelineEntity):
+    def __init__(self, component, transform):
+        self._init(_component=component, transform=transform, isLightBulbOn=True)
+
+    @property
+    def component(self):
+        return self._component
+
+    @property
+    def name(self):
+        return object.__getattribute__(self._component, 'name') + ':1'
+
+    def deleteMe(self):
+        return self._delete()
+
+    def _removeFromModel(self):
+        if self in self._parent._items:
+            self._parent._items.remove(self)
+
+
+class Occurrences(core.Collection):
+    def __init__(self, component):
+        super().__init__()
+        self._component = component
+
+    def addNewComponent(self, transform):
+        return self._addNew(transform)
+
+    def addExistingComponent(self, component, transform):
+        return self._addExisting(component, transform)
+
+    def _addExisting(self, component, transform):
+        occurrence = Occurrence(component, transform)
+        occurrence._parent = self
+        occurrence._addToTimeline(self._component._design)
+        self._items.append(occurrence)
+        return occurrence
+
+    def _addNew(self, transform):
+        return self._addExisting(Component(self._component._design), transform)
+
+
+class Component(ApiObject):
+    def __init__(self, design, name='Component'):
+        self._init(_design=design, name=name, description='', partNumber='')
+        self._init(_attributes=Attributes(self), _sketches=Sketches(self), _features=Features(self),
+                   _constructionPlanes=ConstructionPlanes(self), _occurrences=Occurrences(self),
+                   _bRepBodies=BRepBodies(self), _xY=ConstructionPlane(self), _xZ=ConstructionPlane(self),
+                   _yZ=ConstructionPlane(self))
+
+    @property
+    def attributes(self):
+        return self._attributes
+
+    @property
+    def sketches(self):
+        return self._sketches
+
+    @property
+    def features(self):
+        return self._features
+
+    @property
+    def constructionPlanes(self):
+        return self._constructionPlanes
+
+    @property
+    def occurrences(self):
+        return self._occurrences
+
+    @property
+    def bRepBodies(self):
+        return self._bRepBodies
+
+    @property
+    def xYConstructionPlane(self):
+        return self._xY
+
+    @property
+    def xZConstructionPlane(self):
+        return self._xZ
+
+    @property
+    def yZConstructionPlane(self):
+        return self._yZ
+
+    @property
+    def parentDesign(self):
+        return self._design
+
+    # Revolve, loft, extrude, pattern and base features go through here so
+    # they all land in the component's feature list and on the timeline.
+    def _addFeature(self, collection, bodies, featureType=Feature):
+        feature = featureType(self, bodies)
+        feature._addToTimeline(self._design)
+        collection._items.append(feature)
+        return feature
+
+
+# Captures the positions of moved occurrences, like a Fusion position
+# snapshot.
+class Snapshot(_TimelineEntity):
+    pass
+
+
+class Snapshots(core.Collection):
+    def __init__(self, design):
+        super().__init__()
+        self._design = design
+
+    def add(self):
+        snapshot = Snapshot()
+        snapshot._addToTimeline(self._design)
+        self._items.append(snapshot)
+        return snapshot
+
+
+class Design(ApiObject):
+    def __init__(self):
+        self._init(_designType=DesignTypes.ParametricDesignType, _unitsManager=UnitsManager(),
+                   _timeline=Timeline(), _snapshots=Snapshots(self), _rootComponent=None)
+        self._init(_attributes=Attributes(self), _rootComponent=Component(self, 'Root'))
+
+    @property
+    def unitsManager(self):
+        return self._unitsManager
+
+    @property
+    def attributes(self):
+        return self._attributes
+
+    @property
+    def rootComponent(self):
+        return self._rootComponent
+
+    @property
+    def timeline(self):
+        return self._timeline
+
+    @property
+    def snapshots(self):
+        return self._snapshots
+
+    @property
+    def designType(self):
+        return self._designType
+
+    @designType.setter
+    def designType(self, designType):
+        if designType == DesignTypes.DirectDesignType:
+            self._timeline._items.clear()
+            self._timeline._timelineGroups._items.clear()
+        self._designType = designType
+
+    @property
+    def allComponents(self):
+        components = []
+        pending = [self._rootComponent]
+        while pending:
+            component = pending.pop()
+            if component not in components:
+                components.append(component)
+                pending.extend(occurrence._component for occurrence in component._occurrences._items)
+        return core.Collection(components)
+
+    # What a preview adds is rolled back once the preview has been shown.
+    def _mark(self):
+        return (len(self._rootComponent._occurrences._items), len(self._timeline._items))
+
+    def _rollback(self, mark):
+        occurrences, timelineObjects = mark
+        del self._rootComponent._occurrences._items[occurrences:]
+        del self._timeline._items[timelineObjects:]
@@ -0,0 +1,223 @@
+# Runs Gears.py headless, against the recording adsk stand-in in this folder,
+# and reports the Fusion API calls made to build each gear set. The counts
+# are checked against budgets.json so a change that adds API round trips
+# shows up without opening Fusion.
+#
+#   python headless/run.py                    # every case
+#   python headless/run.py --case 25x10 --top 20
+#   python headless/run.py --command          # open the dialog, preview, OK
+#   python headless/run.py --batch            # every case from one table
+#   python headless/run.py --direct           # direct models, no history
+#   python headless/run.py --differential 4   # differentials with 4 pinions
+#   python headless/run.py --nurbs            # flanks drawn as fixed NURBS curves
+#   python headless/run.py --batch --train    # the cases as a gear train, twice
+#   python headless/run.py --check            # exit 1 if over budget
+#   python headless/run.py --update-budgets
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+_headlessDir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.dirname(_headlessDir))
+sys.path.insert(0, _headlessDir)
+
+import adsk.core, adsk.fusion
+import Gears
+from gearlib.spec import GearSpec
+
+BUDGETS = os.path.join(_headlessDir, 'budgets.json')
+
+# Gear sets by size, as GearSpec arguments: module (mm), teeth, pinion teeth,
+# pressure angle, backlash, thickness, hole diameter, profile tolerance and
+# root fillet radius (cm, radians).
+CASES = {
+    '12x8': (1.0, 12, 8, math.radians(20), 0.005, 0.5, 0.3, 0.001),
+    '25x10': (2.0, 25, 10, math.radians(20), 0.005, 1.0, 0.8, 0.001),
+    '25x10-fillet': (2.0, 25, 10, math.radians(20), 0.005, 1.0, 0.8, 0.001, 0.05),
+    '60x40': (1.5, 60, 40, math.radians(20), 0.005, 1.0, 0.8, 0.001),
+    '120x30': (0.5, 120, 30, math.radians(14.5), 0.002, 0.4, 0.3, 0.001),
+}
+
+
+# Starts over with a fresh application and empty design.
+def newDesign():
+    adsk.core.Application._reset()
+    app = adsk.core.Application.get()
+    Gears._app = app
+    Gears._ui = app.userInterface
+    return app.activeProduct
+
+
+# Builds a gear set by calling drawGearSet directly.
+def runDraw(spec, direct=False, pinions=0):
+    design = newDesign()
+    adsk.recorder.reset()
+    comp = Gears.drawGearSet(design, spec, direct, pinions)
+    return comp is not None
+
+
+# Builds a gear set through the command dialog: starts the add-in, which
+# opens it, enters the values, waits for the debounced preview and clicks OK.
+# With more invocations the dialog is opened again from the add-in's button
+# for each, building the gear set again with warm caches, and the counts are
+# the last one's. The add-in is stopped at the end.
+def runCommand(spec, direct=False, pinions=0, invocations=1):
+    design = newDesign()
+    Gears._handlers.clear()
+    adsk.recorder.reset()
+    Gears.run(None)
+    definition = Gears._ui._commandDefinitions.itemById(Gears.COMMAND_ID)
+    for invocation in range(invocations):
+        if invocation:
+            adsk.recorder.reset()
+            definition.execute()
+        executed = enterValues(definition._lastCommand, spec, direct, pinions)
+    Gears.stop(None)
+    return executed
+
+
+# Enters a gear set's values in an open dialog, waits for the debounced
+# preview and clicks OK.
+def enterValues(command, spec, direct, pinions):
+    values = {
+        'module': '%r' % spec.module,
+        'numTeeth': str(spec.numTeeth),
+        'numTeeth1': str(spec.numTeeth1),
+        'backlash': '%r cm' % spec.backlash,
+        'thickness': '%r cm' % spec.thickness,
+        'holeDiam': '%r cm' % spec.holeDiam,
+        'profileTolerance': '%r cm' % spec.profileTolerance,
+        'rootFilletRad': '%r cm' % spec.rootFilletRad,
+    }
+    if direct:
+        command._changeInput('directModel', True)
+    if pinions:
+        command._changeInput('differentialPinions', str(pinions))
+    command._changeInput('pressureAngle', 'Custom')
+    command._changeInput('pressureAngleCustom', '%r deg' % math.degrees(spec.pressureAngle))
+    for id, value in values.items():
+        command._changeInput(id, value)
+    time.sleep(Gears.PREVIEW_DELAY * 1.5)
+    adsk.doEvents()
+    return command.doExecute()
+
+
+# Builds all of the gear sets in one design from a table file, like the
+# dialog's batch table. With train, the table chains the gear sets into one
+# gear train and then repeats them, so the repeats are placed as instances.
+def runBatch(specs, direct=False, pinions=0, train=False):
+    design = newDesign()
+    adsk.recorder.reset()
+    rows = specs * 2 if train else specs
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'gears.csv')
+        with open(path, 'w') as f:
+            f.write('module,numTeeth,numTeeth1,pressureAngle,backlash,thickness,holeDiam,rootFilletRad,pinions,train\n')
+            for spec in rows:
+                f.write('%r,%d,%d,%r,%r,%r,%r,%r,%d,%s\n' % (spec.module, spec.numTeeth, spec.numTeeth1, math.degrees(spec.pressureAngle),
+                                                            spec.backlash * 10, spec.thickness * 10, spec.holeDiam * 10,
+                                                            spec.rootFilletRad * 10, pinions, 'train' if train else ''))
+        comps = Gears.drawGearSetBatch(design, path, specs[0].profileTolerance, direct)
+
+    # The summary at the end isn't a failure.
+    messages = Gears._ui._messages
+    if messages and messages[-1].startswith('Built %d of %d' % (len(rows), len(rows))):
+        messages.pop()
+    return len(comps) == len(specs)
+
+
+def loadBudgets(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Count the Fusion API calls made by Gears.py, headless.')
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='gear set to build (default: all)')
+    parser.add_argument('--command', action='store_true', help='drive the command dialog instead of calling drawGearSet')
+    parser.add_argument('--batch', action='store_true', help='build the cases together from a batch table')
+    parser.add_argument('--direct', action='store_true', help='build direct models without timeline history')
+    parser.add_argument('--differential', type=int, default=0, metavar='PINIONS', help='build differentials with this many pinions')
+    parser.add_argument('--train', action='store_true', help='with --batch, chain the cases into a gear train and repeat it')
+    parser.add_argument('--invocations', type=int, default=1, metavar='N',
+                        help='with --command, open the dialog N times per case and count the last one')
+    parser.add_argument('--nurbs', action='store_true', help="draw the flanks as fixed NURBS curves (PROFILE_CURVES = 'nurbs')")
+    parser.add_argument('--top', type=int, default=0, help='list the N most called API members')
+    parser.add_argument('--budgets', default=BUDGETS, help='API call budgets per case')
+    parser.add_argument('--check', action='store_true', help='exit 1 if a case goes over its budget')
+    parser.add_argument('--update-budgets', action='store_true', help='save the current counts as the budgets')
+    args = parser.parse_args(argv)
+
+    Gears.TIMING_LOG = os.devnull
+    mode = 'batch' if args.batch else 'command' if args.command else 'drawGearSet'
+    if args.direct:
+        mode += '-direct'
+    if args.differential:
+        mode += '-differential%d' % args.differential
+    if args.nurbs:
+        Gears.PROFILE_CURVES = 'nurbs'
+        mode += '-nurbs'
+    if args.train:
+        mode += '-train'
+    if args.command and args.invocations > 1:
+        mode += '-warm'
+    budgets = loadBudgets(args.budgets)
+    failed = False
+
+    names = args.case or list(CASES)
+    if args.differential:
+        # Not every case can be a differential with this many pinions.
+        for name in list(names):
+            invalid = Gears.gearTrain.differentialError(GearSpec(*CASES[name]), args.differential)
+            if invalid:
+                print('%-8s skipped, %s' % (name, invalid))
+                names.remove(name)
+    runs = [(name, runDraw, GearSpec(*CASES[name]), {}) for name in names]
+    if args.command:
+        runs = [(name, runCommand, GearSpec(*CASES[name]), {'invocations': args.invocations}) for name in names]
+    if args.batch:
+        runs = [('+'.join(names), runBatch, [GearSpec(*CASES[name]) for name in names], {'train': args.train})]
+
+    for name, function, spec, options in runs:
+        start = time.perf_counter()
+        ok = function(spec, args.direct, args.differential, **options)
+        elapsed = time.perf_counter() - start
+        recorder = adsk.recorder
+        messages = Gears._ui._messages
+        if not ok or messages:
+            failed = True
+            print('%s: failed %s' % (name, ' | '.join(messages)))
+            continue
+
+        total = recorder.total
+        budget = budgets.get(mode, {}).get(name)
+        status = ''
+        if budget is not None:
+            status = 'budget %d' % budget
+            if total > budget:
+                status += ', OVER by %d' % (total - budget)
+                failed = failed or args.check
+        print('%-8s %7d API calls  %6.2fs  %s' % (name, total, elapsed, status))
+        for member, count in recorder.counts.most_common(args.top):
+            print('    %7d  %s' % (count, member))
+        budgets.setdefault(mode, {})[name] = total
+
+    if args.command and Gears._startup:
+        print('Dialog %s' % Gears._startup.summary())
+
+    if args.update_budgets:
+        with open(args.budgets, 'w') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
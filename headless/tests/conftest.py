@@ -0,0 +1,12 @@
+# Tests for gearlib and the headless harness. gearlib is pure Python and
+# NumPy; Gears.py runs against the recording adsk stand-in in headless/, as
+# it does for run.py.
+#
+#   python -m pytest headless/tests
+
+import os
+import sys
+
+_headlessDir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.dirname(_headlessDir))
+sys.path.insert(0, _headlessDir)
@@ -0,0 +1,22 @@
+# Every mode of run.py, checked against budgets.json. Each runs in its own
+# Python, as from the command line, since run.py starts the add-in and
+# resets the adsk stand-in.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+RUN = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'run.py')
+
+MODES = [
+    '', '--command', '--batch', '--direct', '--command --direct', '--batch --direct', '--differential 4',
+    '--batch --train', '--nurbs', '--command --nurbs', '--command --invocations 3',
+]
+
+
+@pytest.mark.parametrize('mode', MODES)
+def testWithinBudget(mode):
+    result = subprocess.run([sys.executable, RUN, *mode.split(), '--check'], capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
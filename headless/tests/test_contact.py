@@ -0,0 +1,47 @@
+import math
+
+from gearlib import contact
+from gearlib.spec import GearSpec
+
+
+def gearSpec(module, numTeeth, numTeeth1):
+    return GearSpec(module, numTeeth, numTeeth1, math.radians(20), 0.005, 0.01, 0.0, 0.001)
+
+
+# The textbook contact ratio with each gear's part of the path of contact
+# ended at the other gear's interference point, where its involute starts.
+def limitedContactRatio(spec):
+    cs = spec.crossSection
+    R0, R1 = cs.wheel.profile.pitchDia / 2, cs.pinion.profile.pitchDia / 2
+    module, angle = spec.moduleCm, spec.pressureAngle
+    approach = min(math.sqrt((R0 + module)**2 - (R0 * math.cos(angle))**2) - R0 * math.sin(angle), R1 * math.sin(angle))
+    recess = min(math.sqrt((R1 + module)**2 - (R1 * math.cos(angle))**2) - R1 * math.sin(angle), R0 * math.sin(angle))
+    return (approach + recess) / (math.pi * module * math.cos(angle))
+
+
+# At module 2 the measured ratio is within 2% under and 8% over the limited
+# textbook value, the excess being the roll a leaving pair stays within
+# contactTolerance.
+def testContactRatioAgreesWithTheTextbook():
+    for numTeeth, numTeeth1 in ((20, 10), (40, 20), (60, 30), (120, 30), (200, 50)):
+        spec = gearSpec(2.0, numTeeth, numTeeth1)
+        analysis = contact.analyzeContact(spec)
+        expected = limitedContactRatio(spec)
+        assert -0.02 <= analysis.contactRatio / expected - 1 <= 0.08
+        assert analysis.theoreticalContactRatio >= expected - 1e-12
+
+
+def testTextbookValueOverstatesSmallSets():
+    spec = gearSpec(2.0, 20, 10)
+    analysis = contact.analyzeContact(spec)
+    assert analysis.theoreticalContactRatio / limitedContactRatio(spec) > 1.1
+    assert analysis.contactRatio < analysis.theoreticalContactRatio
+
+
+def testToleranceExcessShrinksWithModule():
+    excess = []
+    for module in (1.0, 2.0, 5.0):
+        spec = gearSpec(module, 200, 50)
+        excess.append(contact.analyzeContact(spec).contactRatio / limitedContactRatio(spec))
+    assert excess == sorted(excess, reverse=True)
+    assert excess[-1] < 1.06
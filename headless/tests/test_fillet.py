@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+
+from gearlib import fillet, nurbs
+from gearlib.spec import GearSpec, dedendum
+
+
+# Gear sets with half the largest root fillet. The 10 and 8 tooth pinions
+# are undercut.
+def filletedSpecs():
+    for module, numTeeth, numTeeth1 in ((2.0, 25, 10), (1.5, 60, 40), (1.0, 12, 8), (2.0, 40, 8)):
+        spec = GearSpec(module, numTeeth, numTeeth1, math.radians(20), 0.005, 0.5, 0.3, 0.001)
+        yield spec.replace(rootFilletRad=spec.maxRootFilletRad / 2)
+
+
+def profiles():
+    for spec in filletedSpecs():
+        for side in (spec.crossSection.wheel, spec.crossSection.pinion):
+            yield spec, side.profile
+
+
+def testFilletRunsFromTheRootCircleToTheFlank():
+    for spec, profile in profiles():
+        points = profile.fillet.points
+        assert abs(math.hypot(*points[0]) - profile.rootDia / 2) < 1e-12
+        assert abs(math.hypot(*points[-1]) - profile.fillet.formRadius) < 1e-12
+        assert np.hypot(*(points[-1] - profile.flank1[0])) <= spec.profileTolerance
+
+
+def testFilletEndsTangentToTheFlankUnlessUndercut():
+    undercut = 0
+    for spec, profile in profiles():
+        dense = profile.fillet.dense
+        end = (dense[-1] - dense[-2]) / np.hypot(*(dense[-1] - dense[-2]))
+        flank = nurbs.involuteDirection(profile.baseCircleDia / 2, profile.sampling.radii[0],
+                                        nurbs._rotateAngle(profile))
+        sine = abs(end[0] * flank[1] - end[1] * flank[0])
+        if profile.fillet.undercut:
+            undercut += 1
+            assert sine > 0.1
+        else:
+            # The last dense chord is off the tangent by half its turn.
+            assert sine < 5e-3
+    assert undercut == 3
+
+
+def testRadiiTooLargeAreRejected():
+    for spec in filletedSpecs():
+        largest = spec.maxRootFilletRad
+        assert 0 < largest <= spec.dedendum
+        assert largest == fillet.maxFilletRadius(spec.moduleCm, spec.pressureAngle, spec.dedendum, spec.backlash)
+        assert spec.replace(rootFilletRad=largest * 0.99).inputError() == ''
+        for radius in (largest, largest * 1.01, spec.dedendum * 2):
+            assert spec.replace(rootFilletRad=radius).inputError().startswith('The root fillet radius is too large.')
+        assert spec.replace(rootFilletRad=-0.01).inputError() != ''
+
+
+def testLargestRadiusNeverExceedsTheDedendum():
+    for module in (0.05, 0.1, 0.5):
+        for pressureAngle in (5, 14.5, 20, 25):
+            radius = fillet.maxFilletRadius(module, math.radians(pressureAngle), dedendum(module), 0.0)
+            assert 0 < radius <= dedendum(module)
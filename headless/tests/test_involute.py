@@ -0,0 +1,30 @@
+import numpy as np
+
+from gearlib import involute
+
+
+def testSamplesAreWithinTolerance():
+    counts = []
+    for tolerance in (1e-3, 1e-4, 1e-5, 1e-6):
+        sampling = involute.adaptiveInvoluteRadii(1.0, 0.9, 1.3, tolerance, maxPoints=1000)
+        radii = sampling.radii
+        assert radii[0] == 1.0 and radii[-1] == 1.3
+        assert np.all(np.diff(radii) > 0)
+        assert sampling.pointCount == len(radii)
+
+        deviation = involute.splineDeviation(1.0, involute.involutePoints(1.0, radii))
+        assert sampling.maxDeviation == deviation.max()
+        assert sampling.maxDeviation <= tolerance
+        counts.append(sampling.pointCount)
+    assert counts == sorted(counts) and counts[0] < counts[-1]
+
+
+def testStartsAtTheRootAboveTheBaseCircle():
+    radii = involute.adaptiveInvoluteRadii(1.0, 1.05, 1.3, 1e-5).radii
+    assert radii[0] == 1.05 and radii[-1] == 1.3
+
+
+def testMaxPointsCapsTheSamples():
+    sampling = involute.adaptiveInvoluteRadii(1.0, 0.9, 1.3, 1e-9, maxPoints=20)
+    assert sampling.pointCount == 20
+    assert sampling.maxDeviation > 1e-9
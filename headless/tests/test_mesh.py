@@ -0,0 +1,33 @@
+import collections
+
+import numpy as np
+
+from gearlib import batch, mesh
+from gearlib.stl import readStl
+
+
+# Counts of the undirected edges of (N,3,3) triangles, with the vertices
+# welded on a grid finer than the mesh.
+def edgeCounts(triangles):
+    vertices = [tuple(vertex) for vertex in np.round(triangles.reshape(-1, 3) / 1e-6).astype(np.int64)]
+    counts = collections.Counter()
+    for i in range(0, len(vertices), 3):
+        a, b, c = vertices[i:i + 3]
+        for edge in ((a, b), (b, c), (c, a)):
+            counts[frozenset(edge)] += 1
+    return counts
+
+
+def testWrittenMeshesAreWatertight(tmp_path):
+    gearSets = ({'module': 2.0, 'numTeeth': 25, 'numTeeth1': 10},
+                {'module': 2.0, 'numTeeth': 25, 'numTeeth1': 10, 'rootFilletRad': 0.5},
+                {'module': 1.0, 'numTeeth': 12, 'numTeeth1': 8, 'holeDiam': 0.0, 'thickness': 5.0})
+    for index, gearSet in enumerate(gearSets):
+        gearSet = dict(batch.DEFAULTS, **gearSet)
+        result = mesh.writeGearSet(index, gearSet, str(tmp_path))
+        assert 'error' not in result and 'invalid' not in result, result
+        for name in ('wheel', 'pinion'):
+            triangles = readStl(result[name]['path'])
+            assert len(triangles) == result[name]['triangles']
+            counts = edgeCounts(triangles)
+            assert set(counts.values()) == {2}
@@ -0,0 +1,54 @@
+import math
+
+import numpy as np
+
+from gearlib import fillet, involute, nurbs
+from gearlib.spec import GearSpec
+
+
+def profiles(tolerance, rootFillets=False):
+    for module, numTeeth, numTeeth1 in ((2.0, 25, 10), (1.5, 60, 40), (1.0, 12, 8), (0.5, 120, 30)):
+        spec = GearSpec(module, numTeeth, numTeeth1, math.radians(20), 0.005, 0.3, 0.2, tolerance)
+        if rootFillets:
+            spec = spec.replace(rootFilletRad=spec.maxRootFilletRad / 2)
+        for side in (spec.crossSection.wheel, spec.crossSection.pinion):
+            yield side.profile
+
+
+# Largest distance of a curve from the flank1 involute of a profile, sampled
+# finely as a polyline, independent of the fit's own check.
+def involuteDeviation(profile, curve):
+    radii = profile.sampling.radii
+    baseRadius = profile.baseCircleDia / 2
+    rolls = np.linspace(math.sqrt(max(radii[0] ** 2 / baseRadius ** 2 - 1, 0.0)),
+                        math.sqrt(radii[-1] ** 2 / baseRadius ** 2 - 1), 3000)
+    exact = involute.involuteFlanks(np.maximum(baseRadius * np.sqrt(1 + rolls * rolls), radii[0]),
+                                    baseRadius, nurbs._rotateAngle(profile))[0]
+    return fillet.polylineDistance(nurbs.evaluate(curve, np.linspace(0.0, 1.0, 400)), exact).max()
+
+
+def testFlankCurvesAreWithinTolerance():
+    for tolerance in (0.001, 0.0001):
+        for profile in profiles(tolerance):
+            curve1, curve2 = nurbs.profileFlankCurves(profile, tolerance)
+            assert curve1.maxError <= tolerance
+            assert involuteDeviation(profile, curve1) <= tolerance
+            assert np.allclose(curve1.controlPoints[[0, -1]], profile.flank1[[0, -1]], rtol=0, atol=1e-12)
+            assert np.array_equal(curve2.controlPoints, curve1.controlPoints * (1.0, -1.0))
+
+
+def testFlankCurvesLeaveTheRootLineTangent():
+    for profile in profiles(0.001):
+        if profile.rootPoints is None:
+            continue
+        points = nurbs.profileFlankCurves(profile, 0.001)[0].controlPoints
+        rootLine = points[0] - np.asarray(profile.rootPoints[0])
+        leaving = points[1] - points[0]
+        assert np.dot(rootLine, leaving) > 0
+        assert abs(rootLine[0] * leaving[1] - rootLine[1] * leaving[0]) < 1e-9 * np.hypot(*rootLine) * np.hypot(*leaving)
+
+
+def testFilletedFlankCurvesAreWithinTolerance():
+    for profile in profiles(0.001, rootFillets=True):
+        curve = nurbs.profileFlankCurves(profile, 0.001)[0]
+        assert involuteDeviation(profile, curve) <= 0.001
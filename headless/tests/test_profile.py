@@ -0,0 +1,32 @@
+import math
+
+from gearlib import profile
+from gearlib.spec import dedendum
+
+
+def toothProfile(cache, numTeeth, module=0.2):
+    return cache.toothProfile(module, numTeeth, math.radians(20), 0.005, 2.5, dedendum(module), 0.001)
+
+
+def testCacheEvictsTheLeastRecentlyUsed():
+    cache = profile.ProfileCache(maxSize=2)
+    first = toothProfile(cache, 10)
+    toothProfile(cache, 12)
+    assert toothProfile(cache, 10) is first
+    toothProfile(cache, 14)
+    assert len(cache) == 2
+    assert toothProfile(cache, 10) is first
+    assert cache.info() == {'hits': 2, 'misses': 3, 'size': 2, 'maxSize': 2}
+
+    toothProfile(cache, 12)
+    assert cache.misses == 4
+
+
+def testCacheKeysSurviveAUnitsRoundTrip():
+    cache = profile.ProfileCache()
+    first = toothProfile(cache, 10, 0.2)
+    assert toothProfile(cache, 10, 2 / 10 * (1 + 1e-15)) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.clear()
+    assert len(cache) == 0 and cache.info()['hits'] == 0
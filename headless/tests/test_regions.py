@@ -0,0 +1,39 @@
+import math
+
+from gearlib import regions
+from gearlib.spec import GearSpec
+
+
+def gearSpec(module, numTeeth, numTeeth1, thickness):
+    return GearSpec(module, numTeeth, numTeeth1, math.radians(20), 0.002, thickness, 0.05, 0.001)
+
+
+def testClassifiesEveryRegionByItsBox():
+    for spec in (gearSpec(2.0, 25, 10, 1.0), gearSpec(0.5, 4, 10, 0.26), gearSpec(1.5, 60, 40, 1.0)):
+        index = regions.RegionIndex(spec.crossSection)
+        for region in index.regions:
+            assert index.classify(region.box) == region.name
+
+
+def testClassifiesWithinTheBoxTolerance():
+    index = regions.RegionIndex(gearSpec(2.0, 25, 10, 1.0).crossSection)
+    for region in index.regions:
+        minX, minY, maxX, maxY = region.box
+        nudge = 0.5 * regions.BOX_TOLERANCE * math.hypot(maxX - minX, maxY - minY)
+        assert index.classify((minX + nudge, minY - nudge, maxX, maxY + nudge)) == region.name
+        nudge *= 4
+        assert index.classify((minX + nudge, minY - nudge, maxX - nudge, maxY + nudge)) is None
+
+
+# Past the cone distance the face line crosses the apex and the sketch no
+# longer closes the regions crossSectionRegions expects; the thickness rule
+# keeps those specs out.
+def testFaceAcrossTheApexIsRejected():
+    inside = gearSpec(0.5, 4, 10, 0.26)
+    assert inside.inputError() == ''
+    assert inside.crossSection.wheel.face[0] > inside.crossSection.coneCenter[0]
+
+    across = gearSpec(0.5, 4, 10, 0.3)
+    assert across.crossSection.wheel.face[0] < across.crossSection.coneCenter[0]
+    assert across.inputError(lambda cm: '%g cm' % cm).startswith('The gear thickness is too large.')
+    assert gearSpec(0.5, 4, 10, across.coneDistance).inputError() != ''
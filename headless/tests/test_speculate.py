@@ -0,0 +1,83 @@
+import threading
+import time
+
+from gearlib.speculate import Speculator
+
+
+# Work that records its keys and, for a key in blocking, runs until that
+# key's event is set or it is cancelled.
+class Work:
+    def __init__(self, *blocking):
+        self.keys = []
+        self.started = threading.Event()
+        self.release = {key: threading.Event() for key in blocking}
+
+    def __call__(self, key, cancelled):
+        self.keys.append(key)
+        self.started.set()
+        event = self.release.get(key)
+        while event is not None and not event.is_set():
+            if cancelled():
+                return
+            time.sleep(0.001)
+        if key == 'fail':
+            raise ValueError(key)
+
+
+def testWaitReturnsOnceTheWorkIsDone():
+    work = Work()
+    speculator = Speculator(work)
+    key = object()
+    speculator.submit(key)
+    assert speculator.wait(key, 5.0)
+    speculator.submit(key)
+    assert speculator.wait(key, 5.0)
+    assert work.keys == [key]
+    assert speculator.report()['completed'] == 1
+    speculator.stop()
+
+
+def testANewKeyCancelsTheRunningOne():
+    work = Work('first')
+    speculator = Speculator(work)
+    speculator.submit('first')
+    assert work.started.wait(5.0)
+    speculator.submit('second')
+    assert speculator.wait('second', 5.0)
+    assert not speculator.wait('first', 5.0)
+    assert work.keys == ['first', 'second']
+    report = speculator.report()
+    assert (report['started'], report['completed'], report['cancelled']) == (2, 1, 1)
+    speculator.stop()
+
+
+def testWaitGivesUpAfterItsTimeout():
+    work = Work('slow')
+    speculator = Speculator(work)
+    speculator.submit('slow')
+    start = time.monotonic()
+    assert not speculator.wait('slow', 0.05)
+    assert time.monotonic() - start < 1.0
+    work.release['slow'].set()
+    assert speculator.wait('slow', 5.0)
+    speculator.stop()
+
+
+def testFailedWorkIsLeftToTheCaller():
+    speculator = Speculator(Work())
+    speculator.submit('fail')
+    assert not speculator.wait('fail', 5.0)
+    assert speculator.report()['completed'] == 0
+    speculator.stop()
+
+
+def testStopCancelsAndIgnoresLaterKeys():
+    work = Work('running')
+    speculator = Speculator(work)
+    speculator.submit('running')
+    assert work.started.wait(5.0)
+    speculator.stop()
+    assert not speculator.wait('running', 5.0)
+    speculator.submit('later')
+    assert not speculator.wait('later', 0.05)
+    assert work.keys == ['running']
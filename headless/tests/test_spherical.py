@@ -0,0 +1,31 @@
+import math
+
+from gearlib import spherical
+from gearlib.spec import GearSpec
+
+
+def gearSpecs():
+    for module in (0.5, 2.0, 5.0):
+        for numTeeth, numTeeth1 in ((10, 10), (12, 8), (25, 10), (120, 30)):
+            for pressureAngle in (14.5, 20, 25):
+                yield GearSpec(module, numTeeth, numTeeth1, math.radians(pressureAngle), 0.005, 0.1 * module, 0.0, 0.001)
+
+
+# Tredgold's approximation is within 3% of the module of the exact flank, and
+# the table within a ten thousandth of it.
+def testTiersAgreeWithTheExactFlank():
+    for spec in gearSpecs():
+        for gear in ('wheel', 'pinion'):
+            tiers = spherical.compareTiers(spec, gear)
+            assert tiers['exact']['deviation'] == 0.0
+            assert tiers['tredgold']['deviation'] <= 0.03 * spec.moduleCm
+            assert tiers['table']['deviation'] <= 1e-4 * spec.moduleCm
+
+
+# The 10/10 set at module 2 with the command line defaults (no backlash and a
+# 0.001 mm chord tolerance): Tredgold is within 0.02 mm (0.002 cm).
+def testTredgoldDeviationOfASquareSet():
+    spec = GearSpec(2.0, 10, 10, math.radians(20), 0.0, 1.0, 0.0, 0.0001)
+    tiers = spherical.compareTiers(spec)
+    assert 0.001 < tiers['tredgold']['deviation'] <= 0.002
+
@@ -0,0 +1,31 @@
+import itertools
+import math
+
+from gearlib import sweep
+from gearlib.spec import GearSpec
+
+COLUMNS = ('numTeeth', 'numTeeth1', 'module', 'holeDiam', 'thickness')
+
+
+def sweptSets(table):
+    return set(zip(*(table[name].tolist() for name in COLUMNS)))
+
+
+def testKeepsGoodSetsAndDropsInfeasibleOnes():
+    table = sweep.sweep([3, 25], [10], [2.0], holeDiam=(8.0, 20.0), thickness=(10.0, 30.0))
+    # 3 teeth are too few, a 20 mm hole is wider than the pinion root and
+    # 30 mm is past the 26.9 mm cone distance.
+    assert sweptSets(table) == {(25, 10, 2.0, 8.0, 10.0)}
+
+
+# The mask is the command dialog's rules, in the table's mm.
+def testMatchesTheSpecRules():
+    teeth, modules, holes, thicknesses = range(2, 13), (0.5, 1.0, 2.0), (0.0, 3.0, 8.0), (2.0, 5.0, 10.0)
+    table = sweep.sweep(teeth, teeth, modules, holeDiam=holes, thickness=thicknesses)
+    expected = set()
+    for values in itertools.product(teeth, teeth, modules, holes, thicknesses):
+        numTeeth, numTeeth1, module, holeDiam, thickness = values
+        spec = GearSpec(module, numTeeth, numTeeth1, math.radians(20), 0.005, thickness / 10, holeDiam / 10, 0.001)
+        if not spec.inputError():
+            expected.add(values)
+    assert expected and sweptSets(table) == expected
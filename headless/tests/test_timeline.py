@@ -0,0 +1,87 @@
+# Gear sets built with the timeline marker rolled back, in the adsk
+# stand-in: they go in at the marker, and what the user has after it stays.
+
+import math
+
+import adsk.core, adsk.fusion
+import pytest
+
+import Gears
+from gearlib.spec import GearSpec
+
+
+@pytest.fixture
+def design(tmp_path, monkeypatch):
+    monkeypatch.setattr(Gears, 'TIMING_LOG', str(tmp_path / 'timings.jsonl'))
+    adsk.core.Application._reset()
+    app = adsk.core.Application.get()
+    monkeypatch.setattr(Gears, '_app', app)
+    monkeypatch.setattr(Gears, '_ui', app.userInterface)
+    return app.activeProduct
+
+
+def gearSpec():
+    return GearSpec(2.0, 25, 10, math.radians(20), 0.005, 1.0, 0.8, 0.001)
+
+
+# Adds two sketches of the user's to the timeline and rolls the marker back
+# between them. Returns them.
+def userFeatures(design):
+    sketches = design.rootComponent.sketches
+    before = sketches.add(design.rootComponent.xYConstructionPlane)
+    after = sketches.add(design.rootComponent.xZConstructionPlane)
+    design.timeline.markerPosition = 1
+    return before, after
+
+
+def buildAtTheMarker(design, direct):
+    timeline = design.timeline
+    before, after = userFeatures(design)
+    comp = Gears.drawGearSet(design, gearSpec(), direct)
+    assert comp is not None, Gears._ui._messages
+
+    entities = [timeline.item(index).entity for index in range(timeline.count)]
+    assert entities[0] is before and entities[-1] is after
+    assert timeline.markerPosition == timeline.count - 1
+    assert design.rootComponent.occurrences.item(0).component is comp
+    return entities
+
+
+def testFeaturesBuilderKeepsLaterFeatures(design, monkeypatch):
+    monkeypatch.setattr(Gears, 'DIRECT_BUILDER', 'features')
+    entities = buildAtTheMarker(design, True)
+    assert isinstance(entities[1], adsk.fusion.Occurrence)
+    assert design.rootComponent.occurrences.count == 1
+
+
+def testParametricBuildGoesInAtTheMarker(design):
+    entities = buildAtTheMarker(design, False)
+    assert len(entities) > 3
+
+
+def testTransientBuilderKeepsLaterFeatures(design):
+    assert Gears.DIRECT_BUILDER == 'transient'
+    entities = buildAtTheMarker(design, True)
+    assert isinstance(entities[1], adsk.fusion.Occurrence)
+    assert design.rootComponent.occurrences.count == 1
+
+
+def testBatchWaitsForTheMarkerAtTheEnd(design, tmp_path):
+    path = tmp_path / 'gears.csv'
+    path.write_text('module,numTeeth,numTeeth1,thickness,holeDiam\n2,25,10,10,8\n1,12,8,5,3\n')
+    before, after = userFeatures(design)
+    assert Gears.drawGearSetBatch(design, str(path), 0.001) == []
+    assert Gears._ui._messages[-1].startswith('Move the timeline marker to the end')
+    assert design.timeline.count == 2 and design.timeline.markerPosition == 1
+
+    design.timeline.moveToEnd()
+    comps = Gears.drawGearSetBatch(design, str(path), 0.001)
+    assert len(comps) == 2
+    assert design.timeline.item(0).entity is before and design.timeline.item(1).entity is after
+
+    # The groups are made last set first; the first set starts after the
+    # user's sketches.
+    groups = design.timeline.timelineGroups
+    assert groups.count == 2
+    assert groups.item(1)._startIndex == 2
+    assert groups.item(0)._startIndex == groups.item(1)._endIndex + 1
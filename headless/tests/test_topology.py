@@ -0,0 +1,37 @@
+from gearlib import topology
+
+CYLINDER = 1
+
+
+def faceIndex():
+    index = topology.FaceIndex()
+    index.add('back', topology.PLANE, (0, 0, -1), (0, 0, 5))
+    index.add('side', CYLINDER)
+    index.add('front', topology.PLANE, (0, 0, 1), (1, 2, -3))
+    index.add('middle', topology.PLANE, (0, 0, 2), (0, 0, 1))
+    index.add('slant', topology.PLANE, (0, 1, 1), (0, 0, 0))
+    return index
+
+
+def testPlanesAlongAreSortedByDistance():
+    index = faceIndex()
+    assert index.planesAlong((0, 0, 0), (0, 0, 1)) == [(-3, 'front'), (1, 'middle'), (5, 'back')]
+    assert index.planesAlong((0, 0, 1), (0, 0, -2)) == [(-4, 'back'), (0, 'middle'), (4, 'front')]
+    assert index.nearestPlane((0, 0, 0), (0, 0, 1)) == 'front'
+    assert index.farthestPlane((0, 0, 0), (0, 0, 1)) == 'back'
+
+
+def testPlanesAlongAnAxisWithoutPlanes():
+    index = faceIndex()
+    assert index.planesAlong((0, 0, 0), (1, 0, 0)) == []
+    assert index.nearestPlane((0, 0, 0), (1, 0, 0)) is None
+    assert index.farthestPlane((0, 0, 0), (1, 0, 0)) is None
+
+
+def testAddingAPlaneResortsTheAxis():
+    index = faceIndex()
+    index.planesAlong((0, 0, 0), (0, 0, 1))
+    index.add('far', topology.PLANE, (0, 0, 1), (0, 0, 9))
+    assert index.farthestPlane((0, 0, 0), (0, 0, 1)) == 'far'
+    assert index.faces(CYLINDER) == ['side']
+    assert len(index) == 6
@@ -0,0 +1,68 @@
+import math
+
+from gearlib import validation
+from gearlib.spec import RULES, GearSpec, Rule
+
+
+def gearSpec(**changes):
+    spec = GearSpec(2.0, 25, 10, math.radians(20), 0.005, 1.0, 0.8, 0.001)
+    return spec.replace(**changes)
+
+
+# Rules that record which of them ran.
+def countingRules(calls):
+    def check(name, message):
+        def rule(spec, formatLength):
+            calls.append(name)
+            return message(spec)
+        return rule
+    return (
+        Rule('teeth', frozenset(('numTeeth', 'numTeeth1')),
+             check('teeth', lambda spec: 'too few' if spec.numTeeth1 < 4 else '')),
+        Rule('hole', frozenset(('module', 'holeDiam')),
+             check('hole', lambda spec: 'hole' if spec.holeDiam > spec.module else '')),
+    )
+
+
+def testRerunsOnlyTheRulesWhoseInputsChanged():
+    calls = []
+    engine = validation.ValidationEngine(countingRules(calls))
+    assert engine.validate(gearSpec()) == ''
+    assert calls == ['teeth', 'hole']
+
+    assert engine.validate(gearSpec(backlash=0.01)) == ''
+    assert calls == ['teeth', 'hole']
+
+    assert engine.validate(gearSpec(backlash=0.01, holeDiam=3.0)) == 'hole'
+    assert calls == ['teeth', 'hole', 'hole']
+
+    assert engine.validate(gearSpec(backlash=0.01, holeDiam=3.0, numTeeth1=3)) == 'too few'
+    assert calls == ['teeth', 'hole', 'hole', 'teeth']
+    assert engine.evaluations == 4
+
+    engine.reset()
+    engine.validate(gearSpec())
+    assert calls[4:] == ['teeth', 'hole']
+
+
+def testMatchesTheSpecRules():
+    engine = validation.ValidationEngine(RULES)
+    for spec in (gearSpec(), gearSpec(holeDiam=5.0), gearSpec(thickness=20.0), gearSpec(numTeeth1=3), gearSpec()):
+        assert engine.validate(spec) == spec.inputError()
+
+
+def testExpressionCacheEvictsTheLeastRecentlyUsed():
+    evaluated = []
+    def evaluate(expression, unitType):
+        evaluated.append(expression)
+        return True, float(expression.split()[0])
+
+    cache = validation.ExpressionCache(evaluate, maxSize=2)
+    assert cache.value('1 mm', 'mm') == (True, 1.0)
+    cache.value('2 mm', 'mm')
+    cache.value('1 mm', 'mm')
+    cache.value('3 mm', 'mm')
+    cache.value('1 mm', 'mm')
+    cache.value('2 mm', 'mm')
+    assert evaluated == ['1 mm', '2 mm', '3 mm', '2 mm']
+    assert (cache.hits, cache.misses) == (2, 4)